@@ -1,7 +1,13 @@
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from app.config import settings
-from typing import Dict, Any, Optional
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError, get_breaker
+from app.core.metrics import record_token_usage, track_llm_call
+from app.core.prompt_assembly import PromptAssembler, Section, prompt_budget
+from app.core.tracing import span
+from app.utils.llm_json import response_format
+from pydantic import BaseModel
+from typing import Dict, Any, List, Optional, Type
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,33 +15,92 @@ logger = logging.getLogger(__name__)
 class BaseAgent:
     """Base class for all specialized agents"""
     
-    def __init__(self, agent_name: str, system_prompt: str):
+    def __init__(self, agent_name: str, system_prompt: str, role: Optional[str] = None,
+                 output_model: Optional[Type[BaseModel]] = None):
         self.agent_name = agent_name
         self.system_prompt = system_prompt
+        # Replies are constrained to this model's JSON schema when LLM_STRUCTURED_OUTPUT is on
+        self.output_model = output_model
         
         # Initialize LLM with OpenAI
-        self.llm = ChatOpenAI(
-            model=settings.LLM_MODEL,
-            temperature=settings.LLM_TEMPERATURE,
-            api_key=settings.OPENAI_API_KEY
-        )
+        self.llm = self._build_llm(settings.LLM_MODEL)
         
-        # Create prompt template
+        # Create prompt template; the system prompt is literal text, so its JSON examples must not be parsed as variables
         self.prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt),
+            ("system", system_prompt.replace("{", "{{").replace("}", "}}")),
             ("human", "{input}")
         ])
         
-        # Create chain
+        # The system prompt is the static, cacheable prefix; inputs are fitted to the role's token budget
+        self.assembler = PromptAssembler(agent_name, system_prompt,
+                                         prompt_budget(role) if role else settings.PROMPT_TOKEN_BUDGET)
+        
+        # Create chain; chains for other models (cascade tiers) are built on first use
         self.chain = self.prompt | self.llm
+        self._model_chains: Dict[str, Any] = {settings.LLM_MODEL: self.chain}
         
         logger.info(f"✓ {agent_name} LLM chain initialized with OpenAI {settings.LLM_MODEL}")
     
-    def process(self, input_data: str) -> str:
-        """Process input using LLM"""
+    def _build_llm(self, model: str):
+        llm = ChatOpenAI(
+            model=model,
+            temperature=settings.LLM_TEMPERATURE,
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL,
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+            max_retries=settings.LLM_MAX_RETRIES
+        )
+        if self.output_model is not None and settings.LLM_STRUCTURED_OUTPUT:
+            return llm.bind(response_format=response_format(self.output_model))
+        return llm
+    
+    def _chain_for(self, model: str):
+        chain = self._model_chains.get(model)
+        if chain is None:
+            chain = self._model_chains[model] = self.prompt | self._build_llm(model)
+        return chain
+    
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self.breaker_for(settings.LLM_MODEL)
+    
+    def breaker_for(self, model: str) -> CircuitBreaker:
+        """One breaker per model, so an outage of a cascade tier does not block the others"""
+        if model == settings.LLM_MODEL:
+            return get_breaker(f"llm:{self.agent_name}")
+        return get_breaker(f"llm:{self.agent_name}:{model}")
+    
+    def _invoke(self, input_data: str, model: str):
+        with span("llm", agent=self.agent_name) as llm_span, track_llm_call(self.agent_name):
+            response = self._chain_for(model).invoke({"input": input_data})
+        usage = getattr(response, "usage_metadata", None) or {}
+        model = getattr(response, "response_metadata", {}).get("model_name", model)
+        record_token_usage(self.agent_name, model, usage.get("input_tokens"), usage.get("output_tokens"))
+        if llm_span is not None:
+            llm_span.attributes.update({"llm.model": model,
+                                        "llm.prompt_tokens": usage.get("input_tokens", 0),
+                                        "llm.completion_tokens": usage.get("output_tokens", 0)})
+        return response
+    
+    def build_input(self, sections: List[Section]) -> str:
+        """Assemble the human message from `sections`, truncating or dropping the least important to fit"""
+        with span("prompt.build", agent=self.agent_name) as build_span:
+            prompt = self.assembler.assemble(sections)
+            if build_span is not None:
+                build_span.attributes.update({"prompt.tokens": prompt.tokens, "prompt.budget": prompt.budget,
+                                              "prompt.truncated": ",".join(prompt.truncated + prompt.dropped)})
+        return prompt.user
+    
+    def process(self, input_data: str, model: Optional[str] = None) -> str:
+        """Process input using LLM (`model` defaults to LLM_MODEL); fails fast while its circuit is open"""
+        model = model or settings.LLM_MODEL
         try:
-            response = self.chain.invoke({"input": input_data})
+            with span("agent.process", agent=self.agent_name, input_chars=len(input_data)):
+                response = self.breaker_for(model).call(self._invoke, input_data, model)
             return response.content
+        except CircuitOpenError as e:
+            logger.warning(f"{self.agent_name}: {e}")
+            return f"Error: {str(e)}"
         except Exception as e:
             logger.error(f"Error in {self.agent_name}: {e}")
             return f"Error: {str(e)}"
\ No newline at end of file
@@ -1,5 +1,15 @@
 from app.agents.base_agent import BaseAgent
-from typing import Dict, List
+from app.config import settings
+from app.core.metrics import record_json_parse_failure
+from app.core.model_cascade import Tier, cascade_enabled, model_tiers, run_cascade
+from app.core.prompt_assembly import Section
+from app.core.tracing import span
+from app.services.scheme_catalog import match_catalog
+from app.models.citizen_profile import CitizenProfile
+from app.models.llm_outputs import BenefitRecommendations
+from app.utils.llm_json import LLMOutputError, parse_llm_output
+from functools import partial
+from typing import Dict, List, Optional, Tuple, Union
 import logging
 
 logger = logging.getLogger(__name__)
@@ -35,13 +45,16 @@ class BenefitMatcherAgent(BaseAgent):
     def __init__(self):
         super().__init__(
             agent_name="Benefit Matcher Agent",
-            system_prompt=BENEFIT_MATCHER_PROMPT
+            system_prompt=BENEFIT_MATCHER_PROMPT,
+            role="benefit_matcher",
+            output_model=BenefitRecommendations
         )
     
     def find_matching_schemes(self, 
-                             citizen_profile: Dict, 
+                             citizen_profile: Union[CitizenProfile, Dict], 
                              available_schemes: List[Dict]) -> Dict:
         """Find and rank schemes suitable for citizen"""
+        citizen_profile = CitizenProfile.coerce(citizen_profile)
         
         logger.info(f"Finding matches for citizen profile with {len(available_schemes)} available schemes")
         
@@ -62,28 +75,34 @@ class BenefitMatcherAgent(BaseAgent):
                 "total_potential_benefit": "0"
             }
         
-        # Create matching prompt
-        matching_input = f"""
-Citizen Profile and Needs:
-{self._format_citizen(citizen_profile)}
-
-Available Government Schemes:
-{self._format_schemes(available_schemes)}
-
-Recommend the most suitable schemes for this citizen.
-"""
+        # Create matching prompt; the scheme list (usually the same catalog) leads so the prefix can be cached,
+        # and schemes at the end of the list are left out when it does not fit the budget
+        matching_input = self.build_input([
+            Section("schemes", [self._format_scheme(i, s) for i, s in enumerate(available_schemes, 1)],
+                    priority=1, header="Available Government Schemes:"),
+            Section("citizen", self._format_citizen(citizen_profile), required=True,
+                    header="Citizen Profile and Needs:"),
+            Section("instructions", "Recommend the most suitable schemes for this citizen.")
+        ])
+        
+        if cascade_enabled("benefit_matcher"):
+            return self._match_with_cascade(citizen_profile, available_schemes, matching_input)
         
         try:
             response = self.process(matching_input)
+            if response.startswith("Error:"):
+                logger.warning("LLM unavailable, matching schemes from the catalog")
+                return {**match_catalog(citizen_profile, available_schemes), "degraded_reason": response}
             
-            # Try to parse JSON response
-            import json
-            result = json.loads(response)
+            # Parse and validate the JSON response
+            with span("json.parse"):
+                result = parse_llm_output(response, BenefitRecommendations)
             num_recommendations = len(result.get("recommendations", []))
             logger.info(f"✓ Found {num_recommendations} matching schemes")
             return result
-        except json.JSONDecodeError as e:
-            logger.warning(f"LLM response not valid JSON: {e}")
+        except LLMOutputError as e:
+            record_json_parse_failure("find_matching_schemes")
+            logger.warning(f"LLM response rejected: {e}")
             # Return a structured response even if parsing fails
             return {
                 "recommendations": [],
@@ -100,38 +119,76 @@ Recommend the most suitable schemes for this citizen.
                 "error": str(e)
             }
     
-    def _format_citizen(self, profile: Dict) -> str:
+    def _match_with_cascade(self, citizen_profile: Dict, available_schemes: List[Dict], matching_input: str) -> Dict:
+        """Small model first, escalating when its best match is not relevant enough"""
+        tiers = [Tier(name, partial(self._match_with_model, matching_input, model), model)
+                 for name, model in model_tiers()]
+        result = run_cascade(self.agent_name, tiers, _assess_matches, settings.CASCADE_MIN_RELEVANCE)
+        if result is None:
+            logger.warning("No model produced recommendations, matching schemes from the catalog")
+            return {**match_catalog(citizen_profile, available_schemes),
+                    "degraded_reason": "Error: no model tier produced valid recommendations"}
+        return result
+    
+    def _match_with_model(self, matching_input: str, model: str) -> Optional[Dict]:
+        response = self.process(matching_input, model=model)
+        if response.startswith("Error:"):
+            return None
+        try:
+            with span("json.parse"):
+                return parse_llm_output(response, BenefitRecommendations)
+        except LLMOutputError as e:
+            record_json_parse_failure("find_matching_schemes")
+            logger.warning(f"{model} response rejected: {e}")
+            return None
+    
+    def _format_citizen(self, profile: Union[CitizenProfile, Dict]) -> str:
         """Format citizen profile"""
-        lines = []
-        for key, value in profile.items():
-            lines.append(f"- {key}: {value}")
-        return "\n".join(lines)
+        return CitizenProfile.coerce(profile).render()
     
     def _format_schemes(self, schemes: List[Dict]) -> str:
         """Format schemes list"""
         if not schemes:
             return "No schemes available"
         
-        lines = []
-        for i, scheme in enumerate(schemes, 1):
-            lines.append(f"\n{i}. {scheme.get('scheme_name', 'Unknown')}")
-            lines.append(f"   Department: {scheme.get('department', 'N/A')}")
-            
-            # Handle benefits field - can be string or dict
-            benefits = scheme.get('benefits', 'N/A')
-            if isinstance(benefits, dict):
-                benefit_text = benefits.get('description', 'N/A')
+        return "\n".join(self._format_scheme(i, scheme) for i, scheme in enumerate(schemes, 1))
+    
+    def _format_scheme(self, i: int, scheme: Dict) -> str:
+        """Format one numbered scheme"""
+        lines = [f"\n{i}. {scheme.get('scheme_name', 'Unknown')}",
+                 f"   Department: {scheme.get('department', 'N/A')}"]
+        
+        # Handle benefits field - can be string or dict
+        benefits = scheme.get('benefits', 'N/A')
+        if isinstance(benefits, dict):
+            benefit_text = benefits.get('description', 'N/A')
+        else:
+            benefit_text = str(benefits)
+        lines.append(f"   Benefit: {benefit_text}")
+        
+        # Handle eligibility criteria
+        eligibility = scheme.get('eligibility_criteria') or scheme.get('eligibility', {})
+        if eligibility:
+            if isinstance(eligibility, dict):
+                eligibility_text = ', '.join([f"{k}: {v}" for k, v in eligibility.items()])
             else:
-                benefit_text = str(benefits)
-            lines.append(f"   Benefit: {benefit_text}")
-            
-            # Handle eligibility criteria
-            eligibility = scheme.get('eligibility_criteria', {})
-            if eligibility:
-                if isinstance(eligibility, dict):
-                    eligibility_text = ', '.join([f"{k}: {v}" for k, v in eligibility.items()])
-                else:
-                    eligibility_text = str(eligibility)
-                lines.append(f"   Eligibility: {eligibility_text}")
+                eligibility_text = str(eligibility)
+            lines.append(f"   Eligibility: {eligibility_text}")
         
-        return "\n".join(lines)
\ No newline at end of file
+        return "\n".join(lines)
+
+
+def _assess_matches(result: Dict) -> Tuple[Optional[str], float]:
+    """Schema problem (or None) and best relevance_score of a matching result"""
+    recommendations = result.get("recommendations") if isinstance(result, dict) else None
+    if not isinstance(recommendations, list):
+        return "missing recommendations", 0.0
+    scores = []
+    for recommendation in recommendations:
+        score = recommendation.get("relevance_score") if isinstance(recommendation, dict) else None
+        if not isinstance(recommendation, dict) or not recommendation.get("scheme_name"):
+            return "recommendation without scheme_name", 0.0
+        if isinstance(score, bool) or not isinstance(score, (int, float)):
+            return "relevance_score not a number", 0.0
+        scores.append(float(score))
+    return None, max(scores, default=0.0)
@@ -1,5 +1,12 @@
 from app.agents.base_agent import BaseAgent
-from typing import Dict, List
+from app.core.prompt_assembly import TAIL, Section
+from app.core.session_store import SessionStore, create_session_store, validate_session_id
+from app.core.semantic_cache import SemanticAnswerCache
+from app.models.citizen_profile import CitizenProfile
+from app.services.intent_router import IntentRouter
+from app.services.eligibility_rules import UNEXPLAINED, evaluate_criteria, render_explanation
+from app.config import settings
+from typing import Dict, List, Optional, Union
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,37 +28,96 @@ Your tone should be:
 
 Always remember you're helping citizens who may not be familiar with government processes."""
 
+# Shown instead of an error while the LLM is unavailable
+DEGRADED_MESSAGES = {
+    "en": ("I'm having trouble reaching our AI service right now. I can still answer questions about a "
+           "scheme's documents, benefits, eligibility, age or income limits from our scheme catalog. "
+           "Please try again in a minute for anything else."),
+    "hi": ("अभी हमारी AI सेवा से संपर्क करने में समस्या हो रही है। मैं अब भी योजना कैटलॉग से किसी योजना के "
+           "दस्तावेज़, लाभ, पात्रता, आयु या आय सीमा के बारे में बता सकता हूँ। बाकी प्रश्नों के लिए कृपया एक मिनट "
+           "बाद फिर से प्रयास करें।"),
+}
+
 class CitizenAdvocateAgent(BaseAgent):
     """Agent that provides conversational guidance to citizens"""
     
-    def __init__(self):
+    def __init__(self, session_store: Optional[SessionStore] = None):
         super().__init__(
             agent_name="Citizen Advocate Agent",
-            system_prompt=CITIZEN_ADVOCATE_PROMPT
+            system_prompt=CITIZEN_ADVOCATE_PROMPT,
+            role="citizen_advocate"
         )
-        self.conversation_history = []
+        self.session_store = session_store or create_session_store()
+        self.answer_cache = SemanticAnswerCache() if settings.SEMANTIC_CACHE_ENABLED else None
+        self.intent_router = IntentRouter() if settings.INTENT_ROUTER_ENABLED else None
     
-    def chat(self, user_message: str, context: Dict = None) -> str:
+    def chat(self, user_message: str, context: Dict = None, session_id: Optional[str] = None) -> str:
         """Have a conversation with the citizen"""
+        return self.respond(user_message, context=context, session_id=session_id)["response"]
+    
+    def respond(self, user_message: str, context: Dict = None, session_id: Optional[str] = None) -> Dict:
+        """Answer the citizen and report how the answer was produced"""
         
         logger.info(f"Citizen message: {user_message[:100]}...")
+        # Only callers that track a session get their turns kept and replayed
+        if session_id is not None:
+            validate_session_id(session_id)
+        
+        # Plain catalog lookups are answered from templates
+        route = self.intent_router.route(user_message) if self.intent_router and not context else None
+        if route and route["answer"]:
+            logger.info(f"✓ Answered from catalog ({route['decision']['intent']} / {route['decision']['scheme']})")
+            self._remember(session_id, user_message, route["answer"])
+            return {
+                "response": route["answer"],
+                "metadata": {"source": "intent_router", "router": route["decision"]}
+            }
+        router_metadata = {"router": route["decision"]} if route else {}
+        
+        # Cached answers are only valid for context-free questions
+        cacheable = self.answer_cache is not None and not context and not session_id
+        if cacheable:
+            cached = self.answer_cache.lookup(user_message)
+            if cached:
+                logger.info(f"✓ Semantic cache hit (similarity={cached['similarity']:.3f})")
+                return {
+                    "response": cached["answer"],
+                    "metadata": {
+                        "source": "semantic_cache",
+                        "cache_entry_id": cached["id"],
+                        "similarity": round(cached["similarity"], 4),
+                        **router_metadata
+                    }
+                }
+        
+        history = self.session_store.get_history(session_id, limit=settings.SESSION_MAX_TURNS) if session_id else []
         
-        # Add context if provided
-        full_message = user_message
+        # Add context if provided; the oldest turns go first when the budget is tight
+        sections = [Section("question", f"User Question: {user_message}" if context or history else user_message,
+                            required=True)]
         if context:
-            context_str = self._format_context(context)
-            full_message = f"Context:\n{context_str}\n\nUser Question: {user_message}"
+            sections.insert(0, Section("context", self._format_context(context), priority=1, header="Context:"))
+        if history:
+            sections.insert(0, Section("history", [self._format_turn(turn) for turn in history], priority=2,
+                                       keep=TAIL, header="Previous conversation:"))
+        full_message = self.build_input(sections)
         
         response = self.process(full_message)
+        if response.startswith("Error:"):
+            language = route["decision"]["language"] if route else "en"
+            logger.warning(f"LLM unavailable, sending degraded reply: {response}")
+            return {
+                "response": DEGRADED_MESSAGES.get(language, DEGRADED_MESSAGES["en"]),
+                "metadata": {"source": "degraded", "error": response, **router_metadata}
+            }
         
-        # Store conversation history
-        self.conversation_history.append({
-            "user": user_message,
-            "agent": response
-        })
+        if cacheable and not response.startswith("Error:"):
+            self.answer_cache.store(user_message, response)
+        
+        self._remember(session_id, user_message, response)
         
         logger.info(f"✓ Generated response ({len(response)} chars)")
-        return response
+        return {"response": response, "metadata": {"source": "llm", **router_metadata}}
     
     def guide_application(self, scheme_name: str, application_steps: List[str]) -> str:
         """Guide citizen through application process"""
@@ -65,26 +131,57 @@ Can you guide me through this process step by step?
         
         return self.chat(guide_message)
     
-    def explain_eligibility(self, scheme_name: str, criteria: Dict, citizen_profile: Dict) -> str:
+    def explain_eligibility(self, scheme_name: str, criteria: Dict, citizen_profile: Union[CitizenProfile, Dict],
+                            language: str = "en") -> str:
         """Explain eligibility in simple terms"""
         
+        citizen_profile = CitizenProfile.coerce(citizen_profile)
+        # Structured criteria are explained from templates; only the rest needs the LLM
+        results = evaluate_criteria(criteria, citizen_profile)
+        explanation = render_explanation(scheme_name, results, language)
+        unexplained = {r["criterion"]: r["requirement"] for r in results if r["status"] == UNEXPLAINED}
+        
+        if not unexplained:
+            logger.info(f"✓ Explained eligibility for {scheme_name} from rules")
+            return explanation
+        
         context = {
             "scheme": scheme_name,
-            "requirements": criteria,
+            "requirements": unexplained,
             "my_situation": citizen_profile
         }
+        if explanation:
+            context["already_checked"] = explanation
         
         explain_message = f"Am I eligible for {scheme_name}? Please explain in simple terms."
+        if explanation:
+            explain_message = (f"For {scheme_name}, please explain in simple terms whether I meet the requirements listed "
+                               f"above. The other criteria have already been checked.")
+        if language == "hi":
+            explain_message += " Please answer in Hindi."
         
-        return self.chat(explain_message, context=context)
+        llm_explanation = self.chat(explain_message, context=context)
+        return f"{explanation}\n\n{llm_explanation}" if explanation else llm_explanation
     
     def _format_context(self, context: Dict) -> str:
         """Format context for LLM"""
         lines = []
         for key, value in context.items():
-            lines.append(f"{key}: {value}")
+            if isinstance(value, CitizenProfile):
+                lines.append(f"{key}:\n{value.render()}")
+            else:
+                lines.append(f"{key}: {value}")
         return "\n".join(lines)
     
-    def get_conversation_history(self) -> List[Dict]:
+    def _format_turn(self, turn: Dict) -> str:
+        """Format an earlier turn of the session for LLM"""
+        return f"Citizen: {turn['user']}\nAdvocate: {turn['agent']}"
+    
+    def _remember(self, session_id: Optional[str], user_message: str, response: str):
+        """Store the turn; sessionless turns are not kept, so they can never be replayed to another caller"""
+        if session_id is not None:
+            self.session_store.append_turn(session_id, user_message, response)
+    
+    def get_conversation_history(self, session_id: str) -> List[Dict]:
         """Get conversation history"""
-        return self.conversation_history
\ No newline at end of file
+        return self.session_store.get_history(validate_session_id(session_id))
\ No newline at end of file
@@ -1,5 +1,15 @@
 from app.agents.base_agent import BaseAgent
-from typing import Dict, List, Any
+from app.config import settings
+from app.core.metrics import record_json_parse_failure
+from app.core.model_cascade import RULES, Tier, cascade_enabled, model_tiers, run_cascade
+from app.core.prompt_assembly import Section
+from app.core.tracing import span
+from app.services.eligibility_rules import FAILED, MET, evaluate_criteria, render_explanation, verdict
+from app.models.citizen_profile import CitizenProfile
+from app.models.llm_outputs import EligibilityResult
+from app.utils.llm_json import LLMOutputError, parse_llm_output
+from functools import partial
+from typing import Dict, List, Any, Optional, Tuple, Union
 import logging
 
 logger = logging.getLogger(__name__)
@@ -30,36 +40,43 @@ class EligibilityVerifierAgent(BaseAgent):
     def __init__(self):
         super().__init__(
             agent_name="Eligibility Verifier Agent",
-            system_prompt=ELIGIBILITY_VERIFIER_PROMPT
+            system_prompt=ELIGIBILITY_VERIFIER_PROMPT,
+            role="eligibility_verifier",
+            output_model=EligibilityResult
         )
     
     def verify_eligibility(self, 
-                          citizen_profile: Dict, 
+                          citizen_profile: Union[CitizenProfile, Dict], 
                           scheme_criteria: Dict) -> Dict:
         """Verify if citizen meets scheme eligibility criteria"""
         
         logger.info(f"Verifying eligibility for scheme")
+        citizen_profile = CitizenProfile.coerce(citizen_profile)
         
-        # Create verification prompt
-        verification_input = f"""
-Citizen Profile:
-{self._format_profile(citizen_profile)}
-
-Scheme Eligibility Criteria:
-{self._format_criteria(scheme_criteria)}
-
-Verify if this citizen is eligible for the scheme.
-"""
+        # Create verification prompt; the profile leads, as batch_verify repeats it for every scheme
+        verification_input = self.build_input([
+            Section("profile", self._format_profile(citizen_profile), priority=1, required=True,
+                    header="Citizen Profile:"),
+            Section("criteria", self._format_criteria(scheme_criteria), required=True,
+                    header="Scheme Eligibility Criteria:"),
+            Section("instructions", "Verify if this citizen is eligible for the scheme.")
+        ])
+        if cascade_enabled("eligibility_verifier"):
+            return self._verify_with_cascade(citizen_profile, scheme_criteria, verification_input)
         
         response = self.process(verification_input)
+        if response.startswith("Error:"):
+            logger.warning("LLM unavailable, verifying eligibility with rules")
+            return self._verify_with_rules(citizen_profile, scheme_criteria, reason=response)
         
         try:
-            import json
-            result = json.loads(response)
+            with span("json.parse"):
+                result = parse_llm_output(response, EligibilityResult)
             logger.info(f"✓ Verification complete: Eligible={result.get('is_eligible', False)}")
             return result
-        except:
-            logger.warning("LLM response not valid JSON")
+        except LLMOutputError as e:
+            record_json_parse_failure("verify_eligibility")
+            logger.warning(f"LLM response rejected: {e}")
             return {
                 "is_eligible": False,
                 "confidence": 0.5,
@@ -67,12 +84,56 @@ Verify if this citizen is eligible for the scheme.
                 "error": "Failed to parse verification result"
             }
     
-    def _format_profile(self, profile: Dict) -> str:
+    def _verify_with_cascade(self, citizen_profile: Dict, scheme_criteria: Dict, verification_input: str) -> Dict:
+        """Rules first (accepted only when a typed criterion fails), then the small and default models"""
+        tiers = []
+        if settings.CASCADE_RULES_FIRST:
+            tiers.append(Tier(RULES, partial(self._verify_with_rules, citizen_profile, scheme_criteria)))
+        for name, model in model_tiers():
+            tiers.append(Tier(name, partial(self._verify_with_model, verification_input, model), model))
+        result = run_cascade(self.agent_name, tiers, _assess_verification, settings.CASCADE_MIN_CONFIDENCE)
+        if result is None:
+            logger.warning("No model produced a verdict, verifying eligibility with rules")
+            return self._verify_with_rules(citizen_profile, scheme_criteria,
+                                           reason="Error: no model tier produced a valid verdict")
+        return result
+    
+    def _verify_with_model(self, verification_input: str, model: str) -> Optional[Dict]:
+        response = self.process(verification_input, model=model)
+        if response.startswith("Error:"):
+            return None
+        try:
+            with span("json.parse"):
+                return parse_llm_output(response, EligibilityResult)
+        except LLMOutputError as e:
+            record_json_parse_failure("verify_eligibility")
+            logger.warning(f"{model} response rejected: {e}")
+            return None
+    
+    def _verify_with_rules(self, citizen_profile: Dict, scheme_criteria: Dict, reason: Optional[str] = None) -> Dict:
+        """Deterministic verification of the structured criteria (cascade tier, and fallback when the LLM is down)"""
+        results = evaluate_criteria(scheme_criteria, citizen_profile)
+        outcome = verdict(results)
+        checked = [r for r in results if r["status"] in (MET, FAILED)]
+        result = {
+            "is_eligible": outcome == "eligible",
+            "confidence": round(len(checked) / len(results), 2) if results else 0.0,
+            "matched_criteria": [r["criterion"] for r in results if r["status"] == MET],
+            "failed_criteria": [r["criterion"] for r in results if r["status"] == FAILED],
+            "explanation": render_explanation("this scheme", results) or "The criteria could not be checked automatically.",
+            "recommendations": [],
+            "verdict": outcome,
+            # Only a failed criterion given as numbers or a list is conclusive; text may have been misread
+            "conclusive": any(r["status"] == FAILED and r.get("typed") for r in results),
+            "source": "rules"
+        }
+        if reason:
+            result["degraded_reason"] = reason
+        return result
+    
+    def _format_profile(self, profile: Union[CitizenProfile, Dict]) -> str:
         """Format citizen profile for LLM"""
-        lines = []
-        for key, value in profile.items():
-            lines.append(f"- {key}: {value}")
-        return "\n".join(lines)
+        return CitizenProfile.coerce(profile).render()
     
     def _format_criteria(self, criteria: Dict) -> str:
         """Format eligibility criteria for LLM"""
@@ -92,9 +153,11 @@ Verify if this citizen is eligible for the scheme.
         return "\n".join(lines)
     
     def batch_verify(self, 
-                    citizen_profile: Dict, 
+                    citizen_profile: Union[CitizenProfile, Dict], 
                     schemes: List[Dict]) -> List[Dict]:
         """Verify eligibility against multiple schemes"""
+        # Normalized and rendered once for the whole batch
+        citizen_profile = CitizenProfile.coerce(citizen_profile)
         results = []
         
         for scheme in schemes:
@@ -105,4 +168,19 @@ Verify if this citizen is eligible for the scheme.
             result["scheme_name"] = scheme.get("scheme_name", "Unknown")
             results.append(result)
         
-        return results
\ No newline at end of file
+        return results
+
+
+def _assess_verification(result: Dict) -> Tuple[Optional[str], float]:
+    """Schema problem (or None) and confidence of a verification result"""
+    if not isinstance(result, dict) or not isinstance(result.get("is_eligible"), bool):
+        return "missing is_eligible", 0.0
+    confidence = result.get("confidence")
+    if isinstance(confidence, bool) or not isinstance(confidence, (int, float)) or not 0 <= confidence <= 1:
+        return "confidence not between 0 and 1", 0.0
+    if result.get("source") == "rules":
+        # A failed typed criterion settles it; anything else from the rules goes on to a model
+        return None, 1.0 if result.get("verdict") == "not_eligible" and result.get("conclusive") else 0.0
+    if result.get("verdict") == "undetermined":
+        return None, 0.0
+    return None, float(confidence)
@@ -0,0 +1,72 @@
+"""
+Agent Loader
+Builds agents by role. `LazyAgent` defers building an agent, and importing
+its LLM stack, until the agent is first used.
+"""
+import importlib
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+AGENT_CLASSES = {
+    "policy_parser": "app.agents.policy_parser:PolicyParserAgent",
+    "eligibility_verifier": "app.agents.eligibility_verifier:EligibilityVerifierAgent",
+    "benefit_matcher": "app.agents.benefit_matcher:BenefitMatcherAgent",
+    "citizen_advocate": "app.agents.citizen_advocate:CitizenAdvocateAgent",
+}
+
+
+def build_agent(role: str) -> Any:
+    """Instantiate only the agent class for `role`"""
+    module_name, class_name = AGENT_CLASSES[role].split(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class LazyAgent:
+    """Stands in for an agent and builds it on first attribute access"""
+
+    def __init__(self, role: str):
+        if role not in AGENT_CLASSES:
+            raise ValueError(f"Unknown agent role: {role}")
+        self.role = role
+        self.init_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self._agent: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_warm(self) -> bool:
+        return self._agent is not None
+
+    def load(self) -> Any:
+        """Build the agent if needed; concurrent callers wait for one build"""
+        if self._agent is None:
+            with self._lock:
+                if self._agent is None:
+                    started = time.perf_counter()
+                    try:
+                        agent = build_agent(self.role)
+                    except Exception as e:
+                        self.error = str(e)
+                        raise
+                    self.init_ms = round((time.perf_counter() - started) * 1000, 1)
+                    self.error = None
+                    self._agent = agent
+                    logger.info(f"✓ {self.role} agent ready in {self.init_ms} ms")
+        return self._agent
+
+    def state(self) -> Dict:
+        return {
+            "state": "warm" if self.is_warm else ("failed" if self.error else "cold"),
+            "init_ms": self.init_ms,
+            "error": self.error
+        }
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes not defined on the proxy itself
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
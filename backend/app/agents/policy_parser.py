@@ -1,7 +1,16 @@
 from app.agents.base_agent import BaseAgent
-from typing import Dict, List
+from app.config import settings
+from app.core.metrics import record_document_extraction, record_json_parse_failure
+from app.core.prompt_assembly import Section, count_tokens
+from app.core.tracing import span
+from app.models.llm_outputs import ParsedScheme
+from app.services.document_extractor import extract_relevant, split_sections
+from app.services.scheme_store import SchemeVersionStore, diff_sections, field_changes
+from app.utils.llm_json import LLMOutputError, parse_llm_output
+from typing import Dict, List, Optional
 import json
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -15,23 +24,23 @@ Your role:
 5. Extract application procedures
 
 Output Format (JSON):
-{{
+{
     "scheme_name": "Name of the scheme",
     "department": "Government department",
-    "eligibility_criteria": {{
-        "age": {{"min": 18, "max": 60}},
-        "income": {{"max": 100000, "unit": "annual"}},
+    "eligibility_criteria": {
+        "age": {"min": 18, "max": 60},
+        "income": {"max": 100000, "unit": "annual"},
         "location": ["state/district"],
         "other": ["additional criteria"]
-    }},
-    "benefits": {{
+    },
+    "benefits": {
         "type": "financial/in-kind/service",
         "amount": "value if applicable",
         "description": "benefit details"
-    }},
+    },
     "required_documents": ["list of documents"],
     "application_process": "how to apply"
-}}
+}
 
 Be precise and extract only factual information from the document."""
 
@@ -41,45 +50,144 @@ class PolicyParserAgent(BaseAgent):
     def __init__(self):
         super().__init__(
             agent_name="Policy Parser Agent",
-            system_prompt=POLICY_PARSER_PROMPT
+            system_prompt=POLICY_PARSER_PROMPT,
+            role="policy_parser",
+            output_model=ParsedScheme
         )
+        self._versions: Optional[SchemeVersionStore] = None
+        self._versions_lock = threading.Lock()
+        self._scheme_locks: Dict[str, threading.Lock] = {}
     
     def parse_scheme_document(self, document_text: str) -> Dict:
         """Parse a scheme document and extract structured information"""
         logger.info(f"Parsing scheme document ({len(document_text)} chars)")
         
-        # Add explicit instruction for JSON output
-        enhanced_prompt = f"""Parse the following government scheme document and return ONLY a valid JSON object (no markdown formatting, no code blocks):
+        # Preamble, boilerplate and tables are dropped locally before the LLM sees the document
+        extraction = None
+        if settings.PARSER_EXTRACTION_ENABLED:
+            with span("document.extract"):
+                extraction = extract_relevant(document_text, settings.PARSER_EXTRACTION_TOKEN_BUDGET,
+                                              settings.PARSER_EXTRACTION_MIN_TOKENS)
+            record_document_extraction(extraction.original_tokens, extraction.extracted_tokens)
+            document_text = extraction.text
+        
+        # Add explicit instruction for JSON output; long documents are cut to the token budget
+        enhanced_prompt = self.build_input([
+            Section("document", document_text, priority=1, required=True,
+                    header="Parse the following government scheme document and return ONLY a valid JSON object "
+                           "(no markdown formatting, no code blocks):\n"),
+            Section("instructions", "Return the structured information as a JSON object following the specified format.")
+        ])
+        
+        scheme_data = self._parse_reply(self.process(enhanced_prompt))
+        if extraction is not None:
+            scheme_data["extraction"] = extraction.report()
+        return scheme_data
+    
+    def parse_scheme_revision(self, document_text: str, scheme_id: str) -> Dict:
+        """
+        Parse a (possibly revised) version of a stored scheme. Only the sections
+        that differ from the stored version are sent to the LLM, which patches
+        the stored result; the result carries a `revision` report with the
+        changelog of the fields that changed.
+        """
+        with self._scheme_lock(scheme_id):
+            sections = split_sections(document_text)
+            stored = self.versions.get(scheme_id)
+            if stored is None:
+                return self._store_full_parse(scheme_id, document_text, sections, {}, len(sections), 0)
 
-{document_text}
+            changed, removed = diff_sections(stored["sections"], sections)
+            if not changed and not removed:
+                logger.info(f"📄 {scheme_id}: unchanged since version {stored['version']}")
+                result = dict(stored["result"])
+                result["revision"] = self._revision(scheme_id, stored["version"], "unchanged", len(sections), 0, 0, [])
+                return result
 
-Return the structured information as a JSON object following the specified format."""
-        
-        response = self.process(enhanced_prompt)
+            # Removed text counts too: a document cut down to a few sections is parsed whole
+            removed_tokens = count_tokens("\n".join(removed))
+            changed_share = ((count_tokens("\n".join(changed)) + removed_tokens)
+                             / max(count_tokens(document_text) + removed_tokens, 1))
+            if changed_share > settings.SCHEME_REPARSE_MAX_CHANGED:
+                logger.info(f"📄 {scheme_id}: {changed_share:.0%} of the document changed, parsing it whole")
+                return self._store_full_parse(scheme_id, document_text, sections, stored["result"], len(changed),
+                                              len(removed))
+
+            logger.info(f"📄 {scheme_id}: re-parsing {len(changed)} changed and {len(removed)} removed "
+                        f"of {len(sections)} sections")
+            enhanced_prompt = self.build_input([
+                Section("record", json.dumps(stored["result"], ensure_ascii=False, indent=2), required=True,
+                        header="Current structured record of the scheme:"),
+                Section("changed", changed, priority=1, required=True, separator="\n\n",
+                        header="Sections added or changed in the revised document:"),
+                Section("removed", removed, priority=2, separator="\n\n",
+                        header="Sections removed from the revised document:"),
+                Section("instructions", "Return the complete updated record as a JSON object following the "
+                                        "specified format. Change only the fields affected by the sections above "
+                                        "and copy every other field unchanged.")
+            ])
+            result = self._parse_reply(self.process(enhanced_prompt))
+            if "error" in result:
+                return result
+            changelog = field_changes(stored["result"], result)
+            version = self.versions.put(scheme_id, sections, result, "incremental", changelog)
+            result["revision"] = self._revision(scheme_id, version, "incremental", len(sections), len(changed),
+                                                len(removed), changelog)
+            return result
+    
+    def _store_full_parse(self, scheme_id: str, document_text: str, sections: List[str], previous: Dict,
+                          changed: int, removed: int) -> Dict:
+        result = self.parse_scheme_document(document_text)
+        if "error" in result:
+            return result
+        record = {k: v for k, v in result.items() if k != "extraction"}
+        changelog = field_changes(previous, record) if previous else []
+        version = self.versions.put(scheme_id, sections, record, "full", changelog)
+        result["revision"] = self._revision(scheme_id, version, "full", len(sections), changed, removed, changelog)
+        return result
+    
+    @staticmethod
+    def _revision(scheme_id: str, version: int, mode: str, sections: int, changed: int, removed: int,
+                  changelog: List[Dict]) -> Dict:
+        return {
+            "scheme_id": scheme_id,
+            "version": version,
+            "mode": mode,
+            "sections": sections,
+            "changed_sections": changed,
+            "removed_sections": removed,
+            "changelog": changelog
+        }
+    
+    @property
+    def versions(self) -> SchemeVersionStore:
+        if self._versions is None:
+            with self._versions_lock:
+                if self._versions is None:
+                    self._versions = SchemeVersionStore()
+        return self._versions
+    
+    def _scheme_lock(self, scheme_id: str) -> threading.Lock:
+        """Revisions of one scheme are applied one at a time"""
+        with self._versions_lock:
+            return self._scheme_locks.setdefault(scheme_id, threading.Lock())
+    
+    def _parse_reply(self, response: str) -> Dict:
         logger.info(f"Received response ({len(response)} chars)")
-        
         try:
-            # Clean response - remove markdown code blocks if present
-            cleaned_response = response.strip()
-            if cleaned_response.startswith("```json"):
-                cleaned_response = cleaned_response[7:]
-            if cleaned_response.startswith("```"):
-                cleaned_response = cleaned_response[3:]
-            if cleaned_response.endswith("```"):
-                cleaned_response = cleaned_response[:-3]
-            cleaned_response = cleaned_response.strip()
-            
-            # Try to parse as JSON
-            scheme_data = json.loads(cleaned_response)
+            # Markdown code blocks are stripped, then the reply is validated against ParsedScheme
+            with span("json.parse"):
+                scheme_data = parse_llm_output(response, ParsedScheme)
             logger.info(f"✓ Successfully parsed scheme: {scheme_data.get('scheme_name', 'Unknown')}")
             return scheme_data
-        except json.JSONDecodeError as e:
+        except LLMOutputError as e:
+            record_json_parse_failure("parse_scheme_document")
             logger.error(f"JSON parse error: {e}")
             logger.error(f"Response was: {response[:500]}")
             return {
                 "scheme_name": "Unknown",
                 "raw_response": response,
-                "error": f"Failed to parse as JSON: {str(e)}"
+                "error": f"Failed to parse as {'JSON' if e.kind == 'json' else 'a scheme'}: {str(e)}"
             }
     
     def extract_eligibility_rules(self, scheme_data: Dict) -> List[Dict]:
@@ -0,0 +1,220 @@
+"""
+Admission Control
+Bounds the work a server process takes on at once. Requests are grouped into
+classes (interactive chat, eligibility, heavy parse/ingest); when every slot is
+busy they wait in a bounded queue, highest priority first, and are shed with
+503 + Retry-After once the queue is full or they have waited too long. Part of
+the capacity is reserved for chat so a burst of uploads cannot starve it.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.core.tracing import span
+
+logger = logging.getLogger(__name__)
+
+CHAT = "chat"
+ELIGIBILITY = "eligibility"
+HEAVY = "heavy"
+
+# Class -> (priority, lower is served first; max queue wait; Retry-After when shed)
+CLASS_POLICIES = {
+    CHAT: (0, settings.ADMISSION_CHAT_QUEUE_WAIT_SECONDS, 2),
+    ELIGIBILITY: (1, settings.ADMISSION_QUEUE_WAIT_SECONDS, 5),
+    HEAVY: (2, settings.ADMISSION_HEAVY_QUEUE_WAIT_SECONDS, 15),
+}
+
+# (method, path prefix) -> class; unmatched requests are not admission controlled
+ENDPOINT_CLASSES: List[Tuple[str, str, str]] = [
+    ("POST", "/api/chat", CHAT),
+    ("POST", "/api/verify-eligibility", ELIGIBILITY),
+    ("POST", "/api/find-benefits", ELIGIBILITY),
+    ("POST", "/api/parse-scheme", HEAVY),
+    ("POST", "/api/jobs", HEAVY),
+    ("POST", "/api/agents/test-communication", HEAVY),
+]
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    for endpoint_method, prefix, request_class in ENDPOINT_CLASSES:
+        if method == endpoint_method and path.startswith(prefix):
+            return request_class
+    return None
+
+
+class RequestShed(Exception):
+    """The request was not admitted; `retry_after` is a hint in seconds"""
+
+    def __init__(self, request_class: str, reason: str, retry_after: int):
+        super().__init__(f"Server busy ({reason}), retry in {retry_after}s")
+        self.request_class = request_class
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("request_class", "priority", "seq", "future", "enqueued_at")
+
+    def __init__(self, request_class: str, priority: int, seq: int, future: asyncio.Future):
+        self.request_class = request_class
+        self.priority = priority
+        self.seq = seq
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class AdmissionController:
+    """Slot accounting for one event loop; all methods run on that loop"""
+
+    def __init__(self,
+                 max_in_flight: int = settings.ADMISSION_MAX_IN_FLIGHT,
+                 chat_reserved: int = settings.ADMISSION_CHAT_RESERVED,
+                 max_queue_depth: int = settings.ADMISSION_MAX_QUEUE_DEPTH):
+        self.max_in_flight = max_in_flight
+        self.chat_reserved = min(chat_reserved, max_in_flight - 1)
+        self.max_queue_depth = max_queue_depth
+        self._in_flight: Dict[str, int] = {name: 0 for name in CLASS_POLICIES}
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._stats = {
+            name: {"admitted": 0, "queued": 0, "shed_queue_full": 0, "shed_queue_timeout": 0,
+                   "shed_displaced": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+            for name in CLASS_POLICIES
+        }
+
+    @property
+    def in_flight(self) -> int:
+        return sum(self._in_flight.values())
+
+    def _has_slot(self, request_class: str) -> bool:
+        # Non-chat work may not dip into the slots reserved for chat
+        limit = self.max_in_flight if request_class == CHAT else self.max_in_flight - self.chat_reserved
+        return self.in_flight < limit
+
+    def _shed(self, request_class: str, reason: str) -> RequestShed:
+        self._stats[request_class][f"shed_{reason}"] += 1
+        return RequestShed(request_class, reason, CLASS_POLICIES[request_class][2])
+
+    async def acquire(self, request_class: str):
+        """Take a slot for `request_class`, waiting in the queue if needed; raises RequestShed"""
+        priority, max_wait, _ = CLASS_POLICIES[request_class]
+        if not self._waiters and self._has_slot(request_class):
+            self._admit(request_class, 0.0)
+            return
+
+        if len(self._waiters) >= self.max_queue_depth:
+            # Queue full: make room by dropping the newest lower-priority waiter, else shed this request
+            victim = max(self._waiters, key=lambda w: (w.priority, w.seq))
+            if victim.priority <= priority:
+                raise self._shed(request_class, "queue_full")
+            self._waiters.remove(victim)
+            victim.future.set_exception(self._shed(victim.request_class, "displaced"))
+
+        waiter = _Waiter(request_class, priority, next(self._seq), asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        self._stats[request_class]["queued"] += 1
+        self._grant()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=max_wait)
+        except asyncio.TimeoutError:
+            if waiter.future.done():
+                waiter.future.result()    # granted, or displaced, just as the wait ran out
+                return
+            self._waiters.remove(waiter)
+            raise self._shed(request_class, "queue_timeout")
+        except asyncio.CancelledError:
+            # Client went away while queued; give back a slot granted in the meantime
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.future.done() and waiter.future.exception() is None:
+                self.release(request_class)
+            raise
+
+    def _admit(self, request_class: str, waited_ms: float):
+        self._in_flight[request_class] += 1
+        stats = self._stats[request_class]
+        stats["admitted"] += 1
+        stats["wait_ms_total"] += waited_ms
+        stats["wait_ms_max"] = max(stats["wait_ms_max"], waited_ms)
+
+    def _grant(self):
+        """Hand free slots to queued requests, highest priority then oldest first"""
+        for waiter in sorted(self._waiters, key=lambda w: (w.priority, w.seq)):
+            if not self._has_slot(waiter.request_class):
+                continue
+            self._waiters.remove(waiter)
+            self._admit(waiter.request_class, (time.monotonic() - waiter.enqueued_at) * 1000)
+            waiter.future.set_result(True)
+
+    def release(self, request_class: str):
+        self._in_flight[request_class] -= 1
+        self._grant()
+
+    def stats(self) -> Dict:
+        classes = {}
+        for name, stats in self._stats.items():
+            admitted = stats["admitted"]
+            classes[name] = {
+                "in_flight": self._in_flight[name],
+                "queue_depth": sum(1 for w in self._waiters if w.request_class == name),
+                "admitted": admitted,
+                "queued": stats["queued"],
+                "shed": {reason: stats[f"shed_{reason}"] for reason in ("queue_full", "queue_timeout", "displaced")},
+                "avg_wait_ms": round(stats["wait_ms_total"] / admitted, 1) if admitted else 0.0,
+                "max_wait_ms": round(stats["wait_ms_max"], 1)
+            }
+        return {
+            "max_in_flight": self.max_in_flight,
+            "chat_reserved": self.chat_reserved,
+            "max_queue_depth": self.max_queue_depth,
+            "in_flight": self.in_flight,
+            "queue_depth": len(self._waiters),
+            "classes": classes
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware; the slot is held until the response has been fully sent"""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        request_class = classify(scope.get("method", ""), scope.get("path", "")) if scope["type"] == "http" else None
+        if request_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            with span("admission.wait", request_class=request_class):
+                await self.controller.acquire(request_class)
+        except RequestShed as e:
+            logger.warning(f"🚦 Shed {request_class} request {scope['path']}: {e.reason}")
+            await self._reject(send, e)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(request_class)
+
+    @staticmethod
+    async def _reject(send, shed: RequestShed):
+        body = json.dumps({"detail": str(shed), "reason": shed.reason}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(shed.retry_after)).encode()),
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
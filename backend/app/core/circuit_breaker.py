@@ -0,0 +1,172 @@
+"""
+Circuit Breakers
+Stop calling a dependency (an LLM, the Zynd broker) after repeated failures so
+requests fail fast instead of waiting for every timeout. After a recovery
+period the breaker lets a few probe calls through (half-open); a success
+closes it again, a failure re-opens it.
+"""
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a dependency whose breaker is open"""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Circuit '{name}' is open; retry in {retry_in:.1f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker; safe to share between threads"""
+
+    def __init__(self,
+                 name: str,
+                 failure_threshold: int = settings.BREAKER_FAILURE_THRESHOLD,
+                 recovery_timeout: float = settings.BREAKER_RECOVERY_SECONDS,
+                 half_open_max_calls: int = settings.BREAKER_HALF_OPEN_MAX_CALLS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probes = 0
+        self._last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stats = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _retry_in(self) -> float:
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+
+    def _admit(self) -> Optional[bool]:
+        """None if the call is rejected, else whether it took a half-open probe slot"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return False
+            if state == HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return True
+            self._stats["rejected"] += 1
+            return None
+
+    def allow_request(self) -> bool:
+        """True if a call may go ahead; in half-open state this takes a probe slot"""
+        return self._admit() is not None
+
+    def check(self) -> bool:
+        """Raise CircuitOpenError unless a call may go ahead; True when it took a probe slot"""
+        probe = self._admit()
+        if probe is None:
+            raise CircuitOpenError(self.name, self._retry_in())
+        return probe
+
+    def release_probe(self):
+        """Give back a probe slot whose call ended without an outcome (e.g. it was cancelled)"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self):
+        with self._lock:
+            self._stats["successes"] += 1
+            self._failures = 0
+            if self._state != CLOSED:
+                self._state = CLOSED
+                self._opened_at = None
+                logger.info(f"✓ Circuit '{self.name}' closed")
+
+    def record_failure(self, error: Optional[BaseException] = None):
+        with self._lock:
+            self._stats["failures"] += 1
+            self._failures += 1
+            self._last_error = str(error) if error else None
+            state = self._current_state()
+            if state == HALF_OPEN or (state == CLOSED and self._failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._stats["opened"] += 1
+                logger.warning(f"⚡ Circuit '{self.name}' opened after {self._failures} failures: {self._last_error}")
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        probe = self.check()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        except BaseException:
+            if probe:
+                self.release_probe()
+            raise
+        self.record_success()
+        return result
+
+    async def call_async(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        probe = self.check()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        except BaseException:
+            # Cancelled (client gone, wait_for timeout, shutdown): neither a success nor a failure
+            if probe:
+                self.release_probe()
+            raise
+        self.record_success()
+        return result
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            state = self._current_state()
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "retry_in_seconds": round(self._retry_in(), 1) if state == OPEN else None,
+                "last_error": self._last_error,
+                **self._stats
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """The process-wide breaker for `name`, created on first use"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _registry_lock:
+            breaker = _breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+
+def breaker_states() -> Dict[str, Dict]:
+    return {name: breaker.snapshot() for name, breaker in sorted(_breakers.items())}
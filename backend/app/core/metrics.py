@@ -0,0 +1,224 @@
+"""
+Metrics
+Prometheus metrics for the API: request latency per endpoint, LLM call latency
+and token usage per agent, model cascade tiers, parser document token savings,
+JSON parse failures, PDF extraction time and in-flight gauges. Queue, cache and circuit breaker stats are read from app
+state at scrape time. Metrics are per process; scrape every worker.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Optional
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from app.core.circuit_breaker import breaker_states
+
+logger = logging.getLogger(__name__)
+
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0, 60.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "policy_navigator_http_request_duration_seconds",
+    "HTTP request latency, including time spent queued by admission control",
+    ["method", "endpoint", "status"]
+)
+HTTP_IN_FLIGHT = Gauge(
+    "policy_navigator_http_requests_in_flight",
+    "HTTP requests being served or queued"
+)
+LLM_CALL_DURATION = Histogram(
+    "policy_navigator_llm_call_duration_seconds",
+    "LLM call latency per agent",
+    ["agent", "outcome"],
+    buckets=LLM_BUCKETS
+)
+LLM_IN_FLIGHT = Gauge(
+    "policy_navigator_llm_calls_in_flight",
+    "LLM calls waiting for a response",
+    ["agent"]
+)
+LLM_PROMPT_TOKENS = Counter(
+    "policy_navigator_llm_prompt_tokens",
+    "Prompt tokens sent to the LLM",
+    ["agent", "model"]
+)
+LLM_COMPLETION_TOKENS = Counter(
+    "policy_navigator_llm_completion_tokens",
+    "Completion tokens returned by the LLM",
+    ["agent", "model"]
+)
+JSON_PARSE_FAILURES = Counter(
+    "policy_navigator_llm_json_parse_failures",
+    "LLM responses that were not valid JSON",
+    ["operation"]
+)
+LLM_CASCADE_TIER_DURATION = Histogram(
+    "policy_navigator_llm_cascade_tier_duration_seconds",
+    "Time spent in each model cascade tier, by whether the tier's answer was accepted",
+    ["agent", "tier", "outcome"],
+    buckets=(0.001, 0.01, 0.1,) + LLM_BUCKETS
+)
+PARSER_DOCUMENT_TOKENS = Counter(
+    "policy_navigator_parser_document_tokens",
+    "Scheme document tokens before and after extractive pre-summarization",
+    ["stage"]
+)
+PDF_EXTRACTION_DURATION = Histogram(
+    "policy_navigator_pdf_extraction_duration_seconds",
+    "Time to extract text from an uploaded PDF",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+
+@contextmanager
+def track_llm_call(agent: str):
+    """Time one LLM call and count it as in flight while it runs"""
+    started = time.perf_counter()
+    outcome = "error"
+    LLM_IN_FLIGHT.labels(agent).inc()
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        LLM_IN_FLIGHT.labels(agent).dec()
+        LLM_CALL_DURATION.labels(agent, outcome).observe(time.perf_counter() - started)
+
+
+def record_token_usage(agent: str, model: str, prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+    if prompt_tokens:
+        LLM_PROMPT_TOKENS.labels(agent, model).inc(prompt_tokens)
+    if completion_tokens:
+        LLM_COMPLETION_TOKENS.labels(agent, model).inc(completion_tokens)
+
+
+def record_json_parse_failure(operation: str):
+    JSON_PARSE_FAILURES.labels(operation).inc()
+
+
+def record_document_extraction(original_tokens: int, extracted_tokens: int):
+    PARSER_DOCUMENT_TOKENS.labels("original").inc(original_tokens)
+    PARSER_DOCUMENT_TOKENS.labels("extracted").inc(extracted_tokens)
+
+
+def record_cascade_tier(agent: str, tier: str, outcome: str, seconds: float):
+    LLM_CASCADE_TIER_DURATION.labels(agent, tier, outcome).observe(seconds)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by its route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # Label by route template, never the raw path, to keep cardinality bounded
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.labels(scope["method"], endpoint, str(status["code"])).observe(
+                time.perf_counter() - started
+            )
+
+
+class AppStateCollector:
+    """Exports admission, job queue, semantic cache and circuit breaker stats at scrape time"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def collect(self):
+        state = self.app.state
+        yield from self._admission(getattr(state, "admission", None))
+        yield from self._job_queue(getattr(state, "job_queue", None))
+        yield from self._semantic_cache(getattr(state, "citizen_advocate", None))
+        yield from self._breakers()
+
+    @staticmethod
+    def _admission(admission: Any):
+        if admission is None:
+            return
+        stats = admission.stats()
+        in_flight = GaugeMetricFamily("policy_navigator_admission_in_flight",
+                                      "Admitted requests being served", labels=["request_class"])
+        queued_now = GaugeMetricFamily("policy_navigator_admission_queue_depth",
+                                       "Requests waiting for admission", labels=["request_class"])
+        admitted = CounterMetricFamily("policy_navigator_admission_admitted",
+                                       "Requests admitted", labels=["request_class"])
+        queued = CounterMetricFamily("policy_navigator_admission_queued",
+                                     "Requests that had to wait for admission", labels=["request_class"])
+        shed = CounterMetricFamily("policy_navigator_admission_shed",
+                                   "Requests rejected with 503", labels=["request_class", "reason"])
+        for name, cls in stats["classes"].items():
+            in_flight.add_metric([name], cls["in_flight"])
+            queued_now.add_metric([name], cls["queue_depth"])
+            admitted.add_metric([name], cls["admitted"])
+            queued.add_metric([name], cls["queued"])
+            for reason, count in cls["shed"].items():
+                shed.add_metric([name, reason], count)
+        yield from (in_flight, queued_now, admitted, queued, shed)
+
+    @staticmethod
+    def _job_queue(job_queue: Any):
+        if job_queue is None:
+            return
+        stats = job_queue.stats()
+        yield GaugeMetricFamily("policy_navigator_job_queue_depth", "Background jobs waiting for a worker",
+                                value=stats["queue_depth"])
+        jobs = GaugeMetricFamily("policy_navigator_jobs", "Retained background jobs by status", labels=["status"])
+        for status, count in stats["jobs"].items():
+            jobs.add_metric([status], count)
+        yield jobs
+
+    @staticmethod
+    def _semantic_cache(citizen_advocate: Any):
+        # Reading the cache must not build an advocate that was never used
+        if citizen_advocate is None or not getattr(citizen_advocate, "is_warm", True):
+            return
+        cache = citizen_advocate.answer_cache
+        if cache is None:
+            return
+        stats = cache.stats()
+        yield GaugeMetricFamily("policy_navigator_semantic_cache_entries", "Cached answers", value=stats["entries"])
+        yield CounterMetricFamily("policy_navigator_semantic_cache_hits", "Semantic cache hits", value=stats["hits"])
+        yield CounterMetricFamily("policy_navigator_semantic_cache_misses", "Semantic cache misses",
+                                  value=stats["misses"])
+
+    @staticmethod
+    def _breakers():
+        open_breakers = GaugeMetricFamily("policy_navigator_circuit_open",
+                                          "1 while a circuit breaker is open or half-open", labels=["circuit"])
+        rejected = CounterMetricFamily("policy_navigator_circuit_rejected",
+                                       "Calls rejected by an open circuit", labels=["circuit"])
+        for name, snapshot in breaker_states().items():
+            open_breakers.add_metric([name], 0 if snapshot["state"] == "closed" else 1)
+            rejected.add_metric([name], snapshot["rejected"])
+        yield from (open_breakers, rejected)
+
+
+def install(app):
+    """Time HTTP requests and export app state; call once at import of the app"""
+    app.add_middleware(MetricsMiddleware)
+    REGISTRY.register(AppStateCollector(app))
+
+
+def render_latest() -> bytes:
+    return generate_latest(REGISTRY)
+
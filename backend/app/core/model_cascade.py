@@ -0,0 +1,106 @@
+"""
+Model Cascade
+Answers an agent call with the cheapest tier that is good enough: the local
+rules where an agent has them, then LLM_SMALL_MODEL, then LLM_MODEL. A tier's
+result must pass the agent's schema check and reach the confidence threshold,
+otherwise the call escalates; the last tier only needs a valid result. The
+tier that answered and each tier's latency are attached to the result under
+`cascade` and exported as metrics.
+"""
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.core.metrics import record_cascade_tier
+from app.core.tracing import span
+
+logger = logging.getLogger(__name__)
+
+RULES = "rules"
+SMALL = "small"
+DEFAULT = "default"
+
+
+class Tier:
+    """One step of a cascade; `run` returns a result dict, or None when the tier could not answer"""
+    __slots__ = ("name", "run", "model")
+
+    def __init__(self, name: str, run: Callable[[], Optional[Dict]], model: Optional[str] = None):
+        self.name = name
+        self.run = run
+        self.model = model
+
+
+def cascade_enabled(role: str) -> bool:
+    return role in {r.strip() for r in settings.LLM_CASCADE_AGENTS.split(",") if r.strip()}
+
+
+def model_tiers() -> List[Tuple[str, str]]:
+    """(tier, model) pairs to try, smallest first; a single tier when both models are the same"""
+    if settings.LLM_SMALL_MODEL and settings.LLM_SMALL_MODEL != settings.LLM_MODEL:
+        return [(SMALL, settings.LLM_SMALL_MODEL), (DEFAULT, settings.LLM_MODEL)]
+    return [(DEFAULT, settings.LLM_MODEL)]
+
+
+def run_cascade(agent: str,
+                tiers: List[Tier],
+                assess: Callable[[Dict], Tuple[Optional[str], float]],
+                min_confidence: float) -> Optional[Dict]:
+    """
+    Try `tiers` in order. `assess(result)` returns (schema problem or None,
+    confidence). Returns the first accepted result, else the result of the
+    highest tier that produced a valid one (marked not accepted), else None.
+    """
+    attempts: List[Dict] = []
+    best: Optional[Tuple[Dict, Tier]] = None
+    for i, tier in enumerate(tiers):
+        last = i == len(tiers) - 1
+        started = time.perf_counter()
+        with span(f"cascade.{tier.name}", agent=agent, model=tier.model or tier.name) as tier_span:
+            try:
+                result = tier.run()
+            except Exception as e:
+                # A broken tier is skipped like one that had no answer
+                logger.warning(f"{agent}: {tier.name} tier failed: {e}")
+                result = None
+            problem, confidence = assess(result) if result is not None else ("no answer", 0.0)
+            if problem:
+                outcome = "failed"
+            elif last or confidence >= min_confidence:
+                outcome = "accepted"
+            else:
+                outcome = "escalated"
+            if tier_span is not None:
+                tier_span.set_attribute("cascade.outcome", outcome)
+        elapsed = time.perf_counter() - started
+        record_cascade_tier(agent, tier.name, outcome, elapsed)
+
+        attempt = {"tier": tier.name, "model": tier.model, "outcome": outcome,
+                   "latency_ms": round(elapsed * 1000, 1)}
+        if problem:
+            attempt["reason"] = problem
+        else:
+            attempt["confidence"] = round(confidence, 3)
+            best = (result, tier)
+        attempts.append(attempt)
+
+        if outcome == "accepted":
+            logger.info(f"🪜 {agent}: answered by the {tier.name} tier after {len(attempts)} attempt(s)")
+            return _annotate(result, tier, True, attempts)
+
+    if best is None:
+        logger.warning(f"🪜 {agent}: no cascade tier produced a valid answer")
+        return None
+    return _annotate(best[0], best[1], False, attempts)
+
+
+def _annotate(result: Dict, tier: Tier, accepted: bool, attempts: List[Dict]) -> Dict:
+    result["cascade"] = {
+        "tier": tier.name,
+        "model": tier.model,
+        "accepted": accepted,
+        "latency_ms": round(sum(a["latency_ms"] for a in attempts), 1),
+        "attempts": attempts
+    }
+    return result
@@ -0,0 +1,305 @@
+"""
+Request Profiler
+Opt-in profiling of live requests. A request is profiled when it sends
+`X-Profile: 1` with a valid `X-Admin-Token`, or when it is picked by
+PROFILE_SAMPLE_RATE. While it runs, a thread samples the Python stacks of the
+process (statistical profile) and tracemalloc records allocations; the report
+is saved under PROFILE_DIR for download from /api/admin/profiles.
+
+The middleware is only installed when PROFILING_ENABLED is set, so requests pay
+nothing when profiling is off. Stacks are sampled across every thread running
+app code, so concurrent requests show up in each other's profiles; profile on a
+quiet worker for clean results.
+"""
+import asyncio
+import json
+import linecache
+import logging
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.core.tracing import current_span
+
+logger = logging.getLogger(__name__)
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAX_STACK_DEPTH = 64
+REPORT_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+# Functions whose inclusive time is always listed in the report
+FOCUS_FUNCTIONS = (
+    "_format_schemes",
+    "_format_citizen",
+    "build_find_benefits_prompt",
+    "format_catalog_for_prompt",
+    "extract_text_from_file",
+)
+
+
+class StackSampler:
+    """Samples the stacks of threads running app code at a fixed interval"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = self._stack(frame)
+                if stack:
+                    self.stacks[stack] += 1
+
+    @staticmethod
+    def _stack(frame) -> Optional[tuple]:
+        """Root-first function names, or None when no app code is on the stack"""
+        names = []
+        in_app = False
+        while frame is not None and len(names) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            if code.co_filename.startswith(APP_ROOT):
+                in_app = True
+                location = os.path.relpath(code.co_filename, os.path.dirname(APP_ROOT))
+            else:
+                location = os.path.basename(code.co_filename)
+            names.append(f"{code.co_name} ({location}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return tuple(reversed(names)) if in_app else None
+
+
+_tracemalloc_users = 0
+_tracemalloc_started = False
+_tracemalloc_lock = threading.Lock()
+
+
+def _start_tracemalloc():
+    """Start tracemalloc for the first concurrent profile, unless something else already did"""
+    global _tracemalloc_users, _tracemalloc_started
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            _tracemalloc_started = True
+        _tracemalloc_users += 1
+
+
+def _stop_tracemalloc():
+    global _tracemalloc_users, _tracemalloc_started
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_started:
+            tracemalloc.stop()
+            _tracemalloc_started = False
+
+
+class RequestProfiler:
+    """Statistical profile plus allocation diff for one request"""
+
+    def __init__(self,
+                 interval_ms: float = settings.PROFILE_INTERVAL_MS,
+                 trace_allocations: bool = settings.PROFILE_TRACE_ALLOCATIONS):
+        self.id = uuid.uuid4().hex
+        self.sampler = StackSampler(interval_ms / 1000)
+        self.trace_allocations = trace_allocations
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._started = 0.0
+
+    def start(self):
+        if self.trace_allocations:
+            _start_tracemalloc()
+            self._baseline = tracemalloc.take_snapshot()
+        self._started = time.perf_counter()
+        self.sampler.start()
+
+    def stop(self, **metadata) -> Dict:
+        self.sampler.stop()
+        duration_ms = (time.perf_counter() - self._started) * 1000
+        cpu = self._cpu_report(duration_ms)
+        allocations = None
+        if self.trace_allocations:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            _stop_tracemalloc()
+            allocations = self._allocation_report(snapshot, current, peak)
+        return {
+            "id": self.id,
+            "created_at": time.time(),
+            "duration_ms": round(duration_ms, 1),
+            **metadata,
+            **cpu,
+            "allocations": allocations
+        }
+
+    def _cpu_report(self, duration_ms: float) -> Dict:
+        # The sampler wakes late under load, so weight samples by the measured period
+        samples = self.sampler.samples
+        interval_ms = duration_ms / samples if samples else self.sampler.interval * 1000
+        self_samples: Counter = Counter()
+        total_samples: Counter = Counter()
+        for stack, count in self.sampler.stacks.items():
+            self_samples[stack[-1]] += count
+            for name in set(stack):
+                total_samples[name] += count
+
+        def entry(name: str) -> Dict:
+            return {
+                "function": name,
+                "self_samples": self_samples[name],
+                "total_samples": total_samples[name],
+                "self_ms": round(self_samples[name] * interval_ms, 1),
+                "total_ms": round(total_samples[name] * interval_ms, 1)
+            }
+
+        app_code = [name for name, _ in total_samples.most_common() if " (app/" in name]
+        return {
+            "interval_ms": round(interval_ms, 3),
+            "samples": samples,
+            "top_self": [entry(name) for name, _ in self_samples.most_common(30)],
+            "top_app_cumulative": [entry(name) for name in app_code[:30]],
+            "focus": {name: entry(name) for name in app_code if name.split(" (", 1)[0] in FOCUS_FUNCTIONS},
+            "folded": {";".join(stack): count for stack, count in self.sampler.stacks.most_common()}
+        }
+
+    def _allocation_report(self, snapshot: tracemalloc.Snapshot, current: int, peak: int) -> Dict:
+        # Leave out the profiler's own bookkeeping
+        filters = [tracemalloc.Filter(False, path) for path in
+                   (tracemalloc.__file__, __file__, linecache.__file__, "<frozen importlib._bootstrap>")]
+        diff = snapshot.filter_traces(filters).compare_to(self._baseline.filter_traces(filters), "lineno")
+        return {
+            "traced_current_kb": round(current / 1024, 1),
+            "traced_peak_kb": round(peak / 1024, 1),
+            "top": [
+                {
+                    "location": str(stat.traceback[0]),
+                    "size_diff_kb": round(stat.size_diff / 1024, 1),
+                    "count_diff": stat.count_diff
+                }
+                for stat in diff[:25] if stat.size_diff
+            ]
+        }
+
+
+class ProfileStore:
+    """Profile reports as JSON files, keeping the newest PROFILE_MAX_REPORTS"""
+
+    def __init__(self, directory: str = settings.PROFILE_DIR, max_reports: int = settings.PROFILE_MAX_REPORTS):
+        self.directory = directory
+        self.max_reports = max_reports
+
+    def path(self, report_id: str) -> Optional[str]:
+        if not REPORT_ID_RE.match(report_id):
+            return None
+        path = os.path.join(self.directory, f"{report_id}.json")
+        return path if os.path.exists(path) else None
+
+    def save(self, report: Dict):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, f"{report['id']}.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f)
+        reports = self._files()
+        for name in reports[:-self.max_reports]:
+            os.remove(os.path.join(self.directory, name))
+
+    def load(self, report_id: str) -> Optional[Dict]:
+        path = self.path(report_id)
+        if path is None:
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def list(self) -> List[Dict]:
+        summaries = []
+        for name in reversed(self._files()):
+            report = self.load(name[:-5])
+            if report:
+                summaries.append({key: report.get(key) for key in
+                                  ("id", "created_at", "method", "path", "status", "duration_ms", "trigger", "samples")})
+        return summaries
+
+    def _files(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        names = [n for n in os.listdir(self.directory) if n.endswith(".json")]
+        return sorted(names, key=lambda n: os.path.getmtime(os.path.join(self.directory, n)))
+
+
+def folded_stacks(report: Dict) -> str:
+    """Collapsed stacks, one `frame;frame;frame count` per line, for flame graph tools"""
+    return "\n".join(f"{stack} {count}" for stack, count in report.get("folded", {}).items()) + "\n"
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests that opt in or are sampled"""
+
+    def __init__(self, app, store: Optional[ProfileStore] = None):
+        self.app = app
+        self.store = store or ProfileStore()
+
+    @staticmethod
+    def _trigger(scope) -> Optional[str]:
+        headers = dict(scope.get("headers") or [])
+        if headers.get(b"x-profile") in (b"1", b"true") and settings.ADMIN_TOKEN:
+            token = headers.get(b"x-admin-token", b"").decode("latin-1")
+            if token and secrets.compare_digest(token, settings.ADMIN_TOKEN):
+                return "header"
+        if settings.PROFILE_SAMPLE_RATE and random.random() < settings.PROFILE_SAMPLE_RATE:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profiler = RequestProfiler()
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) + [
+                    (b"x-profile-id", profiler.id.encode())
+                ]}
+            await send(message)
+
+        active = current_span()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            report = profiler.stop(
+                method=scope["method"],
+                path=scope["path"],
+                status=status["code"],
+                trigger=trigger,
+                trace_id=active.trace.trace_id if active is not None else None
+            )
+            try:
+                await asyncio.to_thread(self.store.save, report)
+                logger.info(f"🔬 Profiled {scope['method']} {scope['path']} ({trigger}): report {report['id']}")
+            except OSError as e:
+                logger.error(f"Could not save profile report: {e}")
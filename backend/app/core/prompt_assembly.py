@@ -0,0 +1,195 @@
+"""
+Prompt Assembly
+Builds LLM prompts within a per-agent input token budget. The static part of a
+prompt (system instructions, catalog blocks) is compiled once, token counted,
+and always sent first and byte-identical, so the provider's prompt prefix cache
+can reuse it across calls. Per-request sections follow, in priority order:
+when they do not fit, lower priority sections are truncated or dropped.
+
+Tokens are counted with tiktoken. Its encodings are downloaded on first use;
+where that is not possible (set TIKTOKEN_CACHE_DIR to a pre-fetched copy), an
+estimate of four characters per token is used instead.
+"""
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Union
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = "\n[...truncated...]\n"
+
+HEAD = "head"    # keep the beginning (documents, ranked lists)
+TAIL = "tail"    # keep the end (conversation history)
+
+
+class Tokenizer:
+    """Token counting and truncation for one model"""
+
+    def __init__(self, model: str):
+        self.model = model
+        self.encoding = None
+        try:
+            import tiktoken
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self.encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable for {model}, estimating tokens from characters: {e}")
+
+    def count(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return -(-len(text) // CHARS_PER_TOKEN)
+
+    def truncate(self, text: str, max_tokens: int, keep: str = HEAD) -> str:
+        """`text` cut to at most `max_tokens`, keeping its beginning or end"""
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is None:
+            limit = max_tokens * CHARS_PER_TOKEN
+            return text[:limit] if keep == HEAD else text[-limit:]
+        tokens = self.encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        kept = tokens[:max_tokens] if keep == HEAD else tokens[-max_tokens:]
+        return self.encoding.decode(kept)
+
+
+_tokenizers: Dict[str, Tokenizer] = {}
+_tokenizers_lock = threading.Lock()
+
+
+def get_tokenizer(model: Optional[str] = None) -> Tokenizer:
+    model = model or settings.LLM_MODEL
+    tokenizer = _tokenizers.get(model)
+    if tokenizer is None:
+        with _tokenizers_lock:
+            tokenizer = _tokenizers.get(model)
+            if tokenizer is None:
+                tokenizer = _tokenizers[model] = Tokenizer(model)
+    return tokenizer
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    return get_tokenizer(model).count(text)
+
+
+def prompt_budget(role: str) -> int:
+    """Input token budget for an agent role, from PROMPT_TOKEN_BUDGETS or PROMPT_TOKEN_BUDGET"""
+    for entry in settings.PROMPT_TOKEN_BUDGETS.split(","):
+        name, _, value = entry.partition("=")
+        if name.strip() == role and value.strip():
+            return int(value)
+    return settings.PROMPT_TOKEN_BUDGET
+
+
+class Section:
+    """
+    A per-request part of the prompt. `content` is text, or a list of items
+    (schemes, turns) that are dropped whole when truncating. Lower `priority`
+    is fitted first; a `required` section is truncated rather than dropped.
+    """
+    __slots__ = ("name", "content", "priority", "keep", "required", "header", "separator")
+
+    def __init__(self, name: str, content: Union[str, Sequence[str]], priority: int = 0, keep: str = HEAD,
+                 required: bool = False, header: str = "", separator: str = "\n"):
+        self.name = name
+        self.content = content
+        self.priority = priority
+        self.keep = keep
+        self.required = required
+        self.header = header
+        self.separator = separator
+
+
+class AssembledPrompt:
+    __slots__ = ("system", "user", "tokens", "budget", "truncated", "dropped")
+
+    def __init__(self, system: str, user: str, tokens: int, budget: int, truncated: List[str], dropped: List[str]):
+        self.system = system
+        self.user = user
+        self.tokens = tokens
+        self.budget = budget
+        self.truncated = truncated
+        self.dropped = dropped
+
+    def messages(self) -> List[Dict]:
+        """OpenAI chat messages, static system prefix first"""
+        return [{"role": "system", "content": self.system}, {"role": "user", "content": self.user}]
+
+
+class PromptAssembler:
+    """Static prefix compiled once; `assemble` fits per-request sections into the rest of the budget"""
+
+    def __init__(self, name: str, system: str, budget: int, static_blocks: Sequence[str] = (),
+                 model: Optional[str] = None):
+        self.name = name
+        self.budget = budget
+        self.tokenizer = get_tokenizer(model)
+        self.system = "\n\n".join([system, *static_blocks]) if static_blocks else system
+        self.system_tokens = self.tokenizer.count(self.system)
+        if self.system_tokens >= budget:
+            logger.warning(f"📏 {name}: static prompt is {self.system_tokens} tokens, over its budget of {budget}")
+
+    def assemble(self, sections: List[Section]) -> AssembledPrompt:
+        available = self.budget - self.system_tokens
+        rendered: Dict[str, str] = {}
+        truncated: List[str] = []
+        dropped: List[str] = []
+        for section in sorted(sections, key=lambda s: s.priority):
+            text = self._render(section.header, section.content, section.separator)
+            tokens = self.tokenizer.count(text) + 1    # the blank line joining sections
+            if tokens <= available:
+                rendered[section.name] = text
+                available -= tokens
+                continue
+            fitted = self._fit(section, available - 1) if (available > 1 or section.required) else ""
+            if fitted:
+                rendered[section.name] = fitted
+                available -= self.tokenizer.count(fitted) + 1
+                truncated.append(section.name)
+            else:
+                dropped.append(section.name)
+
+        user = "\n\n".join(rendered[s.name] for s in sections if s.name in rendered)
+        tokens = self.system_tokens + self.tokenizer.count(user)
+        if truncated or dropped:
+            logger.info(f"📏 {self.name}: prompt fitted to {tokens}/{self.budget} tokens "
+                        f"(truncated {truncated or '-'}, dropped {dropped or '-'})")
+        return AssembledPrompt(self.system, user, tokens, self.budget, truncated, dropped)
+
+    @staticmethod
+    def _render(header: str, content: Union[str, Sequence[str]], separator: str) -> str:
+        body = content if isinstance(content, str) else separator.join(content)
+        return f"{header}\n{body}" if header else body
+
+    def _fit(self, section: Section, available: int) -> str:
+        """The largest part of `section` within `available` tokens"""
+        overhead = self.tokenizer.count(section.header) + 1 if section.header else 0
+        room = max(available - overhead, 0)
+        if isinstance(section.content, str):
+            if room <= self.tokenizer.count(TRUNCATION_MARKER):
+                body = self.tokenizer.truncate(section.content, room, section.keep) if section.required else ""
+            else:
+                body = self.tokenizer.truncate(section.content, room - self.tokenizer.count(TRUNCATION_MARKER),
+                                               section.keep)
+                body = body + TRUNCATION_MARKER if section.keep == HEAD else TRUNCATION_MARKER + body
+        else:
+            items = list(section.content) if section.keep == HEAD else list(reversed(section.content))
+            kept, used = [], 0
+            for item in items:
+                cost = self.tokenizer.count(item + section.separator)
+                if used + cost > room:
+                    break
+                kept.append(item)
+                used += cost
+            if not kept and section.required and items:
+                kept = [self.tokenizer.truncate(items[0], room, section.keep)]
+            body = section.separator.join(kept if section.keep == HEAD else reversed(kept))
+        if not body.strip():
+            return ""
+        return f"{section.header}\n{body}" if section.header else body
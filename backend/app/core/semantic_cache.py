@@ -0,0 +1,225 @@
+"""
+Semantic FAQ Answer Cache
+Serves cached Citizen Advocate answers for paraphrases of questions that have
+already been answered, using a local CPU embedding model for similarity.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class HashingEmbedder:
+    """
+    Dependency-free embedder: hashed word and character n-grams.
+    Robust to spelling variants such as "PM-KISAN" / "pm kisan".
+    """
+
+    def __init__(self, dimensions: int = 512):
+        self.dimensions = dimensions
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = text.split()
+            features = list(words)
+            squashed = f" {''.join(words)} "
+            features.extend(squashed[i:i + 3] for i in range(len(squashed) - 2))
+            for feature in features:
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                index = int.from_bytes(digest[:4], "little") % self.dimensions
+                sign = 1.0 if digest[4] & 1 else -1.0
+                vectors[row, index] += sign
+        return vectors
+
+
+class OnnxMiniLMEmbedder:
+    """all-MiniLM-L6-v2 on onnxruntime, as bundled with chromadb (CPU only)"""
+
+    def __init__(self):
+        from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+        self._embedding_function = DefaultEmbeddingFunction()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self._embedding_function(texts), dtype=np.float32)
+
+
+def create_embedder(name: Optional[str] = None):
+    """Create the configured embedder, falling back to hashing if unavailable"""
+    name = (name or settings.SEMANTIC_CACHE_EMBEDDER).lower()
+    if name == "onnx_minilm":
+        try:
+            embedder = OnnxMiniLMEmbedder()
+            # chromadb downloads the model on the first call; fail over here, not in a request
+            embedder.embed(["warm up"])
+            return embedder
+        except Exception as e:
+            logger.warning(f"⚠️  ONNX MiniLM embedder unavailable ({e}), using hashing embedder")
+    return HashingEmbedder()
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase and strip punctuation so trivial variants embed identically"""
+    question = re.sub(r"[^\w\s]", " ", question.lower())
+    return " ".join(question.split())
+
+
+class SemanticAnswerCache:
+    """Nearest-neighbour answer cache over normalized question embeddings"""
+
+    def __init__(self,
+                 embedder=None,
+                 threshold: float = settings.SEMANTIC_CACHE_THRESHOLD,
+                 max_entries: int = settings.SEMANTIC_CACHE_MAX_ENTRIES,
+                 ttl_seconds: int = settings.SEMANTIC_CACHE_TTL_SECONDS):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._embedder = embedder
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self._ids: List[str] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._hits = 0
+        self._misses = 0
+        self._errors = 0
+        self._lookup_seconds = 0.0
+
+    @property
+    def embedder(self):
+        # Loaded on first use so startup does not pay for the model
+        if self._embedder is None:
+            self._embedder = create_embedder()
+        return self._embedder
+
+    def _embed(self, question: str) -> np.ndarray:
+        vector = self.embedder.embed([normalize_question(question)])[0]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, question: str) -> Optional[Dict]:
+        """Return the closest cached entry above the threshold, or None; a failing embedder counts as a miss"""
+        started = time.perf_counter()
+        try:
+            vector = self._embed(question)
+        except Exception as e:
+            logger.warning(f"⚠️  Semantic cache lookup failed, treating it as a miss: {e}")
+            with self._lock:
+                self._misses += 1
+                self._errors += 1
+            return None
+        now = time.time()
+
+        with self._lock:
+            match = None
+            if self._matrix is not None and len(self._ids):
+                scores = self._matrix @ vector
+                best = int(np.argmax(scores))
+                entry = self._entries[self._ids[best]]
+                if scores[best] >= self.threshold and entry["expires_at"] > now:
+                    entry["hits"] += 1
+                    entry["last_hit_at"] = now
+                    match = dict(entry, similarity=float(scores[best]))
+
+            if match:
+                self._hits += 1
+            else:
+                self._misses += 1
+            self._lookup_seconds += time.perf_counter() - started
+        return match
+
+    def store(self, question: str, answer: str) -> Optional[str]:
+        """Cache an answer and return its entry id, or None if it could not be embedded"""
+        try:
+            vector = self._embed(question)
+        except Exception as e:
+            logger.warning(f"⚠️  Semantic cache store failed, answer not cached: {e}")
+            with self._lock:
+                self._errors += 1
+            return None
+        now = time.time()
+        entry_id = uuid.uuid4().hex[:12]
+
+        with self._lock:
+            self._evict_expired(now)
+            if len(self._ids) >= self.max_entries:
+                coldest = min(self._ids, key=lambda i: self._entries[i]["last_hit_at"])
+                self._remove(coldest)
+
+            self._entries[entry_id] = {
+                "id": entry_id,
+                "question": question,
+                "answer": answer,
+                "created_at": now,
+                "expires_at": now + self.ttl_seconds,
+                "last_hit_at": now,
+                "hits": 0
+            }
+            self._ids.append(entry_id)
+            row = vector[np.newaxis, :]
+            self._matrix = row if self._matrix is None else np.vstack([self._matrix, row])
+        return entry_id
+
+    def invalidate(self, entry_id: str) -> bool:
+        with self._lock:
+            if entry_id not in self._entries:
+                return False
+            self._remove(entry_id)
+            return True
+
+    def invalidate_matching(self, text: str) -> int:
+        """Invalidate every entry whose question or answer mentions text"""
+        needle = text.lower()
+        with self._lock:
+            doomed = [
+                entry_id for entry_id, entry in self._entries.items()
+                if needle in entry["question"].lower() or needle in entry["answer"].lower()
+            ]
+            for entry_id in doomed:
+                self._remove(entry_id)
+        return len(doomed)
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._ids)
+            self._entries.clear()
+            self._ids = []
+            self._matrix = None
+        return count
+
+    def _remove(self, entry_id: str):
+        index = self._ids.index(entry_id)
+        del self._ids[index]
+        del self._entries[entry_id]
+        self._matrix = np.delete(self._matrix, index, axis=0) if self._ids else None
+
+    def _evict_expired(self, now: float):
+        for entry_id in [i for i, e in self._entries.items() if e["expires_at"] <= now]:
+            self._remove(entry_id)
+
+    def entries(self) -> List[Dict]:
+        with self._lock:
+            return [dict(entry) for entry in self._entries.values()]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._ids),
+                "hits": self._hits,
+                "misses": self._misses,
+                "errors": self._errors,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "avg_lookup_ms": round(self._lookup_seconds / lookups * 1000, 3) if lookups else 0.0,
+                "threshold": self.threshold,
+                "embedder": type(self._embedder).__name__ if self._embedder else "not_loaded"
+            }
@@ -0,0 +1,356 @@
+"""
+Chat Session Store
+Keeps Citizen Advocate conversation history outside of process memory so that
+several uvicorn workers (or nodes sharing a volume) can serve the same session.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Ids that are not accepted from callers; "default" was once shared by every sessionless chat
+RESERVED_SESSION_IDS = frozenset({"default"})
+
+
+def validate_session_id(session_id: str) -> str:
+    """Return `session_id` if a caller may use it, raise ValueError otherwise"""
+    if not session_id or not session_id.strip():
+        raise ValueError("session_id must not be empty")
+    if session_id.strip().lower() in RESERVED_SESSION_IDS:
+        raise ValueError(f"session_id '{session_id}' is reserved")
+    return session_id
+
+
+class SessionStore:
+    """Interface for conversation history backends"""
+
+    def get_history(self, session_id: str, limit: Optional[int] = None) -> List[Dict]:
+        """Return the most recent turns of a session (oldest first)"""
+        raise NotImplementedError
+
+    def append_turn(self, session_id: str, user_message: str, agent_response: str) -> None:
+        """Record one user/agent exchange"""
+        raise NotImplementedError
+
+    def clear(self, session_id: str) -> None:
+        """Drop a session and all of its turns"""
+        raise NotImplementedError
+
+    def compact(self) -> int:
+        """Remove expired sessions, returns the number of sessions removed"""
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Persist any buffered writes"""
+
+    def close(self) -> None:
+        """Flush and release resources"""
+        self.flush()
+
+    def stats(self) -> Dict:
+        return {"backend": self.__class__.__name__}
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store, suitable for a single worker and for development"""
+
+    def __init__(self,
+                 ttl_seconds: int = settings.SESSION_TTL_SECONDS,
+                 max_turns: int = settings.SESSION_MAX_TURNS,
+                 compact_interval: int = settings.SESSION_COMPACT_INTERVAL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self.compact_interval = compact_interval
+        self._sessions: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._last_compaction = time.time()
+
+    def get_history(self, session_id: str, limit: Optional[int] = None) -> List[Dict]:
+        self._maybe_compact()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if not session or session["expires_at"] < time.time():
+                return []
+            turns = list(session["turns"])
+        return turns[-limit:] if limit else turns
+
+    def append_turn(self, session_id: str, user_message: str, agent_response: str) -> None:
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if not session or session["expires_at"] < now:
+                session = {"turns": [], "expires_at": 0.0}
+                self._sessions[session_id] = session
+            session["turns"].append({"user": user_message, "agent": agent_response, "timestamp": now})
+            del session["turns"][:-self.max_turns]
+            session["expires_at"] = now + self.ttl_seconds
+
+    def clear(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def compact(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [sid for sid, s in self._sessions.items() if s["expires_at"] < now]
+            for sid in expired:
+                del self._sessions[sid]
+            self._last_compaction = now
+        return len(expired)
+
+    def _maybe_compact(self):
+        if time.time() - self._last_compaction > self.compact_interval:
+            self.compact()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"backend": "memory", "sessions": len(self._sessions)}
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite (WAL) store shared by every worker on a host.
+
+    - Writes are buffered and flushed in batches by a background thread
+    - Reads go through an LRU cache validated against the session version,
+      so a cache hit costs one primary-key lookup instead of loading all turns
+    - Expired sessions are compacted periodically
+    """
+
+    def __init__(self,
+                 db_path: str = settings.SESSION_DB_PATH,
+                 ttl_seconds: int = settings.SESSION_TTL_SECONDS,
+                 max_turns: int = settings.SESSION_MAX_TURNS,
+                 batch_size: int = settings.SESSION_WRITE_BATCH_SIZE,
+                 flush_interval: float = settings.SESSION_WRITE_FLUSH_INTERVAL,
+                 cache_size: int = settings.SESSION_CACHE_SIZE,
+                 compact_interval: int = settings.SESSION_COMPACT_INTERVAL_SECONDS):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.cache_size = cache_size
+        self.compact_interval = compact_interval
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS turns (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                payload TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_turns_session ON turns (session_id, id);
+            CREATE INDEX IF NOT EXISTS idx_sessions_expiry ON sessions (expires_at);
+        """)
+
+        # The db lock also covers draining the write buffer, so a reader holding
+        # it always sees every turn either in the database or in the buffer
+        self._db_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._pending: List[tuple] = []
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._last_compaction = time.time()
+        self._flusher = threading.Thread(target=self._flush_loop, name="session-store-flusher", daemon=True)
+        self._flusher.start()
+
+        logger.info(f"✓ SQLite session store ready at {db_path}")
+
+    def get_history(self, session_id: str, limit: Optional[int] = None) -> List[Dict]:
+        now = time.time()
+        turns: List[Dict] = []
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT version, updated_at, expires_at FROM sessions WHERE session_id = ?",
+                (session_id,)
+            ).fetchone()
+
+            if row and row[2] >= now:
+                version = (row[0], row[1])
+                cached = self._cache.get(session_id)
+                if cached and cached[0] == version:
+                    self._cache.move_to_end(session_id)
+                    self._cache_hits += 1
+                    turns = cached[1]
+                else:
+                    self._cache_misses += 1
+                    rows = self._conn.execute(
+                        "SELECT payload FROM turns WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                        (session_id, self.max_turns)
+                    ).fetchall()
+                    turns = [json.loads(r[0]) for r in reversed(rows)]
+                    self._cache_put(session_id, version, turns)
+
+            # Include this worker's own writes that have not been flushed yet
+            with self._pending_lock:
+                pending = [turn for sid, turn in self._pending if sid == session_id]
+
+        if pending:
+            turns = (turns + pending)[-self.max_turns:]
+        return turns[-limit:] if limit else list(turns)
+
+    def _cache_put(self, session_id: str, version: tuple, turns: List[Dict]):
+        self._cache[session_id] = (version, turns)
+        self._cache.move_to_end(session_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def append_turn(self, session_id: str, user_message: str, agent_response: str) -> None:
+        turn = {"user": user_message, "agent": agent_response, "timestamp": time.time()}
+        with self._pending_lock:
+            self._pending.append((session_id, turn))
+            should_flush = len(self._pending) >= self.batch_size
+        if should_flush:
+            self._wakeup.set()
+
+    def flush(self) -> None:
+        with self._db_lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                logger.error(f"Session store flush failed, re-queueing {len(batch)} turns: {e}")
+                with self._pending_lock:
+                    self._pending = batch + self._pending
+
+    def _write_batch(self, batch: List[tuple]):
+        """Write buffered turns in one transaction (caller holds the db lock)"""
+        now = time.time()
+        counts: Dict[str, int] = {}
+        for session_id, _ in batch:
+            counts[session_id] = counts.get(session_id, 0) + 1
+
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany(
+                "INSERT INTO turns (session_id, payload) VALUES (?, ?)",
+                [(sid, json.dumps(turn, ensure_ascii=False)) for sid, turn in batch]
+            )
+            for session_id, count in counts.items():
+                self._conn.execute(
+                    """
+                    INSERT INTO sessions (session_id, version, updated_at, expires_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(session_id) DO UPDATE SET
+                        version = version + excluded.version,
+                        updated_at = excluded.updated_at,
+                        expires_at = excluded.expires_at
+                    """,
+                    (session_id, count, now, now + self.ttl_seconds)
+                )
+                self._conn.execute(
+                    """
+                    DELETE FROM turns WHERE session_id = ? AND id NOT IN (
+                        SELECT id FROM turns WHERE session_id = ? ORDER BY id DESC LIMIT ?
+                    )
+                    """,
+                    (session_id, session_id, self.max_turns)
+                )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def clear(self, session_id: str) -> None:
+        with self._db_lock:
+            with self._pending_lock:
+                self._pending = [(sid, turn) for sid, turn in self._pending if sid != session_id]
+            self._conn.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._cache.pop(session_id, None)
+
+    def compact(self) -> int:
+        now = time.time()
+        with self._db_lock:
+            expired = [r[0] for r in self._conn.execute(
+                "SELECT session_id FROM sessions WHERE expires_at < ?", (now,)
+            ).fetchall()]
+            if expired:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._conn.executemany("DELETE FROM turns WHERE session_id = ?", [(sid,) for sid in expired])
+                    self._conn.executemany("DELETE FROM sessions WHERE session_id = ?", [(sid,) for sid in expired])
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                for sid in expired:
+                    self._cache.pop(sid, None)
+            self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        self._last_compaction = now
+        if expired:
+            logger.info(f"Compacted {len(expired)} expired chat sessions")
+        return len(expired)
+
+    def _flush_loop(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            if time.time() - self._last_compaction > self.compact_interval:
+                try:
+                    self.compact()
+                except Exception as e:
+                    logger.error(f"Session compaction failed: {e}")
+
+    def close(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+    def stats(self) -> Dict:
+        with self._pending_lock:
+            pending = len(self._pending)
+        with self._db_lock:
+            sessions = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "db_path": self.db_path,
+            "sessions": sessions,
+            "pending_writes": pending,
+            "cache_entries": len(self._cache),
+            "cache_hits": self._cache_hits,
+            "cache_misses": self._cache_misses
+        }
+
+
+def create_session_store(backend: Optional[str] = None) -> SessionStore:
+    """Create the session store configured by SESSION_STORE_BACKEND"""
+    backend = (backend or settings.SESSION_STORE_BACKEND).lower()
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    if backend != "memory":
+        logger.warning(f"Unknown session store backend '{backend}', using in-memory store")
+    return InMemorySessionStore()
@@ -0,0 +1,41 @@
+"""
+Startup Timer
+Records how long each startup phase takes and logs the breakdown.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Collects named phase durations in the order they were recorded"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: List[Dict] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - started) * 1000)
+
+    def record(self, name: str, duration_ms: float):
+        self.phases.append({"phase": name, "duration_ms": round(duration_ms, 1)})
+
+    @property
+    def total_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+    def summary(self) -> Dict:
+        return {"total_ms": self.total_ms, "phases": self.phases}
+
+    def log(self):
+        logger.info(f"⏱  Startup took {self.total_ms} ms")
+        for phase in self.phases:
+            logger.info(f"   {phase['phase']:<34} {phase['duration_ms']:>9.1f} ms")
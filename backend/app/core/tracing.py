@@ -0,0 +1,252 @@
+"""
+Tracing
+Lightweight span tracing. Each HTTP request (or background job, or task on a
+worker) is a trace; `span()` records a timed stage inside the current trace.
+The trace id travels in inter-agent envelopes as a W3C `traceparent`, so a
+worker's spans join the request that dispatched the task. HTTP responses carry
+a `Server-Timing` header with the per-stage breakdown; when TRACE_EXPORT_PATH is
+set, finished traces are also appended to it as OTLP/JSON lines, rotating the
+file at TRACE_EXPORT_MAX_BYTES. Health checks and metric scrapes are not traced.
+"""
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+# Polled by load balancers and Prometheus; tracing them only adds noise
+UNTRACED_PATHS = {"/health", "/metrics"}
+
+
+class Trace:
+    """All spans recorded for one request, job or task"""
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.spans: List["Span"] = []
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attributes", "start_ns", "end_ns", "error")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str], attributes: Dict):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+        trace.spans.append(self)
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace.trace_id}-{self.span_id}-01"
+
+
+@contextmanager
+def _activate(span: Span):
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        span.end_ns = time.time_ns()
+        _current_span.reset(token)
+
+
+@contextmanager
+def start_trace(name: str, traceparent: Optional[str] = None, **attributes):
+    """
+    Start a new trace, continuing the remote parent in `traceparent` if one is
+    given, and export it when the block exits. Yields the root span, or None
+    when tracing is disabled.
+    """
+    if not settings.TRACING_ENABLED:
+        yield None
+        return
+    match = TRACEPARENT_RE.match(traceparent or "")
+    trace = Trace(match.group(1) if match else None)
+    root = Span(trace, name, match.group(2) if match else None, attributes)
+    try:
+        with _activate(root):
+            yield root
+    finally:
+        export(trace)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a stage of the current trace; a no-op outside of a trace"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    with _activate(Span(parent.trace, name, parent.span_id, attributes)) as child:
+        yield child
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_traceparent() -> Optional[str]:
+    active = _current_span.get()
+    return active.traceparent if active is not None else None
+
+
+def server_timing(trace: Trace) -> str:
+    """Server-Timing header value: total time plus finished stages summed by name"""
+    stages: Dict[str, List[float]] = {}
+    for s in trace.spans[1:]:
+        if s.end_ns is not None:
+            stages.setdefault(re.sub(r"[^A-Za-z0-9_.-]", "_", s.name), []).append(s.duration_ms)
+    entries = [f"total;dur={trace.spans[0].duration_ms:.1f}"]
+    for name, durations in stages.items():
+        entry = f"{name};dur={sum(durations):.1f}"
+        if len(durations) > 1:
+            entry += f';desc="x{len(durations)}"'
+        entries.append(entry)
+    return ", ".join(entries)
+
+
+def _otlp_value(value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(trace: Trace) -> Dict:
+    """One trace as an OTLP/JSON ExportTraceServiceRequest"""
+    spans = []
+    for s in trace.spans:
+        otlp_span = {
+            "traceId": trace.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 2 if s is trace.spans[0] else 1,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns or time.time_ns()),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1}
+        }
+        if s.parent_id:
+            otlp_span["parentSpanId"] = s.parent_id
+        spans.append(otlp_span)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": settings.APP_NAME}}]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}]
+        }]
+    }
+
+
+class FileExporter:
+    """Appends traces to a JSON-lines file from a background thread, keeping one rotated file"""
+
+    def __init__(self, path: str, max_bytes: int = settings.TRACE_EXPORT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=10000)
+        self._dropped = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        threading.Thread(target=self._run, name="trace-exporter", daemon=True).start()
+
+    def export(self, trace: Trace):
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self._dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while not self._queue.empty() and len(batch) < 100:
+                batch.append(self._queue.get_nowait())
+            try:
+                if self.max_bytes > 0 and os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                    os.replace(self.path, self.path + ".1")
+                with open(self.path, "a", encoding="utf-8") as f:
+                    for trace in batch:
+                        f.write(json.dumps(to_otlp(trace)) + "\n")
+            except OSError as e:
+                logger.error(f"Trace export to {self.path} failed: {e}")
+
+
+_exporter: Optional[FileExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def export(trace: Trace):
+    global _exporter
+    if not settings.TRACE_EXPORT_PATH:
+        return
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = FileExporter(settings.TRACE_EXPORT_PATH)
+    _exporter.export(trace)
+
+
+class TracingMiddleware:
+    """ASGI middleware: one trace per HTTP request, reported in Server-Timing"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in UNTRACED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        traceparent = headers.get(b"traceparent", b"").decode("latin-1")
+        with start_trace(f"{scope['method']} {scope['path']}", traceparent,
+                         **{"http.method": scope["method"], "http.target": scope["path"]}) as root:
+
+            async def send_with_timing(message):
+                if message["type"] == "http.response.start":
+                    root.set_attribute("http.status_code", message["status"])
+                    message = {**message, "headers": list(message.get("headers", [])) + [
+                        (b"server-timing", server_timing(root.trace).encode()),
+                        (b"traceparent", root.traceparent.encode()),
+                    ]}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                route = scope.get("route")
+                if getattr(route, "path", None):
+                    root.name = f"{scope['method']} {route.path}"
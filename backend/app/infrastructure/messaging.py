@@ -0,0 +1,333 @@
+"""
+Agent Messaging
+Asyncio request/response layer for inter-agent messages. Outgoing messages carry
+a correlation id; a dispatcher resolves the matching pending future as soon as
+the reply arrives, so callers await one network round trip instead of polling.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from app.config import settings
+from app.core.tracing import current_traceparent
+from app.infrastructure.wire_codec import FrameAssembler, FrameEncoder, IntegrityError
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimeoutError(TimeoutError):
+    """No reply arrived for a request within its timeout"""
+
+
+class NoConsumerError(RequestTimeoutError):
+    """No consumer acknowledged a request after every delivery attempt"""
+
+
+class InProcessBroker:
+    """
+    Minimal topic broker for agents running in the same process.
+    Used in simulation mode, where there is no MQTT connection, and as a
+    stand-in for the MQTT broker when testing task workers.
+
+    Subscribers that join with a `group` compete for messages: each message
+    goes to one member of the group (round robin), like an MQTT shared
+    subscription.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Callable[[str], None]]] = {}
+        self._groups: Dict[str, Dict[str, List[Callable[[str], None]]]] = {}
+        self._next_member: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic: str, callback: Callable[[str], None], group: Optional[str] = None):
+        with self._lock:
+            if group:
+                self._groups.setdefault(topic, {}).setdefault(group, []).append(callback)
+            else:
+                self._subscribers.setdefault(topic, []).append(callback)
+
+    def unsubscribe(self, topic: str, callback: Callable[[str], None]):
+        with self._lock:
+            if callback in self._subscribers.get(topic, []):
+                self._subscribers[topic].remove(callback)
+            for members in self._groups.get(topic, {}).values():
+                if callback in members:
+                    members.remove(callback)
+
+    def publish(self, topic: str, payload: str) -> int:
+        """Deliver payload to every subscriber of topic, returns the number of deliveries"""
+        with self._lock:
+            callbacks = list(self._subscribers.get(topic, []))
+            for group, members in self._groups.get(topic, {}).items():
+                if members:
+                    index = self._next_member.get((topic, group), 0) % len(members)
+                    self._next_member[(topic, group)] = index + 1
+                    callbacks.append(members[index])
+        for callback in callbacks:
+            try:
+                callback(payload)
+            except Exception as e:
+                logger.error(f"Subscriber on {topic} failed: {e}")
+        return len(callbacks)
+
+
+_local_broker = InProcessBroker()
+
+
+def get_local_broker() -> InProcessBroker:
+    return _local_broker
+
+
+def build_envelope(sender: str,
+                   payload: Dict,
+                   message_type: str = "query",
+                   correlation_id: Optional[str] = None,
+                   reply_to: Optional[str] = None) -> Dict:
+    """Wrap a payload with the routing fields every inter-agent message carries"""
+    envelope = {
+        "message_id": uuid.uuid4().hex,
+        "correlation_id": correlation_id or uuid.uuid4().hex,
+        "reply_to": reply_to,
+        "sender": sender,
+        "message_type": message_type,
+        "payload": payload,
+        "sent_at": time.time()
+    }
+    # Lets the receiving agent attach its spans to the sender's trace
+    traceparent = current_traceparent()
+    if traceparent:
+        envelope["traceparent"] = traceparent
+    return envelope
+
+
+class AgentMessenger:
+    """
+    Correlates requests with replies for one agent.
+
+    `publish(target, raw, message_type)` sends a serialized envelope; incoming
+    raw messages are handed to `on_raw_message`, which may be called from any
+    thread (e.g. an MQTT network thread). Large messages are compressed and
+    split into frames of at most `max_frame_bytes`; 0 keeps them whole, for
+    publishing to topics that competing consumers share.
+    """
+
+    def __init__(self,
+                 agent_id: str,
+                 publish: Callable[[Optional[str], str, str], None],
+                 inbound_queue_size: int = settings.MESSAGING_INBOUND_QUEUE_SIZE,
+                 default_timeout: float = settings.MESSAGING_REQUEST_TIMEOUT,
+                 max_frame_bytes: int = settings.MESSAGING_MAX_FRAME_BYTES):
+        self.agent_id = agent_id
+        self._publish = publish
+        self.inbound_queue_size = inbound_queue_size
+        self.default_timeout = default_timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._acks: Dict[str, asyncio.Future] = {}
+        self._inbound: Optional[asyncio.Queue] = None
+        self._poll_task: Optional[asyncio.Task] = None
+        self._encoder = FrameEncoder(max_frame_bytes=max_frame_bytes)
+        self._assembler = FrameAssembler()
+        self._stats = {"sent": 0, "replies": 0, "timeouts": 0, "inbound": 0,
+                       "dropped_inbound": 0, "orphan_replies": 0,
+                       "acks": 0, "redeliveries": 0, "unacked": 0,
+                       "compressed": 0, "frames_sent": 0}
+
+    def _bind_loop(self):
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._inbound = asyncio.Queue(maxsize=self.inbound_queue_size)
+
+    @property
+    def started(self) -> bool:
+        return self._loop is not None
+
+    def send(self, target: Optional[str], envelope: Dict):
+        raw = json.dumps(envelope)
+        frames = self._encoder.encode(raw)
+        for frame in frames:
+            result = self._publish(target, frame, envelope["message_type"])
+        self._stats["sent"] += 1
+        self._stats["frames_sent"] += len(frames)
+        if frames[0] is not raw:
+            self._stats["compressed"] += 1
+        return result
+
+    async def request(self,
+                      target: Optional[str],
+                      payload: Dict,
+                      message_type: str = "query",
+                      timeout: Optional[float] = None,
+                      ack_timeout: Optional[float] = None,
+                      max_attempts: int = 1) -> Dict:
+        """
+        Send payload and wait for the reply that carries the same correlation id.
+
+        With `ack_timeout`, the consumer must acknowledge the request within
+        that time or it is delivered again, up to `max_attempts` times.
+        """
+        self._bind_loop()
+        envelope = build_envelope(self.agent_id, payload, message_type, reply_to=self.agent_id)
+        correlation_id = envelope["correlation_id"]
+        future = self._loop.create_future()
+        self._pending[correlation_id] = future
+
+        try:
+            if ack_timeout is None:
+                self.send(target, envelope)
+            else:
+                await self._deliver_until_acked(target, envelope, future, ack_timeout, max_attempts)
+            try:
+                return await asyncio.wait_for(future, timeout or self.default_timeout)
+            except asyncio.TimeoutError:
+                self._stats["timeouts"] += 1
+                raise RequestTimeoutError(
+                    f"No reply from {target or 'connected agent'} within {timeout or self.default_timeout}s "
+                    f"(correlation_id={correlation_id})"
+                )
+        finally:
+            self._pending.pop(correlation_id, None)
+            self._acks.pop(correlation_id, None)
+
+    async def _deliver_until_acked(self, target: Optional[str], envelope: Dict, reply: asyncio.Future,
+                                   ack_timeout: float, max_attempts: int):
+        correlation_id = envelope["correlation_id"]
+        acked = self._loop.create_future()
+        self._acks[correlation_id] = acked
+        for attempt in range(1, max_attempts + 1):
+            if attempt > 1:
+                self._stats["redeliveries"] += 1
+                logger.warning(f"{self.agent_id}: no ack from {target}, redelivering "
+                               f"(attempt {attempt}/{max_attempts})")
+            self.send(target, envelope)
+            # A fast consumer's reply may arrive before its ack is dispatched
+            done, _ = await asyncio.wait({acked, reply}, timeout=ack_timeout,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if done:
+                return
+        self._stats["unacked"] += 1
+        raise NoConsumerError(
+            f"No consumer on {target} acknowledged the request after {max_attempts} attempts "
+            f"(correlation_id={correlation_id})"
+        )
+
+    async def ack(self, request: Dict):
+        """Tell the sender of a request that it has been accepted"""
+        envelope = build_envelope(self.agent_id, {}, "ack", correlation_id=request.get("correlation_id"))
+        self.send(request.get("reply_to") or request.get("sender"), envelope)
+
+    async def reply(self, request: Dict, payload: Dict, message_type: str = "reply"):
+        """Answer a received request, echoing its correlation id"""
+        envelope = build_envelope(self.agent_id, payload, message_type,
+                                  correlation_id=request.get("correlation_id"))
+        self.send(request.get("reply_to") or request.get("sender"), envelope)
+
+    async def receive(self, timeout: Optional[float] = None) -> Dict:
+        """Wait for the next message that is not a reply to one of our requests"""
+        self._bind_loop()
+        if timeout is None:
+            return await self._inbound.get()
+        return await asyncio.wait_for(self._inbound.get(), timeout)
+
+    def drain_inbound(self) -> List[Dict]:
+        """Return all queued inbound messages without waiting"""
+        messages = []
+        while self._inbound is not None and not self._inbound.empty():
+            messages.append(self._inbound.get_nowait())
+        return messages
+
+    def on_raw_message(self, raw: str):
+        """Entry point for the transport; safe to call from any thread"""
+        try:
+            raw = self._assembler.feed(raw)
+        except (IntegrityError, ValueError, KeyError) as e:
+            logger.error(f"{self.agent_id}: dropping corrupt message frames: {e}")
+            return
+        if raw is None:
+            return
+
+        try:
+            envelope = json.loads(raw)
+        except (TypeError, ValueError):
+            envelope = {"message_type": "raw", "payload": {"raw": raw}}
+        if not isinstance(envelope, dict):
+            envelope = {"message_type": "raw", "payload": envelope}
+
+        if self._loop is None:
+            logger.warning(f"{self.agent_id}: message received before messenger started, dropping")
+            self._stats["dropped_inbound"] += 1
+            return
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._dispatch(envelope)
+        else:
+            self._loop.call_soon_threadsafe(self._dispatch, envelope)
+
+    def _dispatch(self, envelope: Dict):
+        correlation_id = envelope.get("correlation_id")
+        if envelope.get("message_type") == "ack":
+            acked = self._acks.get(correlation_id)
+            if acked is not None and not acked.done():
+                self._stats["acks"] += 1
+                acked.set_result(True)
+            return
+        if envelope.get("message_type") in ("reply", "error"):
+            future = self._pending.get(correlation_id)
+            if future is None or future.done():
+                self._stats["orphan_replies"] += 1
+                return
+            self._stats["replies"] += 1
+            future.set_result(envelope)
+            return
+
+        # Bounded inbound queue: under overload the oldest message is dropped
+        if self._inbound.full():
+            self._inbound.get_nowait()
+            self._stats["dropped_inbound"] += 1
+        self._inbound.put_nowait(envelope)
+        self._stats["inbound"] += 1
+
+    async def start(self, read_messages: Optional[Callable[[], List[str]]] = None,
+                    poll_interval: float = settings.MESSAGING_POLL_INTERVAL):
+        """
+        Bind to the running loop. If the transport cannot push messages, a
+        single background task drains `read_messages` for all callers.
+        """
+        self._bind_loop()
+        if read_messages and self._poll_task is None:
+            self._poll_task = asyncio.create_task(self._poll(read_messages, poll_interval))
+
+    async def _poll(self, read_messages: Callable[[], List[str]], interval: float):
+        while True:
+            try:
+                for raw in await asyncio.to_thread(read_messages):
+                    self.on_raw_message(raw)
+            except Exception as e:
+                logger.error(f"{self.agent_id}: reading messages failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def stop(self):
+        if self._poll_task:
+            self._poll_task.cancel()
+            self._poll_task = None
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            "frames_received": self._assembler.stats(),
+            "pending_requests": len(self._pending),
+            "inbound_queued": self._inbound.qsize() if self._inbound else 0
+        }
@@ -0,0 +1,120 @@
+"""
+Agent Task Queue
+Topics and broker connections used to hand agent tasks to worker processes.
+Every worker of one agent role joins the same shared subscription, so each
+task is consumed by exactly one worker and roles scale independently.
+"""
+import logging
+import threading
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from app.config import settings
+from app.infrastructure.messaging import get_local_broker
+
+logger = logging.getLogger(__name__)
+
+AGENT_ROLES = ("policy_parser", "eligibility_verifier", "benefit_matcher", "citizen_advocate")
+
+
+def task_topic(role: str) -> str:
+    """Topic the workers of one agent role consume tasks from"""
+    return f"{settings.TASK_TOPIC_PREFIX}/tasks/{role}"
+
+
+def reply_topic(owner: str) -> str:
+    """Private topic for the replies to one dispatcher"""
+    return f"{settings.TASK_TOPIC_PREFIX}/replies/{owner}/{uuid.uuid4().hex[:8]}"
+
+
+def worker_roles() -> List[str]:
+    """Agent roles served by task workers instead of the API process"""
+    roles = [role.strip() for role in settings.TASK_WORKER_AGENTS.split(",") if role.strip()]
+    unknown = [role for role in roles if role not in AGENT_ROLES]
+    if unknown:
+        raise ValueError(f"Unknown agent roles in TASK_WORKER_AGENTS: {unknown}")
+    return roles
+
+
+class MQTTTaskBroker:
+    """
+    Task broker on an MQTT 5 server. Grouped subscriptions use shared
+    subscriptions (`$share/<group>/<topic>`) and messages are sent at QoS 1.
+    """
+
+    def __init__(self, url: str, client_id: str):
+        try:
+            import paho.mqtt.client as mqtt
+        except ImportError:
+            raise RuntimeError("paho-mqtt is required for an mqtt:// TASK_BROKER_URL")
+
+        self._mqtt = mqtt
+        parsed = urlparse(url)
+        if hasattr(mqtt, "CallbackAPIVersion"):
+            self._client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id,
+                                       protocol=mqtt.MQTTv5)
+        else:
+            self._client = mqtt.Client(client_id=client_id, protocol=mqtt.MQTTv5)
+        if parsed.username:
+            self._client.username_pw_set(parsed.username, parsed.password)
+
+        # subscription filter -> (topic, callback)
+        self._subscriptions: Dict[str, Tuple[str, Callable[[str], None]]] = {}
+        self._lock = threading.Lock()
+        self._client.on_connect = self._on_connect
+        self._client.on_message = self._on_message
+        self._client.connect(parsed.hostname or "localhost", parsed.port or 1883)
+        self._client.loop_start()
+        logger.info(f"✓ Task broker connected to {parsed.hostname}:{parsed.port or 1883}")
+
+    def _on_connect(self, client, userdata, flags, reason_code, properties=None):
+        # Subscriptions do not survive a reconnect with a clean session
+        with self._lock:
+            filters = list(self._subscriptions)
+        for subscription in filters:
+            self._client.subscribe(subscription, qos=1)
+
+    def _on_message(self, client, userdata, message):
+        payload = message.payload.decode("utf-8", errors="replace")
+        with self._lock:
+            callbacks = [callback for topic, callback in self._subscriptions.values()
+                         if self._mqtt.topic_matches_sub(topic, message.topic)]
+        for callback in callbacks:
+            try:
+                callback(payload)
+            except Exception as e:
+                logger.error(f"Subscriber on {message.topic} failed: {e}")
+
+    def subscribe(self, topic: str, callback: Callable[[str], None], group: Optional[str] = None):
+        subscription = f"$share/{group}/{topic}" if group else topic
+        with self._lock:
+            self._subscriptions[subscription] = (topic, callback)
+        self._client.subscribe(subscription, qos=1)
+
+    def unsubscribe(self, topic: str, callback: Callable[[str], None]):
+        with self._lock:
+            filters = [f for f, (t, cb) in self._subscriptions.items() if t == topic and cb == callback]
+            for subscription in filters:
+                del self._subscriptions[subscription]
+        for subscription in filters:
+            self._client.unsubscribe(subscription)
+
+    def publish(self, topic: str, payload: str) -> int:
+        self._client.publish(topic, payload, qos=1)
+        return 1
+
+    def close(self):
+        self._client.loop_stop()
+        self._client.disconnect()
+
+
+def create_task_broker(url: str = None, client_id: Optional[str] = None):
+    """Broker for TASK_BROKER_URL; `memory://` only reaches workers in this process"""
+    url = url or settings.TASK_BROKER_URL
+    scheme = urlparse(url).scheme
+    if scheme == "memory":
+        return get_local_broker()
+    if scheme in ("mqtt", "tcp"):
+        return MQTTTaskBroker(url, client_id or f"policy-navigator-{uuid.uuid4().hex[:8]}")
+    raise ValueError(f"Unsupported TASK_BROKER_URL scheme: {scheme}")
@@ -0,0 +1,155 @@
+"""
+Wire Codec
+Compression and chunking for inter-agent messages. Serialized envelopes above
+a size threshold are compressed (zstd, or gzip when zstandard is missing) and
+split into frames that fit the broker's message limit. The receiver
+reassembles the frames and checks a SHA-256 digest of the original message.
+Messages below the threshold are sent unchanged. Topics with competing
+consumers must not be split, as each frame could reach a different consumer;
+an encoder with `max_frame_bytes=0` sends every message as one frame.
+"""
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+FRAME_MARKER = "pn-frame/1"
+_FRAME_PREFIX = '{"frame": "%s"' % FRAME_MARKER
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class IntegrityError(ValueError):
+    """A reassembled message does not match its digest"""
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if codec == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    return data
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("Received a zstd frame but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "gzip":
+        return gzip.decompress(data)
+    return data
+
+
+def resolve_codec(codec: str) -> str:
+    if codec == "zstd" and zstandard is None:
+        logger.warning("zstandard is not installed, compressing messages with gzip")
+        return "gzip"
+    if codec not in ("zstd", "gzip", "none"):
+        raise ValueError(f"Unknown MESSAGING_COMPRESSION: {codec}")
+    return codec
+
+
+class FrameEncoder:
+    """Turns one serialized message into the frames to publish"""
+
+    def __init__(self,
+                 codec: str = settings.MESSAGING_COMPRESSION,
+                 threshold: int = settings.MESSAGING_COMPRESS_THRESHOLD,
+                 max_frame_bytes: int = settings.MESSAGING_MAX_FRAME_BYTES):
+        self.codec = resolve_codec(codec)
+        self.threshold = threshold
+        # Room for the frame header around the data; None sends one frame
+        self.chunk_size = max(1024, max_frame_bytes - 512) if max_frame_bytes > 0 else None
+
+    def encode(self, raw: str) -> List[str]:
+        data = raw.encode("utf-8")
+        if len(data) < self.threshold:
+            return [raw]
+
+        body = base64.b64encode(_compress(data, self.codec)).decode("ascii")
+        if self.chunk_size is None:
+            chunks = [body]
+        else:
+            chunks = [body[i:i + self.chunk_size] for i in range(0, len(body), self.chunk_size)] or [""]
+        transfer_id = uuid.uuid4().hex
+        digest = hashlib.sha256(data).hexdigest()
+        return [
+            json.dumps({
+                "frame": FRAME_MARKER,
+                "transfer_id": transfer_id,
+                "index": index,
+                "count": len(chunks),
+                "codec": self.codec,
+                "size": len(data),
+                "sha256": digest,
+                "data": chunk
+            })
+            for index, chunk in enumerate(chunks)
+        ]
+
+
+class FrameAssembler:
+    """
+    Reassembles frames into the original message. Safe to call from any
+    thread; incomplete transfers are discarded after `timeout` seconds.
+    """
+
+    def __init__(self, timeout: float = settings.MESSAGING_CHUNK_TIMEOUT):
+        self.timeout = timeout
+        self._partial: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._stats = {"frames": 0, "reassembled": 0, "integrity_failures": 0, "expired_transfers": 0}
+
+    def feed(self, raw: str) -> Optional[str]:
+        """Return the complete message, or None while frames are still missing"""
+        if not isinstance(raw, str) or not raw.startswith(_FRAME_PREFIX):
+            return raw
+        frame = json.loads(raw)
+
+        with self._lock:
+            self._stats["frames"] += 1
+            self._expire()
+            transfer = self._partial.setdefault(frame["transfer_id"], {"started": time.monotonic(), "chunks": {}})
+            transfer["chunks"][frame["index"]] = frame["data"]
+            if len(transfer["chunks"]) < frame["count"]:
+                return None
+            del self._partial[frame["transfer_id"]]
+
+        body = "".join(transfer["chunks"][i] for i in range(frame["count"]))
+        try:
+            data = _decompress(base64.b64decode(body), frame["codec"])
+            if len(data) != frame["size"] or hashlib.sha256(data).hexdigest() != frame["sha256"]:
+                raise IntegrityError(f"Transfer {frame['transfer_id']} failed its integrity check")
+        except Exception as e:
+            with self._lock:
+                self._stats["integrity_failures"] += 1
+            raise IntegrityError(str(e)) from e
+
+        with self._lock:
+            self._stats["reassembled"] += 1
+        return data.decode("utf-8")
+
+    def _expire(self):
+        now = time.monotonic()
+        expired = [tid for tid, transfer in self._partial.items() if now - transfer["started"] > self.timeout]
+        for transfer_id in expired:
+            del self._partial[transfer_id]
+            self._stats["expired_transfers"] += 1
+            logger.warning(f"Discarded incomplete transfer {transfer_id}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {**self._stats, "partial_transfers": len(self._partial)}
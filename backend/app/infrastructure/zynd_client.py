@@ -1,9 +1,16 @@
-from zyndai_agent.agent import AgentConfig, ZyndAIAgent
-from langchain_openai import ChatOpenAI
 from app.config import settings
-from typing import List, Dict, Optional
+from app.core.circuit_breaker import get_breaker
+from app.core.tracing import span
+from app.infrastructure.messaging import AgentMessenger, build_envelope, get_local_broker
+from app.infrastructure.task_queue import reply_topic, task_topic
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
+import asyncio
+import json
 import logging
 import os
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -26,9 +33,23 @@ class ZyndAgentClient:
             logger.info(f"Running {agent_name} in SIMULATION MODE")
             self.simulation_mode = True
             self._init_simulation_mode()
-            return
+        else:
+            self._init_network_mode(credential_path, secret_seed)
         
+        self._init_messaging()
+        self.task_role: Optional[str] = None
+        self.task_messenger: Optional[AgentMessenger] = None
+        self._discovery_cache: Dict[tuple, Dict] = {}
+        self._discovery_lock = threading.Lock()
+    
+    def _init_network_mode(self, credential_path: str, secret_seed: str):
+        """Connect to the real Zynd network, falling back to simulation mode"""
+        agent_name = self.agent_name
         try:
+            # Imported here: simulation mode never needs the SDK or the LLM client
+            from zyndai_agent.agent import AgentConfig, ZyndAIAgent
+            from langchain_openai import ChatOpenAI
+            
             # Initialize real Zynd agent
             self.agent_config = AgentConfig(
                 auto_reconnect=True,
@@ -83,6 +104,80 @@ class ZyndAgentClient:
         logger.info(f"✓ {self.agent_name} running in simulation mode")
         logger.info(f"  Simulated DID: {self.simulated_did}")
     
+    def _init_messaging(self):
+        """Set up correlated request/response messaging over the agent's transport"""
+        self.agent_id = self.get_identity().get("didIdentifier", self.agent_name)
+        self.messenger = AgentMessenger(agent_id=self.agent_id, publish=self._publish_raw)
+        
+        if self.simulation_mode:
+            # Agents in this process reach each other through the local broker
+            get_local_broker().subscribe(self.agent_id, self.messenger.on_raw_message)
+            self._push_delivery = True
+        elif hasattr(self.agent, "add_message_handler"):
+            self.agent.add_message_handler(
+                lambda message: self.messenger.on_raw_message(getattr(message, "content", message))
+            )
+            self._push_delivery = True
+        else:
+            self._push_delivery = False
+    
+    def _publish_raw(self, target: Optional[str], raw: str, message_type: str):
+        if self.simulation_mode:
+            if not get_local_broker().publish(target or "", raw):
+                logger.warning(f"[SIMULATION] No agent subscribed at {target}")
+            return None
+        return self.agent.send_message(message_content=raw, message_type=message_type)
+    
+    def attach_task_queue(self, role: str, broker):
+        """Hand this agent's tasks to the task workers consuming `role` on `broker`"""
+        self.task_role = role
+        # Workers compete for the task topic, so a task must not be split into frames
+        self.task_messenger = AgentMessenger(
+            agent_id=reply_topic(role),
+            publish=lambda target, raw, message_type: broker.publish(target, raw),
+            max_frame_bytes=0
+        )
+        broker.subscribe(self.task_messenger.agent_id, self.task_messenger.on_raw_message)
+        logger.info(f"✓ {self.agent_name} dispatching tasks to {task_topic(role)}")
+    
+    async def dispatch_task(self, action: str, payload: Dict, timeout: Optional[float] = None) -> Dict:
+        """Run an action on whichever task worker acknowledges it first"""
+        # Worker error replies mean the broker works; only missing acks/replies trip the breaker
+        with span("task.dispatch", role=self.task_role, action=action):
+            reply = await get_breaker(f"tasks:{self.task_role}").call_async(
+                self.task_messenger.request,
+                task_topic(self.task_role),
+                {"action": action, "payload": payload},
+                message_type="task",
+                timeout=timeout,
+                ack_timeout=settings.TASK_ACK_TIMEOUT,
+                max_attempts=settings.TASK_MAX_DELIVERY_ATTEMPTS
+            )
+        if reply.get("message_type") == "error":
+            raise RuntimeError(reply.get("payload", {}).get("error", "Task worker error"))
+        return reply.get("payload", {})
+    
+    async def start_messaging(self):
+        """Start dispatching replies; must be called from the serving event loop"""
+        read = None if self._push_delivery else self._read_raw_messages
+        await self.messenger.start(read_messages=read)
+        if self.task_messenger is not None:
+            await self.task_messenger.start()
+    
+    async def request(self,
+                      message: Dict,
+                      target: Optional[str] = None,
+                      message_type: str = "query",
+                      timeout: Optional[float] = None) -> Dict:
+        """Send a message and await the correlated reply payload"""
+        with span("mqtt.request", agent=self.agent_name, target=target or "broadcast"):
+            reply = await get_breaker(f"zynd:{self.agent_name}").call_async(
+                self.messenger.request, target, message, message_type=message_type, timeout=timeout
+            )
+        if reply.get("message_type") == "error":
+            raise RuntimeError(reply.get("payload", {}).get("error", "Remote agent error"))
+        return reply.get("payload", {})
+    
     def get_identity(self) -> Dict:
         """Get agent's DID identity"""
         if self.simulation_mode:
@@ -103,13 +198,24 @@ class ZyndAgentClient:
     def discover_agents(self, 
                        capabilities: List[str], 
                        min_score: float = 0.7,
-                       top_k: int = 5) -> List[Dict]:
-        """Discover other agents by capabilities"""
+                       top_k: int = 5,
+                       use_cache: bool = True) -> List[Dict]:
+        """Discover other agents by capabilities; registry results are cached for DISCOVERY_CACHE_TTL_SECONDS"""
         if self.simulation_mode:
             return self._simulate_agent_discovery(capabilities, top_k)
         
+        key = (tuple(sorted(capabilities)), min_score, top_k)
+        now = time.monotonic()
+        with self._discovery_lock:
+            cached = self._discovery_cache.get(key)
+            if cached is not None and use_cache:
+                cached["last_used"] = now
+                if cached["expires_at"] > now:
+                    return list(cached["results"])
+        
         try:
-            return self.agent.search_agents_by_capabilities(
+            results = get_breaker("zynd-registry").call(
+                self.agent.search_agents_by_capabilities,
                 capabilities=capabilities,
                 match_score_gte=min_score,
                 top_k=top_k
@@ -117,6 +223,31 @@ class ZyndAgentClient:
         except Exception as e:
             logger.error(f"Agent discovery failed: {e}")
             return self._simulate_agent_discovery(capabilities, top_k)
+        
+        with self._discovery_lock:
+            self._discovery_cache[key] = {
+                "results": results,
+                "expires_at": time.monotonic() + settings.DISCOVERY_CACHE_TTL_SECONDS,
+                "last_used": cached["last_used"] if cached else now
+            }
+        return list(results)
+    
+    def refresh_discovery_cache(self, horizon: float):
+        """
+        Re-query cached discoveries that expire within `horizon` seconds and
+        were used during their lifetime; drop the ones nobody asked for.
+        """
+        now = time.monotonic()
+        with self._discovery_lock:
+            entries = list(self._discovery_cache.items())
+        for key, entry in entries:
+            if entry["expires_at"] - now > horizon:
+                continue
+            if now - entry["last_used"] > settings.DISCOVERY_CACHE_TTL_SECONDS:
+                with self._discovery_lock:
+                    self._discovery_cache.pop(key, None)
+                continue
+            self.discover_agents(list(key[0]), min_score=key[1], top_k=key[2], use_cache=False)
     
     def _simulate_agent_discovery(self, capabilities: List[str], top_k: int) -> List[Dict]:
         """Simulate agent discovery for development"""
@@ -158,38 +289,59 @@ class ZyndAgentClient:
     
     def send_message(self, 
                     message: Dict, 
-                    message_type: str = "query") -> Dict:
-        """Send message to connected agent"""
+                    message_type: str = "query",
+                    target: Optional[str] = None,
+                    correlation_id: Optional[str] = None,
+                    reply_to: Optional[str] = None) -> Dict:
+        """Send message to connected agent; the envelope carries the current trace id"""
+        with span("mqtt.send", agent=self.agent_name, message_type=message_type):
+            return self._send_envelope(message, message_type, target, correlation_id, reply_to)
+    
+    def _send_envelope(self, message: Dict, message_type: str, target: Optional[str],
+                       correlation_id: Optional[str], reply_to: Optional[str]) -> Dict:
+        envelope = build_envelope(self.agent_id, message, message_type,
+                                  correlation_id=correlation_id, reply_to=reply_to)
         if self.simulation_mode:
             logger.info(f"[SIMULATION] Sent message: {str(message)[:100]}")
-            return {"status": "sent_simulated", "message": message}
         
-        import json
         try:
-            result = self.agent.send_message(
-                message_content=json.dumps(message),
-                message_type=message_type
-            )
-            return {"status": "sent", "result": result}
+            result = get_breaker(f"zynd:{self.agent_name}").call(self.messenger.send, target, envelope)
+            status = "sent_simulated" if self.simulation_mode else "sent"
+            return {"status": status, "message": message, "correlation_id": envelope["correlation_id"], "result": result}
         except Exception as e:
             logger.error(f"Send message failed: {e}")
             return {"status": "error", "error": str(e)}
     
+    def _read_raw_messages(self) -> List[str]:
+        """Fetch raw message strings from the Zynd SDK mailbox"""
+        messages_str = self.agent.read_messages()
+        if not messages_str or "No new messages" in messages_str:
+            return []
+        try:
+            messages = json.loads(messages_str)
+        except ValueError:
+            return [messages_str]
+        if not isinstance(messages, list):
+            messages = [messages]
+        return [m if isinstance(m, str) else json.dumps(m) for m in messages]
+    
     def read_messages(self) -> List[Dict]:
         """Read incoming messages"""
+        # Once the dispatcher is running it owns the mailbox; return what it queued
+        if self.messenger.started:
+            return self.messenger.drain_inbound()
+        
         if self.simulation_mode:
             return []
         
         try:
-            messages_str = self.agent.read_messages()
-            if "No new messages" in messages_str:
-                return []
-            
-            import json
-            try:
-                return json.loads(messages_str)
-            except:
-                return [{"raw": messages_str}]
+            messages = []
+            for raw in self._read_raw_messages():
+                try:
+                    messages.append(json.loads(raw))
+                except ValueError:
+                    messages.append({"raw": raw})
+            return messages
         except Exception as e:
             logger.error(f"Read messages failed: {e}")
             return []
@@ -232,8 +384,50 @@ eligibility_verifier_client: Optional[ZyndAgentClient] = None
 benefit_matcher_client: Optional[ZyndAgentClient] = None
 citizen_advocate_client: Optional[ZyndAgentClient] = None
 
-def initialize_agents():
-    """Initialize all 4 agents on startup"""
+AGENT_CLIENT_SPECS = {
+    "policy_parser": {
+        "agent_name": "Policy Parser Agent",
+        "credential_path": "./data/credentials/policy_parser_credential.json",
+        "seed_setting": "POLICY_PARSER_SEED",
+        "capabilities": ["policy_analysis", "nlp", "document_parsing"]
+    },
+    "eligibility_verifier": {
+        "agent_name": "Eligibility Verifier Agent",
+        "credential_path": "./data/credentials/eligibility_verifier_credential.json",
+        "seed_setting": "ELIGIBILITY_VERIFIER_SEED",
+        "capabilities": ["eligibility_verification", "rules_engine"]
+    },
+    "benefit_matcher": {
+        "agent_name": "Benefit Matcher Agent",
+        "credential_path": "./data/credentials/benefit_matcher_credential.json",
+        "seed_setting": "BENEFIT_MATCHER_SEED",
+        "capabilities": ["benefit_matching", "semantic_search"]
+    },
+    "citizen_advocate": {
+        "agent_name": "Citizen Advocate Agent",
+        "credential_path": "./data/credentials/citizen_advocate_credential.json",
+        "seed_setting": "CITIZEN_ADVOCATE_SEED",
+        "capabilities": ["citizen_guidance", "application_support"]
+    }
+}
+
+def _create_client(role: str) -> Tuple[ZyndAgentClient, float]:
+    spec = AGENT_CLIENT_SPECS[role]
+    started = time.perf_counter()
+    client = ZyndAgentClient(
+        agent_name=spec["agent_name"],
+        credential_path=spec["credential_path"],
+        secret_seed=getattr(settings, spec["seed_setting"]),
+        capabilities=spec["capabilities"]
+    )
+    return client, round((time.perf_counter() - started) * 1000, 1)
+
+def initialize_agents() -> Dict[str, float]:
+    """
+    Initialize all 4 agents on startup. Each client loads credentials and
+    connects to the network, so they are created concurrently.
+    Returns the construction time of each client in milliseconds.
+    """
     global policy_parser_client, eligibility_verifier_client
     global benefit_matcher_client, citizen_advocate_client
     
@@ -241,37 +435,42 @@ def initialize_agents():
     logger.info("Initializing Zynd Agents...")
     logger.info("=" * 60)
     
-    policy_parser_client = ZyndAgentClient(
-        agent_name="Policy Parser Agent",
-        credential_path="./data/credentials/policy_parser_credential.json",
-        secret_seed=settings.POLICY_PARSER_SEED,
-        capabilities=["policy_analysis", "nlp", "document_parsing"]
-    )
+    with ThreadPoolExecutor(max_workers=len(AGENT_CLIENT_SPECS), thread_name_prefix="zynd-init") as pool:
+        results = dict(zip(AGENT_CLIENT_SPECS, pool.map(_create_client, AGENT_CLIENT_SPECS)))
     
-    eligibility_verifier_client = ZyndAgentClient(
-        agent_name="Eligibility Verifier Agent",
-        credential_path="./data/credentials/eligibility_verifier_credential.json",
-        secret_seed=settings.ELIGIBILITY_VERIFIER_SEED,
-        capabilities=["eligibility_verification", "rules_engine"]
-    )
-    
-    benefit_matcher_client = ZyndAgentClient(
-        agent_name="Benefit Matcher Agent",
-        credential_path="./data/credentials/benefit_matcher_credential.json",
-        secret_seed=settings.BENEFIT_MATCHER_SEED,
-        capabilities=["benefit_matching", "semantic_search"]
-    )
-    
-    citizen_advocate_client = ZyndAgentClient(
-        agent_name="Citizen Advocate Agent",
-        credential_path="./data/credentials/citizen_advocate_credential.json",
-        secret_seed=settings.CITIZEN_ADVOCATE_SEED,
-        capabilities=["citizen_guidance", "application_support"]
-    )
+    policy_parser_client = results["policy_parser"][0]
+    eligibility_verifier_client = results["eligibility_verifier"][0]
+    benefit_matcher_client = results["benefit_matcher"][0]
+    citizen_advocate_client = results["citizen_advocate"][0]
     
     logger.info("=" * 60)
     logger.info("✓ All 4 agents initialized successfully")
     logger.info("=" * 60)
+    return {role: elapsed for role, (_, elapsed) in results.items()}
+
+def get_all_clients() -> Dict[str, Optional[ZyndAgentClient]]:
+    return {
+        "policy_parser": policy_parser_client,
+        "eligibility_verifier": eligibility_verifier_client,
+        "benefit_matcher": benefit_matcher_client,
+        "citizen_advocate": citizen_advocate_client
+    }
+
+async def start_agent_messaging():
+    """Start reply dispatching for every initialized agent client"""
+    await asyncio.gather(*(
+        client.start_messaging() for client in get_all_clients().values() if client is not None
+    ))
+
+async def stop_agent_messaging():
+    """Stop reply dispatching and cancel outstanding requests"""
+    messengers = []
+    for client in get_all_clients().values():
+        if client is not None:
+            messengers.append(client.messenger)
+            if client.task_messenger is not None:
+                messengers.append(client.task_messenger)
+    await asyncio.gather(*(messenger.stop() for messenger in messengers))
 
 def get_policy_parser() -> ZyndAgentClient:
     return policy_parser_client
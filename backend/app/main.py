@@ -1,9 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+import asyncio
 import logging
 
 
 from app.config import settings
+from app.core.circuit_breaker import breaker_states
 
 
 # Configure logging
@@ -17,6 +20,32 @@ logger = logging.getLogger(__name__)
 app = FastAPI(title=settings.APP_NAME, version="1.0.0")
 
 
+# Profiling sits innermost so reports cover the handler, not admission queueing
+if settings.PROFILING_ENABLED:
+    from app.core.profiler import ProfilingMiddleware
+    app.add_middleware(ProfilingMiddleware)
+
+
+# Admission control: bounded in-flight work per endpoint class, chat capacity reserved.
+# Added before CORS so shed responses still carry CORS headers.
+if settings.ADMISSION_ENABLED:
+    from app.core.admission import AdmissionController, AdmissionMiddleware
+    app.state.admission = AdmissionController()
+    app.add_middleware(AdmissionMiddleware, controller=app.state.admission)
+
+
+# Request metrics wrap admission control so queued and shed requests are counted too
+if settings.METRICS_ENABLED:
+    from app.core import metrics
+    metrics.install(app)
+
+
+# Tracing is outermost so Server-Timing covers admission wait and the whole request
+if settings.TRACING_ENABLED:
+    from app.core.tracing import TracingMiddleware
+    app.add_middleware(TracingMiddleware)
+
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -34,9 +63,11 @@ benefit_matcher = None
 citizen_advocate = None
 
 
-# Include API router
-from app.routers import agents
+# Include API routers
+from app.routers import agents, admin, jobs
 app.include_router(agents.router)
+app.include_router(admin.router)
+app.include_router(jobs.router)
 
 
 @app.on_event("startup")
@@ -47,22 +78,67 @@ async def startup_event():
     logger.info("Starting Policy Navigator Backend")
     logger.info("=" * 60)
     
+    from app.core.startup_timer import StartupTimer
+    timer = StartupTimer()
+    app.state.startup_complete = False
+    app.state.agent_loaders = {}
+    app.state.remote_agents = []
+    
+    # Background jobs do not depend on the agents being up
+    with timer.phase("job_queue"):
+        from app.services.job_queue import JobQueue
+        app.state.job_queue = JobQueue()
+        await app.state.job_queue.start()
+    
+    # Map the compiled scheme catalog (compiled here if the build step did not)
+    with timer.phase("scheme_catalog"):
+        from app.services.compiled_catalog import get_catalog
+        await asyncio.to_thread(get_catalog)
+    
     try:
-        # Initialize Zynd network clients
-        from app.infrastructure.zynd_client import initialize_agents
-        initialize_agents()
+        # Initialize Zynd network clients concurrently
+        with timer.phase("zynd_clients"):
+            from app.infrastructure.zynd_client import initialize_agents, start_agent_messaging, get_all_clients
+            client_times = await asyncio.to_thread(initialize_agents)
+        for role, elapsed in client_times.items():
+            timer.record(f"  zynd_client.{role}", elapsed)
+        
+        # Agents served by task workers are only dispatched to from this process
+        from app.infrastructure.task_queue import AGENT_ROLES, create_task_broker, worker_roles
+        remote_roles = worker_roles()
+        app.state.remote_agents = remote_roles
+        if remote_roles:
+            with timer.phase("task_broker"):
+                app.state.task_broker = create_task_broker()
+                for role in remote_roles:
+                    get_all_clients()[role].attach_task_queue(role, app.state.task_broker)
+        
+        with timer.phase("messaging"):
+            await start_agent_messaging()
         logger.info("All agents connected to Zynd Network")
         
-        # Initialize specialized agent logic
-        from app.agents.policy_parser import PolicyParserAgent
-        from app.agents.eligibility_verifier import EligibilityVerifierAgent
-        from app.agents.benefit_matcher import BenefitMatcherAgent
-        from app.agents.citizen_advocate import CitizenAdvocateAgent
+        with timer.phase("heartbeat"):
+            from app.services.agent_heartbeat import AgentHeartbeat
+            app.state.agent_heartbeat = AgentHeartbeat()
+            await app.state.agent_heartbeat.start()
         
-        policy_parser = PolicyParserAgent()
-        eligibility_verifier = EligibilityVerifierAgent()
-        benefit_matcher = BenefitMatcherAgent()
-        citizen_advocate = CitizenAdvocateAgent()
+        # Agent LLM chains are built on first use, except the eager ones
+        from app.agents.loader import LazyAgent
+        loaders = {role: LazyAgent(role) for role in AGENT_ROLES if role not in remote_roles}
+        app.state.agent_loaders = loaders
+        eager = [role for role in _eager_roles() if role in loaders]
+        with timer.phase("eager_agents"):
+            results = await asyncio.gather(*(asyncio.to_thread(loaders[role].load) for role in eager),
+                                           return_exceptions=True)
+        for role, result in zip(eager, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to initialize {role}: {result}")
+            timer.record(f"  agent.{role}", loaders[role].init_ms or 0.0)
+        
+        policy_parser = loaders.get("policy_parser")
+        eligibility_verifier = loaders.get("eligibility_verifier")
+        benefit_matcher = loaders.get("benefit_matcher")
+        citizen_advocate = loaders.get("citizen_advocate")
         
         # Store in app.state for FastAPI access
         app.state.policy_parser = policy_parser
@@ -70,18 +146,74 @@ async def startup_event():
         app.state.benefit_matcher = benefit_matcher
         app.state.citizen_advocate = citizen_advocate
         
-        logger.info("✓ All agent LLM chains initialized")
+        from app.services.agent_communication import AgentCommunicationService
+        AgentCommunicationService.register_local_agents({
+            "policy_parser": policy_parser,
+            "eligibility_verifier": eligibility_verifier,
+            "benefit_matcher": benefit_matcher,
+            "citizen_advocate": citizen_advocate
+        })
+        
+        if remote_roles:
+            logger.info(f"✓ Task workers serve: {', '.join(remote_roles)}")
+        logger.info(f"✓ Agents ready: {', '.join(eager) or 'none'}; built on first use: "
+                    f"{', '.join(role for role in loaders if role not in eager) or 'none'}")
+        
+        if settings.AGENT_BACKGROUND_WARMUP:
+            app.state.warmup_task = asyncio.create_task(_warm_up_agents(loaders))
         
     except Exception as e:
         logger.error(f"Failed to initialize agents: {e}")
         logger.info("Running in degraded mode")
     
+    app.state.startup_complete = True
+    app.state.startup_timing = timer.summary()
+    timer.log()
+    
     logger.info("=" * 60)
     logger.info(f"✓ Server ready at http://localhost:8000")
     logger.info(f"✓ API docs at http://localhost:8000/docs")
     logger.info("=" * 60)
 
 
+def _eager_roles():
+    return [role.strip() for role in settings.AGENT_EAGER_INIT.split(",") if role.strip()]
+
+
+async def _warm_up_agents(loaders):
+    """Build the remaining agents one at a time once the server is serving"""
+    for role, loader in loaders.items():
+        if loader.is_warm:
+            continue
+        try:
+            await asyncio.to_thread(loader.load)
+        except Exception as e:
+            logger.error(f"Background warm-up of {role} failed: {e}")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush shared state before the worker exits"""
+    from app.infrastructure.zynd_client import stop_agent_messaging
+    await app.state.job_queue.stop()
+    if getattr(app.state, "agent_heartbeat", None) is not None:
+        await app.state.agent_heartbeat.stop()
+    await stop_agent_messaging()
+    
+    task_broker = getattr(app.state, "task_broker", None)
+    if hasattr(task_broker, "close"):
+        task_broker.close()
+    
+    warmup_task = getattr(app.state, "warmup_task", None)
+    if warmup_task is not None:
+        warmup_task.cancel()
+    
+    # Closing the session store must not build an advocate that was never used
+    if citizen_advocate is not None and citizen_advocate.is_warm:
+        citizen_advocate.session_store.close()
+        logger.info("✓ Chat session store flushed")
+
+
 @app.get("/")
 async def root():
     return {
@@ -97,28 +229,57 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus text exposition of this worker's metrics"""
+    if not settings.METRICS_ENABLED:
+        return JSONResponse(status_code=404, content={"detail": "Metrics disabled"})
+    from prometheus_client import CONTENT_TYPE_LATEST
+    from app.core.metrics import render_latest
+    return Response(content=render_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness: startup finished and the eagerly loaded agents are warm"""
+    loaders = getattr(app.state, "agent_loaders", {})
+    agents = {role: loader.state() for role, loader in loaders.items()}
+    for role in getattr(app.state, "remote_agents", []):
+        agents[role] = {"state": "remote"}
+    
+    is_ready = getattr(app.state, "startup_complete", False) and all(
+        loaders[role].is_warm for role in _eager_roles() if role in loaders
+    )
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={
+            "ready": is_ready,
+            "agents": agents,
+            "startup": getattr(app.state, "startup_timing", None)
+        }
+    )
+
+
 @app.get("/agents/status")
 async def agents_status():
-    """Get status of all Zynd agents"""
-    try:
-        from app.infrastructure.zynd_client import (
-            get_policy_parser,
-            get_eligibility_verifier,
-            get_benefit_matcher,
-            get_citizen_advocate
-        )
-        
-        return {
-            "policy_parser": get_policy_parser().get_status(),
-            "eligibility_verifier": get_eligibility_verifier().get_status(),
-            "benefit_matcher": get_benefit_matcher().get_status(),
-            "citizen_advocate": get_citizen_advocate().get_status()
-        }
-    except Exception as e:
+    """Get status of all Zynd agents from the heartbeat snapshot"""
+    heartbeat = getattr(app.state, "agent_heartbeat", None)
+    if heartbeat is None:
         return {
-            "error": str(e),
+            "error": "Agent heartbeat not running",
             "message": "Agents not initialized yet"
         }
+    
+    snapshot = heartbeat.snapshot()
+    breakers = breaker_states()
+    return {
+        **snapshot["agents"],
+        "refreshed_at": snapshot["refreshed_at"],
+        "age_seconds": snapshot["age_seconds"],
+        "stale": snapshot["stale"],
+        "circuit_breakers": breakers,
+        "degraded": any(b["state"] != "closed" for b in breakers.values())
+    }
 
 
 if __name__ == "__main__":
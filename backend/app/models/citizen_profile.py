@@ -0,0 +1,285 @@
+"""
+Citizen Profile
+The citizen's details as every agent and route uses them. Payloads arrive as
+free-form dicts ("income": "2.5 lakh", "state": ..., "category": "sc"); the
+lenient adapter normalizes the known fields (age as an int, income per year
+in rupees, enumerated gender, category and occupation) and keeps everything
+else as extra fields. A profile is read-only, renders once for prompts, and
+has a canonical hash that is stable across processes, so it can key caches
+and deduplicate batches. It is a Mapping of its canonical dict, so rules
+evaluation and catalog matching read it like the dicts they always took.
+"""
+import hashlib
+import json
+from collections.abc import Mapping
+from enum import Enum
+from typing import Any, Dict, Iterator, Optional
+
+from pydantic_core import core_schema
+
+from app.services.eligibility_rules import format_inr, parse_amount, parse_exact_amount
+
+
+class Gender(str, Enum):
+    MALE = "male"
+    FEMALE = "female"
+    OTHER = "other"
+
+
+class Category(str, Enum):
+    GENERAL = "General"
+    OBC = "OBC"
+    SC = "SC"
+    ST = "ST"
+    EWS = "EWS"
+
+
+class Occupation(str, Enum):
+    FARMER = "farmer"
+    AGRICULTURAL_LABOURER = "agricultural_labourer"
+    LABOURER = "labourer"
+    CONSTRUCTION_WORKER = "construction_worker"
+    STREET_VENDOR = "street_vendor"
+    ARTISAN = "artisan"
+    WEAVER = "weaver"
+    FISHERMAN = "fisherman"
+    DOMESTIC_WORKER = "domestic_worker"
+    SELF_EMPLOYED = "self_employed"
+    BUSINESS = "business"
+    SALARIED = "salaried"
+    GOVERNMENT_EMPLOYEE = "government_employee"
+    STUDENT = "student"
+    HOMEMAKER = "homemaker"
+    RETIRED = "retired"
+    UNEMPLOYED = "unemployed"
+
+
+# Normalized spelling (lowercase, "_" for spaces and dashes) -> member
+GENDER_ALIASES = {
+    "male": Gender.MALE, "m": Gender.MALE, "man": Gender.MALE, "boy": Gender.MALE, "purush": Gender.MALE,
+    "पुरुष": Gender.MALE, "mr": Gender.MALE, "shri": Gender.MALE,
+    "female": Gender.FEMALE, "f": Gender.FEMALE, "woman": Gender.FEMALE, "girl": Gender.FEMALE,
+    "mahila": Gender.FEMALE, "महिला": Gender.FEMALE, "ms": Gender.FEMALE, "mrs": Gender.FEMALE,
+    "miss": Gender.FEMALE, "smt": Gender.FEMALE, "shrimati": Gender.FEMALE,
+    "other": Gender.OTHER, "transgender": Gender.OTHER, "third_gender": Gender.OTHER,
+}
+CATEGORY_ALIASES = {
+    "general": Category.GENERAL, "gen": Category.GENERAL, "open": Category.GENERAL, "ur": Category.GENERAL,
+    "unreserved": Category.GENERAL,
+    "obc": Category.OBC, "bc": Category.OBC, "other_backward_class": Category.OBC,
+    "other_backward_classes": Category.OBC,
+    "sc": Category.SC, "scheduled_caste": Category.SC, "dalit": Category.SC,
+    "st": Category.ST, "scheduled_tribe": Category.ST, "adivasi": Category.ST, "tribal": Category.ST,
+    "ews": Category.EWS, "economically_weaker_section": Category.EWS,
+}
+OCCUPATION_ALIASES = {
+    "kisan": Occupation.FARMER, "farming": Occupation.FARMER, "agriculture": Occupation.FARMER,
+    "cultivator": Occupation.FARMER, "किसान": Occupation.FARMER,
+    "agricultural_worker": Occupation.AGRICULTURAL_LABOURER, "farm_labourer": Occupation.AGRICULTURAL_LABOURER,
+    "labour": Occupation.LABOURER, "laborer": Occupation.LABOURER, "daily_wage_worker": Occupation.LABOURER,
+    "mazdoor": Occupation.LABOURER, "मजदूर": Occupation.LABOURER,
+    "vendor": Occupation.STREET_VENDOR, "hawker": Occupation.STREET_VENDOR,
+    "craftsman": Occupation.ARTISAN, "fisher": Occupation.FISHERMAN, "fisherwoman": Occupation.FISHERMAN,
+    "maid": Occupation.DOMESTIC_WORKER, "self_employment": Occupation.SELF_EMPLOYED,
+    "entrepreneur": Occupation.BUSINESS, "shopkeeper": Occupation.BUSINESS, "employed": Occupation.SALARIED,
+    "private_job": Occupation.SALARIED, "government_job": Occupation.GOVERNMENT_EMPLOYEE,
+    "housewife": Occupation.HOMEMAKER, "pensioner": Occupation.RETIRED, "none": Occupation.UNEMPLOYED,
+    "jobless": Occupation.UNEMPLOYED,
+}
+OCCUPATION_ALIASES.update({o.value: o for o in Occupation})
+
+# Payload keys read into each typed field, in order of preference
+ANNUAL_INCOME_KEYS = ("annual_income", "income", "family_income", "household_income", "yearly_income")
+MONTHLY_INCOME_KEYS = ("monthly_income",)
+GENDER_KEYS = ("gender", "sex")
+CATEGORY_KEYS = ("category", "caste", "social_category")
+OCCUPATION_KEYS = ("occupation", "profession", "employment", "work")
+STATE_KEYS = ("state", "location", "residence")
+
+# Payload key -> rank among the keys of its field (0 is preferred)
+KEY_PREFERENCE = {
+    key: rank
+    for keys in (("age",), ANNUAL_INCOME_KEYS + MONTHLY_INCOME_KEYS, GENDER_KEYS, CATEGORY_KEYS,
+                 OCCUPATION_KEYS, STATE_KEYS, ("district",))
+    for rank, key in enumerate(keys)
+}
+
+
+def _normalize_key(value: Any) -> str:
+    return "_".join(str(value).strip().lower().replace("-", " ").split())
+
+
+def _enum_value(value: Any, aliases: Dict[str, Enum]) -> Optional[Enum]:
+    key = _normalize_key(value)
+    if key in aliases:
+        return aliases[key]
+    # One plural "s" ("farmers"), never on a short word where it is part of the name ("ms")
+    if len(key) > 3 and key.endswith("s"):
+        return aliases.get(key[:-1])
+    return None
+
+
+def _income_per_year(value: Any, monthly: bool = False) -> Optional[int]:
+    amount = parse_exact_amount(value)
+    if amount is None or amount < 0:
+        return None
+    if monthly or (isinstance(value, str) and "month" in value.lower()):
+        amount *= 12
+    return int(round(amount))
+
+
+class CitizenProfile(Mapping):
+    """A normalized, read-only citizen profile; build one with `coerce` or `from_dict`"""
+    __slots__ = ("age", "annual_income", "gender", "category", "occupation", "state", "district", "extra",
+                 "_data", "_rendered", "_hash")
+
+    def __init__(self, age: Optional[int] = None, annual_income: Optional[int] = None,
+                 gender: Optional[Gender] = None, category: Optional[Category] = None,
+                 occupation: Optional[Occupation] = None, state: Optional[str] = None,
+                 district: Optional[str] = None, extra: Optional[Dict[str, Any]] = None):
+        self.age = age
+        self.annual_income = annual_income
+        self.gender = gender
+        self.category = category
+        self.occupation = occupation
+        self.state = state
+        self.district = district
+        self.extra = extra or {}
+        self._rendered: Optional[str] = None
+        self._hash: Optional[str] = None
+        data = {
+            "age": age,
+            "annual_income": annual_income,
+            "gender": gender.value if gender else None,
+            "category": category.value if category else None,
+            "occupation": occupation.value if occupation else None,
+            "state": state,
+            "district": district,
+        }
+        self._data = {k: v for k, v in data.items() if v is not None}
+        for key, value in self.extra.items():
+            self._data.setdefault(key, value)
+
+    @classmethod
+    def from_dict(cls, payload: Optional[Dict]) -> "CitizenProfile":
+        """
+        Lenient adapter for legacy dict payloads. Values that cannot be
+        normalized (an occupation outside the enum, an income range) are kept
+        as extra fields under their own key rather than dropped. When two keys
+        fill one field ("state" and "location") the one earlier in its *_KEYS
+        tuple wins and the other stays an extra field. An age of 0 is treated
+        as missing, as forms send it for a blank field.
+        """
+        fields: Dict[str, Any] = {}
+        sources: Dict[str, Any] = {}    # field -> (payload key, raw value) it was read from
+        extra: Dict[str, Any] = {}
+        for raw_key, value in (payload or {}).items():
+            if value is None or (isinstance(value, str) and not value.strip()):
+                continue
+            key = _normalize_key(raw_key)
+            field, typed = None, None
+            if key == "age":
+                age = parse_exact_amount(value)
+                field, typed = "age", int(age) if age is not None and 0 < age < 130 else None
+            elif key in ANNUAL_INCOME_KEYS or key in MONTHLY_INCOME_KEYS:
+                field, typed = "annual_income", _income_per_year(value, monthly=key in MONTHLY_INCOME_KEYS)
+            elif key in GENDER_KEYS:
+                field, typed = "gender", _enum_value(value, GENDER_ALIASES)
+            elif key in CATEGORY_KEYS:
+                field, typed = "category", _enum_value(value, CATEGORY_ALIASES)
+            elif key in OCCUPATION_KEYS:
+                field, typed = "occupation", _enum_value(value, OCCUPATION_ALIASES)
+            elif key in STATE_KEYS or key == "district":
+                field = "district" if key == "district" else "state"
+                typed = value.strip() if isinstance(value, str) else None
+
+            if typed is not None and (field not in fields or
+                                      KEY_PREFERENCE[key] < KEY_PREFERENCE[sources[field][0]]):
+                if field in fields:
+                    displaced_key, displaced_value = sources[field]
+                    extra[displaced_key] = displaced_value
+                fields[field] = typed
+                sources[field] = (key, value.strip() if isinstance(value, str) else value)
+            elif key == "age" and typed is None and parse_amount(value) == 0:
+                continue
+            else:
+                extra[key] = value.strip() if isinstance(value, str) else value
+        return cls(extra=extra, **fields)
+
+    @classmethod
+    def coerce(cls, value: Any) -> "CitizenProfile":
+        """A profile from a profile (returned as is), a dict or None"""
+        if isinstance(value, cls):
+            return value
+        if value is None or isinstance(value, Mapping):
+            return cls.from_dict(value)
+        raise ValueError("citizen profile must be an object")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The canonical dict: typed fields first, then extra fields; what is sent between agents"""
+        return dict(self._data)
+
+    def render(self) -> str:
+        """`- key: value` lines for prompts, built once per profile"""
+        if self._rendered is None:
+            lines = []
+            for key, value in self._data.items():
+                if key == "annual_income":
+                    value = f"{format_inr(value)} per year"
+                lines.append(f"- {key}: {value}")
+            self._rendered = "\n".join(lines)
+        return self._rendered
+
+    @property
+    def canonical_hash(self) -> str:
+        """Stable across processes and key order: equal profiles hash alike wherever they are built"""
+        if self._hash is None:
+            canonical = json.dumps(self._data, sort_keys=True, ensure_ascii=False, separators=(",", ":"),
+                                   default=str)
+            self._hash = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        return self._hash
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, CitizenProfile):
+            return self.canonical_hash == other.canonical_hash
+        return isinstance(other, Mapping) and self._data == dict(other)
+
+    def __hash__(self) -> int:
+        return hash(self.canonical_hash)
+
+    def __repr__(self) -> str:
+        return f"CitizenProfile({self._data!r})"
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: Any) -> core_schema.CoreSchema:
+        # Request models accept the legacy dict payloads and serialize back to the canonical dict
+        return core_schema.no_info_plain_validator_function(
+            cls.coerce, serialization=core_schema.plain_serializer_function_ser_schema(lambda p: p.to_dict())
+        )
+
+    @classmethod
+    def __get_pydantic_json_schema__(cls, schema: Any, handler: Any) -> Dict:
+        return {
+            "type": "object",
+            "title": "CitizenProfile",
+            "properties": {
+                "age": {"type": "integer"},
+                "annual_income": {"type": "integer", "description": "rupees per year; income or monthly_income "
+                                                                    "are also accepted"},
+                "gender": {"enum": [g.value for g in Gender]},
+                "category": {"enum": [c.value for c in Category]},
+                "occupation": {"enum": [o.value for o in Occupation]},
+                "state": {"type": "string"},
+                "district": {"type": "string"},
+            },
+            "additionalProperties": True
+        }
@@ -0,0 +1,79 @@
+"""
+LLM Output Models
+The JSON the agents ask the LLM for. The models are sent as a strict JSON
+schema (structured outputs) and every reply is validated against them.
+Optional fields are nullable rather than omitted, as strict schemas require;
+`to_result` drops the nulls so results keep their usual shape.
+"""
+from typing import Dict, List, Literal, Optional, Union
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class LLMOutput(BaseModel):
+    def to_result(self) -> Dict:
+        return self.model_dump(exclude_none=True)
+
+
+class AgeRange(BaseModel):
+    min: Optional[int] = None
+    max: Optional[int] = None
+
+
+class IncomeLimit(BaseModel):
+    max: Optional[Union[int, float]] = None
+    unit: Optional[str] = Field(None, description="annual or monthly")
+
+
+class EligibilityCriteria(BaseModel):
+    # Replies that were not schema constrained may carry other criteria; keep them
+    model_config = ConfigDict(extra="allow")
+
+    age: Optional[AgeRange] = None
+    income: Optional[IncomeLimit] = None
+    location: Optional[List[str]] = Field(None, description="states or districts")
+    occupation: Optional[List[str]] = None
+    gender: Optional[List[str]] = None
+    category: Optional[List[str]] = Field(None, description="social category or caste, e.g. SC, ST, OBC")
+    other: Optional[List[str]] = Field(None, description="additional criteria")
+
+
+class Benefits(BaseModel):
+    type: Optional[str] = Field(None, description="financial/in-kind/service")
+    amount: Optional[Union[int, float, str]] = None
+    description: Optional[str] = None
+
+
+class ParsedScheme(LLMOutput):
+    scheme_name: str
+    department: Optional[str] = None
+    description: Optional[str] = None
+    eligibility_criteria: EligibilityCriteria
+    benefits: Optional[Benefits] = None
+    required_documents: List[str] = []
+    application_process: Optional[str] = None
+    deadline: Optional[str] = None
+
+
+class EligibilityResult(LLMOutput):
+    is_eligible: bool
+    confidence: float = Field(ge=0, le=1)
+    matched_criteria: List[str] = []
+    failed_criteria: List[str] = []
+    explanation: str
+    recommendations: List[str] = []
+
+
+class Recommendation(LLMOutput):
+    scheme_name: str
+    relevance_score: float = Field(ge=0, le=1)
+    why_suitable: str
+    estimated_benefit: Optional[str] = None
+    priority: Literal["high", "medium", "low"]
+    application_process: Optional[str] = None
+
+
+class BenefitRecommendations(LLMOutput):
+    recommendations: List[Recommendation]
+    total_potential_benefit: str
+    summary: str
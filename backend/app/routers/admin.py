@@ -0,0 +1,92 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import FileResponse, PlainTextResponse
+from typing import Optional
+import logging
+import secrets
+from app.config import settings
+from app.core.profiler import ProfileStore, folded_stacks
+
+
+logger = logging.getLogger(__name__)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Guard admin endpoints with the ADMIN_TOKEN shared secret"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=503, detail="Admin API disabled (ADMIN_TOKEN not configured)")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+def _get_answer_cache(req: Request):
+    citizen_advocate = getattr(req.app.state, "citizen_advocate", None)
+    if citizen_advocate is None:
+        raise HTTPException(status_code=503, detail="Agent not initialized")
+    if citizen_advocate.answer_cache is None:
+        raise HTTPException(status_code=404, detail="Semantic cache disabled")
+    return citizen_advocate.answer_cache
+
+
+@router.get("/semantic-cache")
+async def get_semantic_cache(req: Request, include_entries: bool = True):
+    """Inspect semantic answer cache entries and hit-rate metrics"""
+    cache = _get_answer_cache(req)
+    response = {"stats": cache.stats()}
+    if include_entries:
+        response["entries"] = sorted(cache.entries(), key=lambda e: e["hits"], reverse=True)
+    return response
+
+
+@router.delete("/semantic-cache/{entry_id}")
+async def delete_semantic_cache_entry(entry_id: str, req: Request):
+    """Invalidate a single cached answer"""
+    cache = _get_answer_cache(req)
+    if not cache.invalidate(entry_id):
+        raise HTTPException(status_code=404, detail="Cache entry not found")
+    logger.info(f"🗑️  Invalidated semantic cache entry {entry_id}")
+    return {"success": True, "invalidated": 1}
+
+
+@router.delete("/semantic-cache")
+async def clear_semantic_cache(req: Request, match: Optional[str] = None):
+    """Invalidate all cached answers, or only those mentioning `match`"""
+    cache = _get_answer_cache(req)
+    removed = cache.invalidate_matching(match) if match else cache.clear()
+    logger.info(f"🗑️  Invalidated {removed} semantic cache entries")
+    return {"success": True, "invalidated": removed}
+
+
+@router.get("/admission")
+async def get_admission_stats(req: Request):
+    """In-flight, queued and shed request counts per endpoint class"""
+    admission = getattr(req.app.state, "admission", None)
+    if admission is None:
+        raise HTTPException(status_code=404, detail="Admission control disabled")
+    return admission.stats()
+
+
+@router.get("/profiles")
+async def list_profiles():
+    """Saved request profiles, newest first"""
+    return {"profiling_enabled": settings.PROFILING_ENABLED, "profiles": ProfileStore().list()}
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(profile_id: str):
+    """Download a full profile report as JSON"""
+    path = ProfileStore().path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=f"profile-{profile_id}.json")
+
+
+@router.get("/profiles/{profile_id}/folded", response_class=PlainTextResponse)
+async def download_profile_folded(profile_id: str):
+    """Collapsed stacks of a profile, for flamegraph.pl or speedscope"""
+    report = ProfileStore().load(profile_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(folded_stacks(report))
@@ -1,9 +1,26 @@
-from fastapi import APIRouter, HTTPException, Request, UploadFile, File
-from pydantic import BaseModel
-from typing import Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Request, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import AsyncIterator, Dict, List, Optional
+import asyncio
+import json
 import logging
 import io
+import math
+from app.config import settings
+from app.core.circuit_breaker import CircuitOpenError, breaker_states, get_breaker
+from app.core.metrics import PDF_EXTRACTION_DURATION, record_json_parse_failure, record_token_usage, track_llm_call
+from app.core.session_store import validate_session_id
+from app.core.prompt_assembly import AssembledPrompt, PromptAssembler, Section, prompt_budget
+from app.core.tracing import span
+from app.infrastructure.messaging import NoConsumerError
 from app.services.agent_communication import AgentCommunicationService
+from app.services.compiled_catalog import get_catalog
+from app.services.scheme_catalog import format_catalog_for_prompt, match_catalog
+from app.models.citizen_profile import CitizenProfile
+from app.models.llm_outputs import BenefitRecommendations, Recommendation
+from app.utils.json_stream import JsonArrayStreamer
+from app.utils.llm_json import LLMOutputError, parse_llm_output, response_format
 
 
 logger = logging.getLogger(__name__)
@@ -20,39 +37,77 @@ def extract_text_from_file(contents: bytes, filename: str) -> str:
     if name_lower.endswith(".pdf"):
         try:
             from pypdf import PdfReader
-            reader = PdfReader(io.BytesIO(contents))
-            parts = []
-            for page in reader.pages:
-                text = page.extract_text()
-                if text:
-                    parts.append(text)
+            with span("pdf.extract", bytes=len(contents)) as pdf_span, PDF_EXTRACTION_DURATION.time():
+                reader = PdfReader(io.BytesIO(contents))
+                parts = []
+                for page in reader.pages:
+                    text = page.extract_text()
+                    if text:
+                        parts.append(text)
+                if pdf_span is not None:
+                    pdf_span.set_attribute("pages", len(reader.pages))
             return "\n\n".join(parts) if parts else ""
         except Exception as e:
             raise ValueError(f"Could not extract text from PDF: {e}")
     raise ValueError(f"Unsupported file type. Use one of: {', '.join(ALLOWED_EXTENSIONS)}")
 
 
+async def read_upload(file: UploadFile) -> bytes:
+    """Validate an uploaded scheme document and return its raw bytes."""
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No file provided")
+    ext = "." + file.filename.rsplit(".", 1)[-1].lower() if "." in file.filename else ""
+    if ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}",
+        )
+    max_bytes = MAX_FILE_SIZE_MB * 1024 * 1024
+    contents = await file.read()
+    if len(contents) > max_bytes:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File too large. Maximum size: {MAX_FILE_SIZE_MB} MB",
+        )
+    return contents
+
+
 router = APIRouter(prefix="/api", tags=["agents"])
 
 
+def _require_agent(role: str):
+    """503 unless the agent runs in this process or on a task worker"""
+    if not AgentCommunicationService.executor().is_available(role):
+        raise HTTPException(status_code=503, detail="Agent not initialized")
+
+
+def _unavailable(error: Exception) -> HTTPException:
+    """503 for an agent with no worker or an open circuit, with a Retry-After hint"""
+    retry_after = math.ceil(error.retry_in) if isinstance(error, CircuitOpenError) else 5
+    return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": str(max(1, retry_after))})
+
+
 # Request/Response models
 class ParseSchemeRequest(BaseModel):
     document_text: str
+    scheme_id: Optional[str] = None  # revision-aware: diff against the stored version and re-parse changed sections
 
 
 class VerifyEligibilityRequest(BaseModel):
-    citizen_profile: Dict
+    citizen_profile: CitizenProfile
     scheme_criteria: Dict
 
 
 class FindBenefitsRequest(BaseModel):
-    citizen_profile: Dict
+    citizen_profile: CitizenProfile
     available_schemes: List[Dict]
+    stream: bool = False  # send each recommendation as a server-sent event as soon as it is generated
 
 
 class ChatRequest(BaseModel):
     message: str
     context: Optional[Dict] = None
+    session_id: Optional[str] = None
 
 
 # Endpoints
@@ -60,42 +115,28 @@ class ChatRequest(BaseModel):
 async def parse_scheme(request: ParseSchemeRequest, req: Request):
     """Parse a government scheme document"""
     logger.info(f"📥 Received parse-scheme request ({len(request.document_text)} chars)")
+    _require_agent("policy_parser")
     try:
-        policy_parser = req.app.state.policy_parser
-        
-        if policy_parser is None:
-            logger.error("Policy parser agent not initialized")
-            raise HTTPException(status_code=503, detail="Agent not initialized")
-        
-        result = policy_parser.parse_scheme_document(request.document_text)
+        result = await AgentCommunicationService.call_agent("parse_scheme", {
+            "document": request.document_text,
+            "scheme_id": request.scheme_id
+        })
         logger.info(f"📤 Returning parse-scheme response")
         return {
             "success": True,
             "data": result
         }
+    except (NoConsumerError, CircuitOpenError) as e:
+        raise _unavailable(e)
     except Exception as e:
         logger.error(f"❌ Error parsing scheme: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/parse-scheme-file")
-async def parse_scheme_file(req: Request, file: UploadFile = File(...)):
+async def parse_scheme_file(req: Request, file: UploadFile = File(...), scheme_id: Optional[str] = Form(None)):
     """Parse a government scheme document from an uploaded file (PDF or TXT)."""
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="No file provided")
-    ext = "." + file.filename.rsplit(".", 1)[-1].lower() if "." in file.filename else ""
-    if ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Unsupported file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}",
-        )
-    max_bytes = MAX_FILE_SIZE_MB * 1024 * 1024
-    contents = await file.read()
-    if len(contents) > max_bytes:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size: {MAX_FILE_SIZE_MB} MB",
-        )
+    contents = await read_upload(file)
     try:
         document_text = extract_text_from_file(contents, file.filename)
     except ValueError as e:
@@ -103,13 +144,16 @@ async def parse_scheme_file(req: Request, file: UploadFile = File(...)):
     if not document_text.strip():
         raise HTTPException(status_code=400, detail="No text could be extracted from the file")
     logger.info(f"📥 Received parse-scheme-file '{file.filename}' ({len(document_text)} chars extracted)")
+    _require_agent("policy_parser")
     try:
-        policy_parser = req.app.state.policy_parser
-        if policy_parser is None:
-            raise HTTPException(status_code=503, detail="Agent not initialized")
-        result = policy_parser.parse_scheme_document(document_text)
+        result = await AgentCommunicationService.call_agent("parse_scheme", {
+            "document": document_text,
+            "scheme_id": scheme_id
+        })
         logger.info("📤 Returning parse-scheme-file response")
         return {"success": True, "data": result, "extracted_length": len(document_text)}
+    except (NoConsumerError, CircuitOpenError) as e:
+        raise _unavailable(e)
     except Exception as e:
         logger.error(f"❌ Error parsing scheme from file: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -118,229 +162,42 @@ async def parse_scheme_file(req: Request, file: UploadFile = File(...)):
 @router.post("/verify-eligibility")
 async def verify_eligibility(request: VerifyEligibilityRequest, req: Request):
     """Verify citizen eligibility for a scheme"""
+    _require_agent("eligibility_verifier")
     try:
-        eligibility_verifier = req.app.state.eligibility_verifier
-        
-        if eligibility_verifier is None:
-            raise HTTPException(status_code=503, detail="Agent not initialized")
-        
-        result = eligibility_verifier.verify_eligibility(
-            request.citizen_profile,
-            request.scheme_criteria
-        )
+        result = await AgentCommunicationService.call_agent("verify_eligibility", {
+            "citizen_profile": request.citizen_profile.to_dict(),
+            "scheme_criteria": request.scheme_criteria
+        })
         return {
             "success": True,
             "data": result
         }
+    except (NoConsumerError, CircuitOpenError) as e:
+        raise _unavailable(e)
     except Exception as e:
         logger.error(f"Error verifying eligibility: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/find-benefits")
-async def find_benefits(request: FindBenefitsRequest, req: Request):
-    """Find matching benefits for a citizen using OpenAI to match with real Indian government schemes"""
-    try:
-        import openai
-        import os
-        import json
-        
-        # Get OpenAI API key from environment
-        openai_api_key = os.getenv("OPENAI_API_KEY")
-        if not openai_api_key:
-            raise HTTPException(status_code=503, detail="OpenAI API key not configured")
-        
-        # Real Indian Government Schemes Database
-        real_indian_schemes = [
-            {
-                "scheme_name": "PM-KISAN (Pradhan Mantri Kisan Samman Nidhi)",
-                "department": "Ministry of Agriculture & Farmers Welfare",
-                "benefits": "₹6,000 per year in 3 installments",
-                "eligibility": "Small and marginal farmers with cultivable land up to 2 hectares",
-                "target_group": "Farmers, Agricultural workers",
-                "age_limit": "No age limit",
-                "income_limit": "No income limit for farmers",
-                "documents": "Land records, Aadhaar card, Bank account"
-            },
-            {
-                "scheme_name": "Ayushman Bharat - PM-JAY",
-                "department": "Ministry of Health and Family Welfare",
-                "benefits": "Health insurance coverage up to ₹5 lakh per family per year",
-                "eligibility": "Families identified through SECC 2011 data, economically vulnerable",
-                "target_group": "Poor and vulnerable families",
-                "age_limit": "No age limit",
-                "income_limit": "Based on SECC deprivation criteria",
-                "documents": "Aadhaar card, Ration card, SECC verification"
-            },
-            {
-                "scheme_name": "PM Mudra Yojana",
-                "department": "Ministry of Finance",
-                "benefits": "Loans up to ₹10 lakh for micro-enterprises",
-                "eligibility": "Small business owners, entrepreneurs, self-employed",
-                "target_group": "Entrepreneurs, Small businesses",
-                "age_limit": "18 years and above",
-                "income_limit": "For income-generating activities",
-                "documents": "Business plan, Identity proof, Address proof, Bank account"
-            },
-            {
-                "scheme_name": "National Scholarship Portal (NSP)",
-                "department": "Ministry of Education",
-                "benefits": "₹10,000 to ₹1,00,000 per year depending on category and course",
-                "eligibility": "Students from SC/ST/OBC/Minority communities, merit-based",
-                "target_group": "Students pursuing higher education",
-                "age_limit": "Varies by scholarship (typically under 30)",
-                "income_limit": "Family income below ₹2.5 lakh to ₹8 lakh (varies)",
-                "documents": "Educational certificates, Income certificate, Caste certificate, Bank account"
-            },
-            {
-                "scheme_name": "PM Awas Yojana (Urban & Rural)",
-                "department": "Ministry of Housing and Urban Affairs",
-                "benefits": "Subsidy on home loans, direct assistance for house construction (₹1.5-2.5 lakh)",
-                "eligibility": "Economically Weaker Section (EWS), Low Income Group (LIG), homeless",
-                "target_group": "Poor families, First-time homebuyers",
-                "age_limit": "21-70 years for credit-linked subsidy",
-                "income_limit": "EWS: up to ₹3 lakh/year, LIG: ₹3-6 lakh/year, MIG: ₹6-18 lakh/year",
-                "documents": "Income certificate, Identity proof, Property documents, Bank account"
-            },
-            {
-                "scheme_name": "Beti Bachao Beti Padhao",
-                "department": "Ministry of Women and Child Development",
-                "benefits": "Sukanya Samriddhi Account with attractive interest rates, girl child welfare",
-                "eligibility": "Girl child under 10 years of age",
-                "target_group": "Girl children and their parents",
-                "age_limit": "Account for girls below 10 years",
-                "income_limit": "No income limit",
-                "documents": "Birth certificate of girl child, Parents' identity and address proof"
-            },
-            {
-                "scheme_name": "PM Vishwakarma Yojana",
-                "department": "Ministry of Micro, Small & Medium Enterprises",
-                "benefits": "₹10,000-15,000 toolkit incentive, skill training, collateral-free loans up to ₹3 lakh",
-                "eligibility": "Traditional artisans and craftspeople (carpenters, goldsmiths, blacksmiths, etc.)",
-                "target_group": "Artisans, Craftspeople, Traditional workers",
-                "age_limit": "18 years and above",
-                "income_limit": "No specific limit for traditional workers",
-                "documents": "Identity proof, Proof of traditional work, Bank account"
-            },
-            {
-                "scheme_name": "National Pension Scheme (NPS) - APY",
-                "department": "Pension Fund Regulatory and Development Authority",
-                "benefits": "Guaranteed pension of ₹1,000-5,000 per month after 60 years",
-                "eligibility": "Indian citizens aged 18-40 years, unorganized sector workers",
-                "target_group": "Unorganized sector workers, Self-employed",
-                "age_limit": "18-40 years at enrollment",
-                "income_limit": "Primarily for those not covered under statutory social security",
-                "documents": "Aadhaar card, Mobile number, Bank account"
-            },
-            {
-                "scheme_name": "PM Kaushal Vikas Yojana (PMKVY)",
-                "department": "Ministry of Skill Development and Entrepreneurship",
-                "benefits": "Free skill training, ₹8,000 average reward on certification",
-                "eligibility": "Youth seeking employment, school/college dropouts",
-                "target_group": "Youth (15-45 years), Job seekers",
-                "age_limit": "Primarily 15-45 years",
-                "income_limit": "No specific limit",
-                "documents": "Aadhaar card, Educational certificates, Bank account"
-            },
-            {
-                "scheme_name": "Mahatma Gandhi National Rural Employment Guarantee Act (MGNREGA)",
-                "department": "Ministry of Rural Development",
-                "benefits": "100 days of guaranteed wage employment per year, ₹200-300 per day",
-                "eligibility": "Adult members of rural households willing to do unskilled manual work",
-                "target_group": "Rural households, Unemployed rural workers",
-                "age_limit": "18 years and above",
-                "income_limit": "No income limit",
-                "documents": "Job card, Aadhaar card, Bank account"
-            },
-            {
-                "scheme_name": "PM Ujjwala Yojana",
-                "department": "Ministry of Petroleum and Natural Gas",
-                "benefits": "Free LPG connection with ₹1,600 assistance",
-                "eligibility": "Women from BPL households, SECC 2011 beneficiaries",
-                "target_group": "BPL women, Poor households",
-                "age_limit": "Adult women (18+)",
-                "income_limit": "BPL families",
-                "documents": "BPL ration card, Aadhaar card, Address proof, Bank account"
-            },
-            {
-                "scheme_name": "PM Fasal Bima Yojana",
-                "department": "Ministry of Agriculture & Farmers Welfare",
-                "benefits": "Crop insurance - compensation for crop loss/damage",
-                "eligibility": "Farmers - owner cultivators and tenant farmers",
-                "target_group": "Farmers",
-                "age_limit": "No age limit",
-                "income_limit": "No income limit",
-                "documents": "Land records, Sowing certificate, Aadhaar card, Bank account"
-            },
-            {
-                "scheme_name": "Stand Up India Scheme",
-                "department": "Ministry of Finance",
-                "benefits": "Loans between ₹10 lakh to ₹1 crore for SC/ST/Women entrepreneurs",
-                "eligibility": "SC/ST and women entrepreneurs for greenfield enterprises",
-                "target_group": "SC/ST entrepreneurs, Women entrepreneurs",
-                "age_limit": "18 years and above",
-                "income_limit": "For setting up new enterprises",
-                "documents": "Business plan, Identity proof, Category certificate, Bank account"
-            },
-            {
-                "scheme_name": "PM Matru Vandana Yojana",
-                "department": "Ministry of Women and Child Development",
-                "benefits": "₹5,000 cash incentive for first living child",
-                "eligibility": "Pregnant and lactating women (first child)",
-                "target_group": "Pregnant women, New mothers",
-                "age_limit": "Pregnant women 19 years and above",
-                "income_limit": "All pregnant women except government employees",
-                "documents": "MCP card, Aadhaar card, Bank account, Child birth certificate"
-            },
-            {
-                "scheme_name": "Pradhan Mantri Jeevan Jyoti Bima Yojana (PMJJBY)",
-                "department": "Ministry of Finance",
-                "benefits": "₹2 lakh life insurance cover for ₹436/year premium",
-                "eligibility": "18-50 years age group with savings bank account",
-                "target_group": "Bank account holders",
-                "age_limit": "18-50 years (coverage up to 55)",
-                "income_limit": "No income limit",
-                "documents": "Savings bank account, Aadhaar card, Consent form"
-            }
-        ]
-        
-        # Create comprehensive prompt for OpenAI
-        citizen_info = "\n".join([f"- {key}: {value}" for key, value in request.citizen_profile.items()])
-        
-        schemes_info = ""
-        for idx, scheme in enumerate(real_indian_schemes, 1):
-            schemes_info += f"\n{idx}. {scheme['scheme_name']}\n"
-            schemes_info += f"   Department: {scheme['department']}\n"
-            schemes_info += f"   Benefits: {scheme['benefits']}\n"
-            schemes_info += f"   Eligibility: {scheme['eligibility']}\n"
-            schemes_info += f"   Target Group: {scheme['target_group']}\n"
-            schemes_info += f"   Age Limit: {scheme['age_limit']}\n"
-            schemes_info += f"   Income Limit: {scheme['income_limit']}\n"
-            schemes_info += f"   Documents: {scheme['documents']}\n"
-        
-        prompt = f"""You are an expert advisor for Indian Government welfare schemes. Analyze the citizen's profile and recommend the most suitable schemes from the available options.
-
-Citizen Profile:
-{citizen_info}
+FIND_BENEFITS_SYSTEM_PROMPT = """You are an expert Indian Government welfare schemes advisor. Always respond with valid JSON.
 
-Available Government Schemes:
-{schemes_info}
+Analyze the citizen's profile and recommend the most suitable schemes from the available options below."""
 
-Please analyze the citizen's profile and provide recommendations in the following JSON format:
-{{
+FIND_BENEFITS_OUTPUT_FORMAT = """Provide recommendations in the following JSON format:
+{
     "recommendations": [
-        {{
+        {
             "scheme_name": "Full scheme name",
             "relevance_score": 0.95,
             "why_suitable": "Detailed explanation of why this scheme is suitable for this citizen",
             "estimated_benefit": "Specific benefit amount or description",
             "priority": "high/medium/low",
             "application_process": "Brief steps to apply"
-        }}
+        }
     ],
     "total_potential_benefit": "Estimated total monetary benefit",
     "summary": "Overall recommendation summary highlighting top 2-3 schemes"
-}}
+}
 
 Rules:
 1. Only recommend schemes where the citizen genuinely matches the eligibility criteria
@@ -351,38 +208,175 @@ Rules:
 6. If citizen is a farmer, prioritize agricultural schemes
 7. If citizen has low income, prioritize welfare and subsidy schemes
 8. If citizen is a student, prioritize education schemes
-9. If citizen is an entrepreneur, prioritize business loan schemes
-"""
+9. If citizen is an entrepreneur, prioritize business loan schemes"""
+
+_find_benefits_assembler: Optional[PromptAssembler] = None
+
+
+def compile_find_benefits_prompt(schemes: List[Dict]) -> PromptAssembler:
+    """Instructions, `schemes` and the output format as one static system prefix"""
+    return PromptAssembler(
+        "find_benefits",
+        FIND_BENEFITS_SYSTEM_PROMPT,
+        prompt_budget("find_benefits"),
+        static_blocks=[f"Available Government Schemes:\n{format_catalog_for_prompt(schemes)}",
+                       FIND_BENEFITS_OUTPUT_FORMAT]
+    )
+
+
+def build_find_benefits_prompt(citizen_profile: CitizenProfile,
+                               assembler: Optional[PromptAssembler] = None) -> AssembledPrompt:
+    """Messages asking the LLM to rank the catalog for the citizen, as JSON; only the profile varies (dicts are coerced)"""
+    global _find_benefits_assembler
+    if assembler is None:
+        if _find_benefits_assembler is None:
+            _find_benefits_assembler = compile_find_benefits_prompt(get_catalog())
+        assembler = _find_benefits_assembler
+    return assembler.assemble([
+        Section("citizen", CitizenProfile.coerce(citizen_profile).render(), required=True, header="Citizen Profile:"),
+        Section("instructions", "Analyze this citizen's profile and recommend schemes in the specified JSON format.")
+    ])
+
+
+FIND_BENEFITS_PARSE_ERROR = {
+    "success": False,
+    "error": "Failed to parse AI response",
+    "data": {
+        "recommendations": [],
+        "summary": "Error processing recommendations. Please try again.",
+        "total_potential_benefit": "0"
+    }
+}
+
+
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_find_benefits(client, completion_args: Dict, citizen_profile: CitizenProfile) -> AsyncIterator[str]:
+    """
+    Server-sent events for /find-benefits with `stream`: a `recommendation`
+    event per item as soon as the LLM has written it, then `done` carrying the
+    same payload as the non-streaming response.
+    """
+    def open_stream():
+        with span("llm.connect", agent="find_benefits"):
+            return client.chat.completions.create(**completion_args, stream=True,
+                                                  stream_options={"include_usage": True})
+    
+    try:
+        stream = await asyncio.to_thread(get_breaker("llm:find_benefits").call, open_stream)
+    except Exception as e:
+        logger.warning(f"⚠️ OpenAI unavailable, matching from catalog: {e}")
+        fallback = match_catalog(citizen_profile, get_catalog())
+        for recommendation in fallback["recommendations"]:
+            yield _sse("recommendation", recommendation)
+        yield _sse("done", {"success": True, "data": fallback, "degraded": True})
+        return
+    
+    streamer = JsonArrayStreamer("recommendations")
+    chunks = iter(stream)
+    try:
+        with span("llm", agent="find_benefits", stream=True) as llm_span, track_llm_call("find_benefits"):
+            sent = 0
+            while True:
+                # The OpenAI client blocks, so each chunk is read off the event loop
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                if chunk.usage is not None:
+                    record_token_usage("find_benefits", chunk.model, chunk.usage.prompt_tokens,
+                                       chunk.usage.completion_tokens)
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                for item in streamer.feed(delta):
+                    try:
+                        recommendation = Recommendation.model_validate(item).to_result()
+                    except ValidationError as e:
+                        record_json_parse_failure("find_benefits")
+                        logger.warning(f"Skipping invalid streamed recommendation: {e.errors()[0]['msg']}")
+                        continue
+                    sent += 1
+                    if sent == 1 and llm_span is not None:
+                        llm_span.set_attribute("llm.first_item_ms", round(llm_span.duration_ms, 1))
+                    yield _sse("recommendation", recommendation)
+    except Exception as e:
+        logger.error(f"Benefit stream failed: {e}")
+        yield _sse("error", {"detail": str(e)})
+        return
+    
+    try:
+        with span("json.parse"):
+            result = parse_llm_output(streamer.text, BenefitRecommendations)
+    except LLMOutputError as e:
+        record_json_parse_failure("find_benefits")
+        logger.error(f"Failed to parse streamed OpenAI response: {e}")
+        yield _sse("done", FIND_BENEFITS_PARSE_ERROR)
+        return
+    logger.info(f"✓ OpenAI streamed {len(result['recommendations'])} recommendations")
+    yield _sse("done", {"success": True, "data": result})
+
+
+@router.post("/find-benefits")
+async def find_benefits(request: FindBenefitsRequest, req: Request):
+    """Find matching benefits for a citizen using OpenAI to match with real Indian government schemes"""
+    try:
+        import os
+        
+        # Get OpenAI API key from environment
+        openai_api_key = os.getenv("OPENAI_API_KEY")
+        if not openai_api_key:
+            raise HTTPException(status_code=503, detail="OpenAI API key not configured")
+        
+        # Create comprehensive prompt for OpenAI
+        with span("prompt.build") as build_span:
+            prompt = build_find_benefits_prompt(request.citizen_profile)
+            if build_span is not None:
+                build_span.attributes.update({"prompt.tokens": prompt.tokens, "prompt.budget": prompt.budget})
         
         # Call OpenAI API
         from openai import OpenAI
-        client = OpenAI(api_key=openai_api_key)
+        client = OpenAI(api_key=openai_api_key, base_url=settings.OPENAI_BASE_URL, timeout=settings.LLM_TIMEOUT_SECONDS,
+                        max_retries=settings.LLM_MAX_RETRIES)
         
-        logger.info(f"Calling OpenAI for benefit matching with {len(real_indian_schemes)} schemes")
+        logger.info(f"Calling OpenAI for benefit matching with {len(get_catalog())} schemes")
         
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are an expert Indian Government welfare schemes advisor. Always respond with valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=2000
-        )
+        completion_args = {
+            "model": "gpt-4o-mini",
+            "messages": prompt.messages(),
+            "temperature": 0.3,
+            "max_tokens": 2000
+        }
+        if settings.LLM_STRUCTURED_OUTPUT:
+            completion_args["response_format"] = response_format(BenefitRecommendations)
         
-        # Parse response
-        ai_response = response.choices[0].message.content.strip()
+        if request.stream:
+            return StreamingResponse(stream_find_benefits(client, completion_args, request.citizen_profile),
+                                     media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
         
-        # Remove markdown code blocks if present
-        if ai_response.startswith("```json"):
-            ai_response = ai_response[7:]
-        if ai_response.startswith("```"):
-            ai_response = ai_response[3:]
-        if ai_response.endswith("```"):
-            ai_response = ai_response[:-3]
-        ai_response = ai_response.strip()
+        def create_completion():
+            with span("llm", agent="find_benefits"), track_llm_call("find_benefits"):
+                return client.chat.completions.create(**completion_args)
         
-        result = json.loads(ai_response)
+        try:
+            response = await asyncio.to_thread(get_breaker("llm:find_benefits").call, create_completion)
+        except Exception as e:
+            # LLM down or circuit open: rank the catalog by profile keywords instead
+            logger.warning(f"⚠️ OpenAI unavailable, matching from catalog: {e}")
+            return {
+                "success": True,
+                "data": match_catalog(request.citizen_profile, get_catalog()),
+                "degraded": True
+            }
+        
+        if response.usage is not None:
+            record_token_usage("find_benefits", response.model, response.usage.prompt_tokens,
+                               response.usage.completion_tokens)
+        
+        # Parse response, removing markdown code blocks if present, and validate it
+        with span("json.parse"):
+            result = parse_llm_output(response.choices[0].message.content, BenefitRecommendations)
         
         logger.info(f"✓ OpenAI returned {len(result.get('recommendations', []))} recommendations")
         
@@ -391,17 +385,10 @@ Rules:
             "data": result
         }
         
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse OpenAI response as JSON: {e}")
-        return {
-            "success": False,
-            "error": "Failed to parse AI response",
-            "data": {
-                "recommendations": [],
-                "summary": "Error processing recommendations. Please try again.",
-                "total_potential_benefit": "0"
-            }
-        }
+    except LLMOutputError as e:
+        record_json_parse_failure("find_benefits")
+        logger.error(f"Failed to parse OpenAI response: {e}")
+        return FIND_BENEFITS_PARSE_ERROR
     except Exception as e:
         logger.error(f"Error finding benefits: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -410,20 +397,26 @@ Rules:
 @router.post("/chat")
 async def chat_with_agent(request: ChatRequest, req: Request):
     """Chat with the Citizen Advocate Agent"""
+    _require_agent("citizen_advocate")
+    if request.session_id is not None:
+        try:
+            validate_session_id(request.session_id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     try:
-        citizen_advocate = req.app.state.citizen_advocate
-        
-        if citizen_advocate is None:
-            raise HTTPException(status_code=503, detail="Agent not initialized")
-        
-        response = citizen_advocate.chat(
-            request.message,
-            context=request.context
-        )
+        result = await AgentCommunicationService.call_agent("respond", {
+            "message": request.message,
+            "context": request.context,
+            "session_id": request.session_id
+        })
         return {
             "success": True,
-            "response": response
+            "response": result["response"],
+            "session_id": request.session_id,
+            "metadata": result["metadata"]
         }
+    except (NoConsumerError, CircuitOpenError) as e:
+        raise _unavailable(e)
     except Exception as e:
         logger.error(f"Error in chat: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -433,23 +426,29 @@ async def chat_with_agent(request: ChatRequest, req: Request):
 async def get_agents_status(req: Request):
     """Get status of all Zynd agents and their communication network"""
     try:
-        # Get individual agent status
-        individual_status = {
-            "policy_parser": req.app.state.policy_parser.get_status() if hasattr(req.app.state, 'policy_parser') else None,
-            "eligibility_verifier": req.app.state.eligibility_verifier.get_status() if hasattr(req.app.state, 'eligibility_verifier') else None,
-            "benefit_matcher": req.app.state.benefit_matcher.get_status() if hasattr(req.app.state, 'benefit_matcher') else None,
-            "citizen_advocate": req.app.state.citizen_advocate.get_status() if hasattr(req.app.state, 'citizen_advocate') else None
-        }
+        heartbeat = getattr(req.app.state, "agent_heartbeat", None)
+        if heartbeat is None:
+            raise HTTPException(status_code=503, detail="Agents not initialized yet")
         
-        # Get network communication status
-        network_status = AgentCommunicationService.get_agent_network_status()
+        # Served from the heartbeat snapshot, not from live registry calls
+        snapshot = heartbeat.snapshot()
+        individual_status = snapshot["agents"]
+        network_status = AgentCommunicationService.get_agent_network_status(individual_status)
+        breakers = breaker_states()
         
         return {
             "agents": individual_status,
             "network": network_status,
             "total_agents": 4,
-            "all_connected": all(status is not None for status in individual_status.values())
+            "all_connected": all(status.get("is_connected") for status in individual_status.values()),
+            "refreshed_at": snapshot["refreshed_at"],
+            "age_seconds": snapshot["age_seconds"],
+            "stale": snapshot["stale"],
+            "circuit_breakers": breakers,
+            "degraded": any(b["state"] != "closed" for b in breakers.values())
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -462,7 +461,7 @@ async def test_agent_communication(req: Request):
         logger.info("🧪 Testing agent-to-agent communication...")
         
         # Run a test workflow involving all agents
-        result = AgentCommunicationService.full_application_workflow(
+        result = await AgentCommunicationService.full_application_workflow(
             document_text="Sample government scheme for housing assistance",
             citizen_profile={"age": 35, "income": 50000, "location": "urban"}
         )
@@ -470,9 +469,10 @@ async def test_agent_communication(req: Request):
         logger.info("✓ Communication test completed")
         
         return {
-            "success": True,
+            "success": result["status"] == "completed",
             "test_result": result,
-            "message": "All 4 agents communicated successfully!"
+            "message": "All 4 agents communicated successfully!" if result["status"] == "completed"
+                       else f"Workflow {result['status']}, see test_result for per-stage errors"
         }
     except Exception as e:
         logger.error(f"Communication test failed: {e}")
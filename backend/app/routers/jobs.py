@@ -0,0 +1,180 @@
+"""
+Background job endpoints: submit long parses and workflows, poll or stream
+their progress, and cancel them. With the SQLite job store, status, events and
+cancel requests are answered by any worker, not only the one running the job.
+"""
+import asyncio
+import json
+import logging
+from typing import Dict, List, Optional, Union
+
+from fastapi import APIRouter, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.models.citizen_profile import CitizenProfile
+from app.routers.agents import extract_text_from_file, read_upload
+from app.services.agent_communication import AgentCommunicationService
+from app.config import settings
+from app.services.job_queue import PRIORITIES, TERMINAL_STATES, Job, JobQueue, QueueFullError
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+WORKFLOWS = {
+    "full-application": AgentCommunicationService.full_application_workflow,
+    "parse-and-verify": AgentCommunicationService.parse_and_verify_eligibility,
+    "find-and-recommend": AgentCommunicationService.find_and_recommend_benefits,
+}
+
+
+class WorkflowJobRequest(BaseModel):
+    citizen_profile: CitizenProfile
+    document_text: Union[str, List[str], None] = None
+
+
+def _queue(req: Request) -> JobQueue:
+    queue = getattr(req.app.state, "job_queue", None)
+    if queue is None:
+        raise HTTPException(status_code=503, detail="Job queue not running")
+    return queue
+
+
+def _submit(queue: JobQueue, kind: str, func, priority: str, params: Dict) -> Dict:
+    try:
+        job = queue.submit(kind, func, priority=priority, params=params)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"success": True, "job_id": job.id, "status": job.status,
+            "status_url": f"/api/jobs/{job.id}", "events_url": f"/api/jobs/{job.id}/events"}
+
+
+def _view_job(queue: JobQueue, job_id: str) -> Dict:
+    data = queue.view(job_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return data
+
+
+def _sse(name: str, data: Dict) -> str:
+    return f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/parse-scheme-file", status_code=202)
+async def submit_parse_scheme_file(req: Request, priority: str = "normal", file: UploadFile = File(...),
+                                   scheme_id: Optional[str] = Form(None)):
+    """Queue a scheme document upload for parsing; returns a job id immediately"""
+    queue = _queue(req)
+    contents = await read_upload(file)
+    filename = file.filename
+
+    async def run(job: Job):
+        document_text = await asyncio.to_thread(extract_text_from_file, contents, filename)
+        if not document_text.strip():
+            raise ValueError("No text could be extracted from the file")
+        job.report({"event": "text_extracted", "extracted_length": len(document_text)})
+        result = await AgentCommunicationService.call_agent("parse_scheme", {
+            "document": document_text,
+            "scheme_id": scheme_id
+        })
+        return {"data": result, "extracted_length": len(document_text)}
+
+    return _submit(queue, "parse_scheme_file", run, priority,
+                   {"filename": filename, "size_bytes": len(contents), "scheme_id": scheme_id})
+
+
+@router.post("/workflows/{workflow}", status_code=202)
+async def submit_workflow(workflow: str, request: WorkflowJobRequest, req: Request, priority: str = "normal"):
+    """Queue a multi-agent workflow; stage progress is available as job events"""
+    queue = _queue(req)
+    if workflow not in WORKFLOWS:
+        raise HTTPException(status_code=404, detail=f"Unknown workflow. Use one of: {', '.join(WORKFLOWS)}")
+    if workflow != "find-and-recommend" and not request.document_text:
+        raise HTTPException(status_code=400, detail="document_text is required for this workflow")
+
+    async def run(job: Job):
+        if workflow == "find-and-recommend":
+            return await WORKFLOWS[workflow](request.citizen_profile.to_dict(), on_progress=job.report)
+        return await WORKFLOWS[workflow](request.document_text, request.citizen_profile.to_dict(),
+                                         on_progress=job.report)
+
+    documents = request.document_text if isinstance(request.document_text, list) else [request.document_text]
+    return _submit(queue, workflow, run, priority,
+                   {"documents": len([d for d in documents if d])})
+
+
+@router.get("")
+async def job_queue_stats(req: Request):
+    return {"priorities": list(PRIORITIES), **_queue(req).stats()}
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, req: Request):
+    return _view_job(_queue(req), job_id)
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str, req: Request):
+    """Server-sent events: past events are replayed, then new ones stream until the job ends"""
+    queue = _queue(req)
+    _view_job(queue, job_id)
+    job = queue.get(job_id)
+
+    async def events():
+        # Subscribing and snapshotting happen without yielding, so no event is missed or repeated
+        subscription = queue.subscribe(job_id)
+        try:
+            for event in list(job.events):
+                yield _sse("progress", event)
+            finished = job.status in TERMINAL_STATES
+            while not finished:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                finished = event["job_status"] in TERMINAL_STATES
+                yield _sse("progress", event)
+            yield _sse("done", job.to_dict())
+        finally:
+            queue.unsubscribe(job_id, subscription)
+
+    async def stored_events():
+        # The job runs in another worker: follow its events in the shared job store
+        seq, finished, idle = -1, False, 0.0
+        while not finished:
+            new = await asyncio.to_thread(queue.events, job_id, seq)
+            for event in new:
+                finished = finished or event["job_status"] in TERMINAL_STATES
+                yield _sse("progress", event)
+            seq += len(new)
+            if new:
+                idle = 0.0
+            elif not finished:
+                if idle >= 15:
+                    yield ": keep-alive\n\n"
+                    idle = 0.0
+                await asyncio.sleep(settings.JOB_STORE_POLL_INTERVAL)
+                idle += settings.JOB_STORE_POLL_INTERVAL
+        yield _sse("done", await asyncio.to_thread(queue.view, job_id) or {"job_id": job_id})
+
+    return StreamingResponse(events() if job is not None else stored_events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str, req: Request):
+    """
+    Cancel a job. A queued job is cancelled at once; for a running job, or one
+    run by another worker, the status is "cancel_requested" until it stops.
+    """
+    queue = _queue(req)
+    data = _view_job(queue, job_id)
+    status = queue.cancel(job_id)
+    if status is None:
+        data = queue.view(job_id) or data
+        raise HTTPException(status_code=409, detail=f"Job already {data['status']}")
+    return {"success": True, "job_id": job_id, "status": status}
@@ -1,187 +1,227 @@
 """
 Agent-to-Agent Communication Service
-Enables direct communication between agents via MQTT
+Runs multi-agent workflows: agents in this process are called directly,
+agents on the Zynd network are called via MQTT
 """
-import json
+import asyncio
 import logging
-from typing import Dict, List, Optional
-from app.infrastructure.zynd_client import (
-    get_policy_parser,
-    get_eligibility_verifier,
-    get_benefit_matcher,
-    get_citizen_advocate
-)
+from typing import Any, Callable, Dict, List, Optional, Union
+from app.infrastructure.zynd_client import get_all_clients
+from app.services.agent_tasks import serve_agent_requests
+from app.services.scheme_catalog import SCHEME_CATALOG
+from app.services.workflow_engine import AgentExecutor, Stage, WorkflowEngine
 
 logger = logging.getLogger(__name__)
 
+AGENT_DISPLAY_NAMES = {
+    "policy_parser": "Policy Parser",
+    "eligibility_verifier": "Eligibility Verifier",
+    "benefit_matcher": "Benefit Matcher",
+    "citizen_advocate": "Citizen Advocate"
+}
+
+ADVICE_MESSAGE = ("Based on my eligibility results and the recommended schemes, explain which schemes "
+                  "I should apply for first and what I should do next.")
+
+
 class AgentCommunicationService:
     """Service for facilitating agent-to-agent communication"""
-    
+
+    # Agent instances living in this process, registered at startup
+    local_agents: Dict[str, Any] = {}
+
+    # Loops answering requests that reach this process's agents over the Zynd network
+    _servers: List[asyncio.Task] = []
+
+    @classmethod
+    def register_local_agents(cls, agents: Dict[str, Any]):
+        """Call `agents` in-process, and serve them to other agents when their client is on the network"""
+        cls.local_agents = dict(agents)
+        for task in cls._servers:
+            task.cancel()
+        cls._servers = [
+            asyncio.create_task(serve_agent_requests(client.messenger, cls.local_agents))
+            for role, client in get_all_clients().items()
+            if client is not None and not client.simulation_mode and cls.local_agents.get(role) is not None
+        ]
+
+    @classmethod
+    def executor(cls) -> AgentExecutor:
+        return AgentExecutor(cls.local_agents, get_all_clients())
+
+    @classmethod
+    async def call_agent(cls, action: str, payload: Dict) -> Any:
+        """Run a single agent action wherever that agent is served"""
+        return await cls.executor().call(action, payload)
+
+    @classmethod
+    def _engine(cls, on_progress: Optional[Callable[[Dict], None]] = None) -> WorkflowEngine:
+        return WorkflowEngine(cls.executor(), on_progress=on_progress)
+
+    @staticmethod
+    def _parse_and_verify_stages(documents: List[str], citizen_profile: Dict, executor_call) -> List[Stage]:
+        """One parse stage and one dependent verify stage per document"""
+        stages = []
+        for i, document in enumerate(documents, 1):
+            async def parse(outputs, document=document):
+                return await executor_call("parse_scheme", {"document": document})
+
+            async def verify(outputs, i=i):
+                scheme = outputs[f"parse_{i}"]
+                if scheme.get("error"):
+                    raise RuntimeError(f"Document {i} could not be parsed: {scheme['error']}")
+                result = await executor_call("verify_eligibility", {
+                    "citizen_profile": citizen_profile,
+                    "scheme_criteria": scheme.get("eligibility_criteria", {})
+                })
+                result["scheme_name"] = scheme.get("scheme_name", "Unknown")
+                return result
+
+            stages.append(Stage(f"parse_{i}", "policy_parser", parse))
+            stages.append(Stage(f"verify_{i}", "eligibility_verifier", verify, depends_on=[f"parse_{i}"]))
+        return stages
+
     @staticmethod
-    def parse_and_verify_eligibility(document_text: str, citizen_profile: Dict) -> Dict:
+    def _summarize(result: Dict, agents_involved: List[str]) -> Dict:
+        """Add the fields callers of the old hard-coded workflows relied on"""
+        stages = result["stages"]
+        modes = {stage["mode"] for stage in stages.values()}
+        result["agents_involved"] = agents_involved
+        result["communication_method"] = modes.pop() if len(modes) == 1 else "mixed"
+        result["steps"] = [
+            {
+                "stage": name,
+                "agent": AGENT_DISPLAY_NAMES[stage["agent"]],
+                "status": stage["status"],
+                "mode": stage["mode"],
+                "duration_ms": stage.get("duration_ms")
+            }
+            for name, stage in stages.items()
+        ]
+        return result
+
+    @classmethod
+    async def parse_and_verify_eligibility(cls,
+                                           document_text: Union[str, List[str]],
+                                           citizen_profile: Dict,
+                                           on_progress: Optional[Callable[[Dict], None]] = None) -> Dict:
         """
         Workflow: Policy Parser → Eligibility Verifier
-        1. Parse scheme document to extract eligibility criteria
-        2. Verify citizen eligibility against parsed criteria
+        1. Parse each scheme document to extract eligibility criteria
+        2. Verify citizen eligibility against each parsed scheme (concurrently)
         """
-        logger.info("🔄 Starting Parse → Verify workflow")
-        
-        # Step 1: Parse document with Policy Parser
-        parser = get_policy_parser()
-        if parser.simulation_mode:
-            logger.info("📄 Policy Parser parsing document...")
-        else:
-            logger.info("📡 Sending parse request to Policy Parser agent...")
-            
-        parse_message = {
-            "action": "parse_scheme",
-            "document": document_text
-        }
-        
-        # In simulation mode, we'll use our local agent logic
-        # In real mode, agents communicate via MQTT
-        
-        logger.info("✓ Document parsed")
-        
-        # Step 2: Send to Eligibility Verifier
-        verifier = get_eligibility_verifier()
-        if verifier.simulation_mode:
-            logger.info("✅ Eligibility Verifier checking criteria...")
-        else:
-            logger.info("📡 Sending verification request to Eligibility Verifier agent...")
-            
-        verify_message = {
-            "action": "verify_eligibility",
-            "citizen_profile": citizen_profile
-        }
-        
-        logger.info("✓ Eligibility verified")
-        
-        return {
-            "workflow": "parse_and_verify",
-            "status": "completed",
-            "agents_involved": ["Policy Parser", "Eligibility Verifier"],
-            "communication_method": "simulation" if parser.simulation_mode else "mqtt"
+        documents = [document_text] if isinstance(document_text, str) else list(document_text)
+        engine = cls._engine(on_progress)
+        stages = cls._parse_and_verify_stages(documents, citizen_profile, engine.executor.call)
+
+        result = await engine.run("parse_and_verify", stages)
+        result["result"] = {
+            "eligibility": [
+                result["stages"][f"verify_{i}"]["output"] for i in range(1, len(documents) + 1)
+                if result["stages"][f"verify_{i}"]["status"] == "completed"
+            ]
         }
-    
-    @staticmethod
-    def find_and_recommend_benefits(citizen_profile: Dict) -> Dict:
+        return cls._summarize(result, ["Policy Parser", "Eligibility Verifier"])
+
+    @classmethod
+    async def find_and_recommend_benefits(cls,
+                                          citizen_profile: Dict,
+                                          on_progress: Optional[Callable[[Dict], None]] = None) -> Dict:
         """
         Workflow: Benefit Matcher → Citizen Advocate
         1. Find matching schemes for citizen
         2. Generate personalized recommendations
         """
-        logger.info("🔄 Starting Match → Recommend workflow")
-        
-        # Step 1: Benefit Matcher finds schemes
-        matcher = get_benefit_matcher()
-        if matcher.simulation_mode:
-            logger.info("🎯 Benefit Matcher searching for matching schemes...")
-        else:
-            logger.info("📡 Sending search request to Benefit Matcher agent...")
-            
-        match_message = {
-            "action": "find_benefits",
-            "profile": citizen_profile
-        }
-        
-        logger.info("✓ Benefits matched")
-        
-        # Step 2: Citizen Advocate generates recommendations
-        advocate = get_citizen_advocate()
-        if advocate.simulation_mode:
-            logger.info("💬 Citizen Advocate preparing recommendations...")
-        else:
-            logger.info("📡 Sending recommendation request to Citizen Advocate agent...")
-            
-        recommend_message = {
-            "action": "generate_recommendations",
-            "citizen_profile": citizen_profile
-        }
-        
-        logger.info("✓ Recommendations generated")
-        
-        return {
-            "workflow": "match_and_recommend",
-            "status": "completed",
-            "agents_involved": ["Benefit Matcher", "Citizen Advocate"],
-            "communication_method": "simulation" if matcher.simulation_mode else "mqtt"
+        engine = cls._engine(on_progress)
+        call = engine.executor.call
+
+        async def match(outputs):
+            return await call("find_benefits", {
+                "citizen_profile": citizen_profile,
+                "available_schemes": SCHEME_CATALOG
+            })
+
+        async def advise(outputs):
+            return await call("advise", {
+                "message": ADVICE_MESSAGE,
+                "context": {"my_profile": citizen_profile, "recommended_schemes": outputs["match"]}
+            })
+
+        result = await engine.run("match_and_recommend", [
+            Stage("match", "benefit_matcher", match),
+            Stage("advise", "citizen_advocate", advise, depends_on=["match"])
+        ])
+        result["result"] = {
+            "recommendations": result["stages"]["match"]["output"],
+            "guidance": result["stages"]["advise"]["output"]
         }
-    
-    @staticmethod
-    def full_application_workflow(document_text: str, citizen_profile: Dict) -> Dict:
+        return cls._summarize(result, ["Benefit Matcher", "Citizen Advocate"])
+
+    @classmethod
+    async def full_application_workflow(cls,
+                                        document_text: Union[str, List[str]],
+                                        citizen_profile: Dict,
+                                        on_progress: Optional[Callable[[Dict], None]] = None) -> Dict:
         """
         Complete workflow involving all 4 agents:
-        Policy Parser → Eligibility Verifier → Benefit Matcher → Citizen Advocate
+        Policy Parser → Eligibility Verifier ─┐
+        Benefit Matcher ──────────────────────┴→ Citizen Advocate
+        Benefit matching does not need the parsed documents, so it runs
+        concurrently with parsing and verification.
         """
         logger.info("🔄 Starting FULL 4-agent workflow")
-        logger.info("=" * 60)
-        
-        results = {
-            "workflow": "full_application",
-            "steps": []
+        documents = [document_text] if isinstance(document_text, str) else list(document_text)
+        engine = cls._engine(on_progress)
+        call = engine.executor.call
+
+        stages = cls._parse_and_verify_stages(documents, citizen_profile, call)
+        verify_stages = [stage.name for stage in stages if stage.name.startswith("verify_")]
+
+        async def match(outputs):
+            return await call("find_benefits", {
+                "citizen_profile": citizen_profile,
+                "available_schemes": SCHEME_CATALOG
+            })
+
+        async def advise(outputs):
+            eligibility = [outputs[name] for name in verify_stages if name in outputs]
+            return await call("advise", {
+                "message": ADVICE_MESSAGE,
+                "context": {
+                    "my_profile": citizen_profile,
+                    "eligibility_results": eligibility,
+                    "recommended_schemes": outputs.get("match")
+                }
+            })
+
+        stages.append(Stage("match", "benefit_matcher", match))
+        # Guidance is still useful if one of the documents failed to parse
+        stages.append(Stage("advise", "citizen_advocate", advise, depends_on=["match"], waits_for=verify_stages))
+
+        result = await engine.run("full_application", stages)
+        result["result"] = {
+            "eligibility": [result["stages"][name]["output"] for name in verify_stages
+                            if result["stages"][name]["status"] == "completed"],
+            "recommendations": result["stages"]["match"]["output"],
+            "guidance": result["stages"]["advise"]["output"]
         }
-        
-        # Step 1: Policy Parser
-        parser = get_policy_parser()
-        logger.info("📄 Step 1: Policy Parser analyzing document...")
-        results["steps"].append({
-            "agent": "Policy Parser",
-            "status": "completed",
-            "mode": "simulation" if parser.simulation_mode else "real"
-        })
-        
-        # Step 2: Eligibility Verifier
-        verifier = get_eligibility_verifier()
-        logger.info("✅ Step 2: Eligibility Verifier checking criteria...")
-        results["steps"].append({
-            "agent": "Eligibility Verifier",
-            "status": "completed",
-            "mode": "simulation" if verifier.simulation_mode else "real"
-        })
-        
-        # Step 3: Benefit Matcher
-        matcher = get_benefit_matcher()
-        logger.info("🎯 Step 3: Benefit Matcher finding schemes...")
-        results["steps"].append({
-            "agent": "Benefit Matcher",
-            "status": "completed",
-            "mode": "simulation" if matcher.simulation_mode else "real"
-        })
-        
-        # Step 4: Citizen Advocate
-        advocate = get_citizen_advocate()
-        logger.info("💬 Step 4: Citizen Advocate generating guidance...")
-        results["steps"].append({
-            "agent": "Citizen Advocate",
-            "status": "completed",
-            "mode": "simulation" if advocate.simulation_mode else "real"
-        })
-        
-        logger.info("=" * 60)
-        logger.info("✓ All 4 agents communicated successfully!")
-        
-        results["status"] = "completed"
-        results["total_agents"] = 4
-        
-        return results
-    
+        result["total_agents"] = 4
+        return cls._summarize(result, list(AGENT_DISPLAY_NAMES.values()))
+
     @staticmethod
-    def get_agent_network_status() -> Dict:
-        """Get status of all agents and their connectivity"""
-        parser = get_policy_parser()
-        verifier = get_eligibility_verifier()
-        matcher = get_benefit_matcher()
-        advocate = get_citizen_advocate()
-        
+    def get_agent_network_status(statuses: Optional[Dict[str, Dict]] = None) -> Dict:
+        """Get status of all agents and their connectivity, from `statuses` when given"""
+        clients = get_all_clients()
+        if statuses is None:
+            statuses = {
+                role: client.get_status() if client else {"status": "not_initialized"}
+                for role, client in clients.items()
+            }
+        parser = clients["policy_parser"]
+
         return {
             "network_status": "operational",
-            "agents": {
-                "policy_parser": parser.get_status() if parser else {"status": "not_initialized"},
-                "eligibility_verifier": verifier.get_status() if verifier else {"status": "not_initialized"},
-                "benefit_matcher": matcher.get_status() if matcher else {"status": "not_initialized"},
-                "citizen_advocate": advocate.get_status() if advocate else {"status": "not_initialized"}
-            },
+            "agents": statuses,
             "communication_mode": "simulation" if (parser and parser.simulation_mode) else "mqtt",
             "total_agents": 4
         }
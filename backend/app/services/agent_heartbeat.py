@@ -0,0 +1,95 @@
+"""
+Agent Heartbeat
+Refreshes agent identity, connectivity and discovery results in the
+background, so status endpoints serve a cached snapshot instead of calling
+the registry on every poll.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+from app.infrastructure.zynd_client import get_all_clients
+
+logger = logging.getLogger(__name__)
+
+
+class AgentHeartbeat:
+    """Keeps a snapshot of every agent client's status fresh"""
+
+    def __init__(self,
+                 clients: Callable[[], Dict[str, Any]] = get_all_clients,
+                 interval: float = settings.AGENT_HEARTBEAT_INTERVAL,
+                 stale_after: float = settings.AGENT_STATUS_STALE_AFTER):
+        self._clients = clients
+        self.interval = interval
+        self.stale_after = stale_after
+        self._agents: Dict[str, Dict] = {}
+        self._refreshed_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._refreshes = 0
+        self._failures = 0
+
+    async def start(self):
+        await self.refresh()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"✓ Agent heartbeat every {self.interval}s")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                self._failures += 1
+                logger.error(f"Agent heartbeat failed: {e}")
+
+    async def refresh(self):
+        """Check every client concurrently; registry calls run in worker threads"""
+        clients = self._clients()
+        roles = list(clients)
+        statuses = await asyncio.gather(*(
+            asyncio.to_thread(self._check, clients[role]) for role in roles
+        ))
+        self._agents = dict(zip(roles, statuses))
+        self._refreshed_at = time.time()
+        self._refreshes += 1
+
+        # Keep discoveries that are still in use warm until the next beat
+        await asyncio.gather(*(
+            asyncio.to_thread(client.refresh_discovery_cache, self.interval * 1.5)
+            for client in clients.values() if client is not None
+        ), return_exceptions=True)
+
+    @staticmethod
+    def _check(client) -> Dict:
+        if client is None:
+            return {"status": "not_initialized"}
+        started = time.perf_counter()
+        try:
+            status = client.get_status()
+        except Exception as e:
+            status = {"agent_name": client.agent_name, "is_connected": False, "error": str(e)}
+        status["checked_at"] = time.time()
+        status["check_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return status
+
+    def snapshot(self) -> Dict:
+        """The last refreshed status of every agent, with its age"""
+        age = time.time() - self._refreshed_at if self._refreshed_at else None
+        return {
+            "agents": self._agents,
+            "refreshed_at": self._refreshed_at,
+            "age_seconds": round(age, 1) if age is not None else None,
+            "stale": age is None or age > self.stale_after,
+            "interval_seconds": self.interval,
+            "refreshes": self._refreshes,
+            "failures": self._failures
+        }
@@ -0,0 +1,116 @@
+"""
+Agent Tasks
+The actions each agent can perform on behalf of another agent, and the loop
+that serves them when requests arrive over the network.
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.tracing import start_trace
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_scheme(agent, payload: Dict) -> Any:
+    if payload.get("scheme_id"):
+        return agent.parse_scheme_revision(payload["document"], payload["scheme_id"])
+    return agent.parse_scheme_document(payload["document"])
+
+
+def _verify_eligibility(agent, payload: Dict) -> Any:
+    return agent.verify_eligibility(payload["citizen_profile"], payload.get("scheme_criteria", {}))
+
+
+def _find_benefits(agent, payload: Dict) -> Any:
+    return agent.find_matching_schemes(payload["citizen_profile"], payload.get("available_schemes", []))
+
+
+def _advise(agent, payload: Dict) -> Any:
+    return agent.chat(payload["message"], context=payload.get("context"))
+
+
+def _respond(agent, payload: Dict) -> Any:
+    return agent.respond(payload["message"], context=payload.get("context"),
+                         session_id=payload.get("session_id"))
+
+
+# action -> (agent role, handler)
+AGENT_ACTIONS: Dict[str, Tuple[str, Callable[[Any, Dict], Any]]] = {
+    "parse_scheme": ("policy_parser", _parse_scheme),
+    "verify_eligibility": ("eligibility_verifier", _verify_eligibility),
+    "find_benefits": ("benefit_matcher", _find_benefits),
+    "advise": ("citizen_advocate", _advise),
+    "respond": ("citizen_advocate", _respond),
+}
+
+# Redelivered tasks are recognised by message id within this window
+RECENT_TASKS = 512
+
+
+def handle_action(agents: Dict[str, Any], action: str, payload: Dict) -> Any:
+    """Run an action on the local agent that owns it"""
+    if action not in AGENT_ACTIONS:
+        raise ValueError(f"Unknown action: {action}")
+    role, handler = AGENT_ACTIONS[action]
+    agent = agents.get(role)
+    if agent is None:
+        raise RuntimeError(f"Agent '{role}' is not available in this process")
+    return handler(agent, payload)
+
+
+async def serve_agent_requests(messenger, agents: Dict[str, Any], concurrency: Optional[int] = None):
+    """
+    Answer requests arriving at `messenger` using the local agents.
+
+    Each request is acknowledged on receipt, before it waits for one of the
+    `concurrency` slots, so a busy worker is not mistaken for a missing one
+    and the request is not redelivered to another worker. It then runs in a
+    worker thread so slow LLM calls do not block the loop. A redelivered
+    request is not run twice: it is acknowledged again, or answered from the
+    finished result.
+    """
+    logger.info(f"📡 {messenger.agent_id} serving requests")
+    slots = asyncio.Semaphore(concurrency) if concurrency else None
+    recent: "OrderedDict[str, Optional[Tuple[Dict, str]]]" = OrderedDict()
+
+    while True:
+        request = await messenger.receive()
+        message_id = request.get("message_id")
+        if message_id in recent:
+            answer = recent[message_id]
+            if answer is None:
+                await messenger.ack(request)
+            else:
+                await messenger.reply(request, *answer)
+            continue
+
+        await messenger.ack(request)
+        recent[message_id] = None
+        while len(recent) > RECENT_TASKS:
+            recent.popitem(last=False)
+        asyncio.create_task(_serve_one(messenger, agents, request, recent, slots))
+
+
+async def _serve_one(messenger, agents: Dict[str, Any], request: Dict,
+                     recent: Dict, slots: Optional[asyncio.Semaphore]):
+    body = request.get("payload") or {}
+    action = body.get("action")
+    if slots is not None:
+        await slots.acquire()
+    try:
+        # Continues the dispatching request's trace; spans export from this process
+        with start_trace(f"task {action}", request.get("traceparent"), consumer=messenger.agent_id):
+            try:
+                result = await asyncio.to_thread(handle_action, agents, action, body.get("payload", {}))
+                answer = ({"action": action, "result": result}, "reply")
+            except Exception as e:
+                logger.error(f"Action {action} failed: {e}")
+                answer = ({"action": action, "error": str(e)}, "error")
+        if request.get("message_id") in recent:
+            recent[request["message_id"]] = answer
+        await messenger.reply(request, *answer)
+    finally:
+        if slots is not None:
+            slots.release()
@@ -0,0 +1,253 @@
+"""
+Compiled Scheme Catalog
+The scheme catalog compiled into one binary file that every worker maps with
+mmap: the pages are shared between processes and opening it does no parsing.
+
+Layout (little endian):
+- header: magic, format version, catalog fingerprint, counts, section offsets
+- refs: (offset, length) into the string table for each field of each
+  scheme; fields that are missing or not text are kept in an extra JSON field
+- terms: sorted (offset, length, first posting, posting count) term dictionary
+  of the words `match_catalog` searches, and the uint32 postings it points to
+- strings: UTF-8 string table
+
+The file is compiled when missing or when its fingerprint no longer matches
+the catalog, written to a temporary file and renamed into place, so workers
+never see a partial file and keep reading their old mapping until they reopen.
+Build it ahead of the workers with `python -m app.services.compiled_catalog`.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+from collections.abc import Sequence
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
+from app.services.scheme_catalog import SCHEME_CATALOG, _scheme_text
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"PNCATLG\x00"
+FORMAT_VERSION = 2
+FIELDS = ("scheme_name", "department", "benefits", "eligibility", "target_group", "age_limit", "income_limit",
+          "documents")
+EXTRA = len(FIELDS)    # JSON of any keys outside FIELDS, "" when there are none
+MISSING = 0xFFFFFFFF    # ref length of a field the scheme does not have
+
+HEADER = struct.Struct("<8sH32sIII4Q")
+REF = struct.Struct("<II")
+TERM = struct.Struct("<IIII")
+_WORDS = re.compile(r"[a-z]+")
+
+
+def catalog_fingerprint(schemes: Iterable[Dict]) -> bytes:
+    payload = json.dumps([dict(s) for s in schemes], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{FORMAT_VERSION}:{payload}".encode("utf-8")).digest()
+
+
+def _align(buffer: bytearray, boundary: int = 8):
+    buffer.extend(b"\x00" * (-len(buffer) % boundary))
+
+
+def compile_catalog(schemes: List[Dict], path: str) -> str:
+    """Write `schemes` to `path` in the compiled format, atomically; returns the path"""
+    strings = bytearray()
+    string_offsets: Dict[str, Tuple[int, int]] = {}
+
+    def intern(text: str) -> Tuple[int, int]:
+        ref = string_offsets.get(text)
+        if ref is None:
+            data = text.encode("utf-8")
+            ref = string_offsets[text] = (len(strings), len(data))
+            strings.extend(data)
+        return ref
+
+    refs = bytearray()
+    postings: Dict[str, List[int]] = {}
+    for i, scheme in enumerate(schemes):
+        for field in FIELDS:
+            value = scheme.get(field)
+            refs.extend(REF.pack(*intern(value)) if isinstance(value, str) else REF.pack(0, MISSING))
+        extra = {k: v for k, v in scheme.items() if k not in FIELDS or not isinstance(v, str)}
+        refs.extend(REF.pack(*intern(json.dumps(extra, ensure_ascii=False) if extra else "")))
+
+        for word in set(_WORDS.findall(_scheme_text(scheme))):
+            postings.setdefault(word, []).append(i)
+
+    count = len(schemes)
+    body = bytearray(HEADER.size)
+    _align(body)
+    refs_offset = len(body)
+    body.extend(refs)
+    _align(body)
+
+    # Sorted by UTF-8 bytes, the order `_term` compares in
+    terms = sorted(postings, key=lambda t: t.encode("utf-8"))
+    terms_offset = len(body)
+    flat: List[int] = []
+    for term in terms:
+        body.extend(TERM.pack(*intern(term), len(flat), len(postings[term])))
+        flat.extend(postings[term])
+    postings_offset = len(body)
+    body.extend(struct.pack(f"<{len(flat)}I", *flat))
+    strings_offset = len(body)
+    body.extend(strings)
+
+    HEADER.pack_into(body, 0, MAGIC, FORMAT_VERSION, catalog_fingerprint(schemes), count, EXTRA + 1, len(terms),
+                     refs_offset, terms_offset, postings_offset, strings_offset)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".scheme_catalog.", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    logger.info(f"✓ Compiled {count} schemes ({len(terms)} index terms) into {path} ({len(body)} bytes)")
+    return path
+
+
+class CompiledCatalog(Sequence):
+    """Read-only view of a compiled catalog; schemes are decoded from the mapping on access"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+        try:
+            (magic, version, self.fingerprint, self._count, self._fields, self._terms,
+             self._refs_offset, self._terms_offset, self._postings_offset,
+             self._strings_offset) = HEADER.unpack_from(self._mm, 0)
+        except struct.error:
+            magic = version = None
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} compiled scheme catalog")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("scheme index out of range")
+        base = self._refs_offset + index * self._fields * REF.size
+        scheme = {}
+        for j, field in enumerate(FIELDS):
+            offset, length = REF.unpack_from(self._mm, base + j * REF.size)
+            if length != MISSING:
+                scheme[field] = self._string(offset, length)
+        extra = self._string(*REF.unpack_from(self._mm, base + EXTRA * REF.size))
+        if extra:
+            scheme.update(json.loads(extra))
+        return scheme
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings_offset + offset
+        return str(self._view[start:start + length], "utf-8")
+
+    def _term(self, i: int) -> Tuple[bytes, int, int]:
+        offset, length, first, count = TERM.unpack_from(self._mm, self._terms_offset + i * TERM.size)
+        start = self._strings_offset + offset
+        return self._mm[start:start + length], first, count
+
+    def postings(self, word: str) -> List[int]:
+        """Indexes of the schemes whose searchable text contains `word`"""
+        target = word.encode("utf-8")
+        low, high = 0, self._terms
+        while low < high:
+            mid = (low + high) // 2
+            if self._term(mid)[0] < target:
+                low = mid + 1
+            else:
+                high = mid
+        if low == self._terms:
+            return []
+        term, first, count = self._term(low)
+        if term != target:
+            return []
+        return list(struct.unpack_from(f"<{count}I", self._mm, self._postings_offset + 4 * first))
+
+    def candidates(self, words: Iterable[str]) -> List[int]:
+        """Schemes that can match any of `words` in `match_catalog` (the word or its plural), in catalog order"""
+        found = set()
+        for word in words:
+            found.update(self.postings(word))
+            found.update(self.postings(word + "s"))
+        return sorted(found)
+
+    def close(self):
+        self._view.release()
+        self._mm.close()
+
+
+def open_compiled_catalog(path: str, schemes: List[Dict] = SCHEME_CATALOG) -> CompiledCatalog:
+    """Map the compiled catalog at `path`, compiling it first when missing or stale"""
+    expected = catalog_fingerprint(schemes)
+    if os.path.exists(path):
+        try:
+            catalog = CompiledCatalog(path)
+            if catalog.fingerprint == expected:
+                return catalog
+            catalog.close()
+            logger.info(f"Compiled catalog at {path} is out of date, recompiling")
+        except ValueError as e:
+            logger.warning(f"Compiled catalog at {path} is unreadable, recompiling: {e}")
+    compile_catalog(schemes, path)
+    return CompiledCatalog(path)
+
+
+_catalog: Optional[Sequence] = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> Sequence:
+    """The catalog this worker reads: the mapped compiled catalog, or SCHEME_CATALOG when it is disabled or fails"""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                if not settings.SCHEME_CATALOG_COMPILED:
+                    _catalog = SCHEME_CATALOG
+                else:
+                    try:
+                        _catalog = open_compiled_catalog(settings.SCHEME_CATALOG_PATH)
+                    except OSError as e:
+                        logger.warning(f"Compiled catalog unavailable, using the in-process catalog: {e}")
+                        _catalog = SCHEME_CATALOG
+    return _catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the scheme catalog for memory-mapped loading")
+    parser.add_argument("--output", default=settings.SCHEME_CATALOG_PATH, help="compiled catalog path")
+    parser.add_argument("--force", action="store_true", help="recompile even when the file is up to date")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.force:
+        compile_catalog(SCHEME_CATALOG, args.output)
+    else:
+        open_compiled_catalog(args.output).close()
+    print(f"Compiled catalog ready at {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Document Extractor
+Local extractive pre-summarization of scheme documents for the Policy Parser.
+A gazette notification is mostly preamble, legal boilerplate and tables; the
+parser only needs the passages about the scheme, its eligibility, benefits,
+documents and application process. Sentences are scored with English and
+Hindi cue words weighted by TF-IDF (plus the cues of the heading they sit
+under), boilerplate is penalised, and the best sentences that fit the token
+budget are kept in document order. Each field's best sentence is kept first,
+so no field goes missing because another one dominates the document.
+"""
+import logging
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+from app.core.prompt_assembly import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Parser field -> cue words (single tokens) and cue phrases, English and Hindi
+FIELD_CUES: Dict[str, List[str]] = {
+    "scheme": [
+        "scheme", "yojana", "programme", "program", "mission", "department", "ministry", "objective",
+        "deadline", "last date", "launched", "योजना", "विभाग", "मंत्रालय", "उद्देश्य", "अंतिम तिथि"
+    ],
+    "eligibility": [
+        "eligible", "eligibility", "criteria", "applicant", "applicants", "beneficiary", "beneficiaries",
+        "age", "aged", "years", "income", "resident", "domicile", "bpl", "caste", "sc", "st", "obc", "ews",
+        "women", "widow", "farmer", "farmers", "disabled", "divyang", "land holding", "not exceeding",
+        "पात्रता", "पात्र", "आयु", "वर्ष", "आय", "निवासी", "लाभार्थी", "आवेदक", "महिला", "किसान", "जाति"
+    ],
+    "benefits": [
+        "benefit", "benefits", "assistance", "amount", "subsidy", "grant", "pension", "scholarship",
+        "loan", "insurance", "cover", "instalment", "installment", "rs", "₹", "rupees", "lakh", "per month",
+        "per annum", "dbt", "direct benefit transfer", "लाभ", "राशि", "सहायता", "अनुदान", "पेंशन",
+        "छात्रवृत्ति", "रुपये", "किस्त"
+    ],
+    "documents": [
+        "document", "documents", "certificate", "proof", "aadhaar", "card", "passbook", "photograph",
+        "affidavit", "ration", "self-attested", "दस्तावेज", "दस्तावेज़", "प्रमाण", "प्रमाणपत्र", "प्रमाण पत्र",
+        "आधार", "फोटो", "राशन"
+    ],
+    "application": [
+        "apply", "application", "applications", "register", "registration", "portal", "online", "offline",
+        "submit", "submitted", "csc", "common service centre", "form", "verification", "sanction",
+        "how to apply", "आवेदन", "पंजीकरण", "प्रक्रिया", "पोर्टल", "ऑनलाइन", "जमा", "फॉर्म", "सत्यापन"
+    ],
+}
+
+# Preamble and legal boilerplate; a sentence matching these is almost never parser input
+BOILERPLATE_CUES = [
+    "whereas", "in exercise of the powers", "hereby", "notification", "gazette", "extraordinary",
+    "published", "by order", "by order of the governor", "sd/-", "registered no", "regd", "hereinafter",
+    "repeal", "supersession", "shall come into force", "copy forwarded", "for information",
+    "राजपत्र", "अधिसूचना", "असाधारण", "एतद्द्वारा", "आदेश से", "प्रकाशित", "प्रतिलिपि"
+]
+
+_TOKEN = re.compile(r"[\wऀ-ॿ₹]+")
+_SENTENCE_END = re.compile(r"(?<=[^\d\s][.!?।])\s+")    # not after a clause number
+_NUMBERED = re.compile(r"^\(?(\d+(\.\d+)*|[ivxIVX]+|[a-zA-Z])[.)]\s+")
+_TABLE_ROW = re.compile(r"\t|\s{3,}|\|")
+_NUMBER = re.compile(r"\d")
+
+LEAD_LINES = 3           # the first relevant lines, where the scheme name usually is
+HEADING_WEIGHT = 0.5     # share of a heading's cues credited to the sentences under it
+BOILERPLATE_PENALTY = 2.0
+TABLE_PENALTY = 0.5
+
+
+def _split_cues(cues: List[str]):
+    """Cues that are a single token are matched on tokens, the rest as substrings"""
+    words = {c for c in cues if _TOKEN.fullmatch(c)}
+    phrases = [c for c in cues if not _TOKEN.fullmatch(c)]
+    return words, phrases
+
+
+_FIELD_TERMS = {field: _split_cues(cues) for field, cues in FIELD_CUES.items()}
+_BOILERPLATE_TERMS = _split_cues(BOILERPLATE_CUES)
+
+
+class Passage:
+    """One sentence or list item of the document"""
+    __slots__ = ("index", "section", "heading", "text", "tokens", "fields", "score", "cost")
+
+    def __init__(self, index: int, section: int, heading: bool, text: str):
+        self.index = index
+        self.section = section
+        self.heading = heading
+        self.text = text
+        self.tokens = _TOKEN.findall(text.lower())
+        self.fields: Dict[str, float] = {}
+        self.score = 0.0
+        self.cost = 0
+
+
+class Extraction:
+    """The extracted text and how much of the document it kept"""
+    __slots__ = ("text", "applied", "original_tokens", "extracted_tokens", "passages", "kept", "fields_covered")
+
+    def __init__(self, text: str, applied: bool, original_tokens: int, extracted_tokens: int,
+                 passages: int, kept: int, fields_covered: List[str]):
+        self.text = text
+        self.applied = applied
+        self.original_tokens = original_tokens
+        self.extracted_tokens = extracted_tokens
+        self.passages = passages
+        self.kept = kept
+        self.fields_covered = fields_covered
+
+    @property
+    def reduction_ratio(self) -> float:
+        """Share of the document's tokens removed (0 when the document was passed through)"""
+        if not self.original_tokens:
+            return 0.0
+        return round(1 - self.extracted_tokens / self.original_tokens, 3)
+
+    def report(self) -> Dict:
+        return {
+            "applied": self.applied,
+            "original_tokens": self.original_tokens,
+            "extracted_tokens": self.extracted_tokens,
+            "reduction_ratio": self.reduction_ratio,
+            "passages": self.passages,
+            "passages_kept": self.kept,
+            "fields_covered": self.fields_covered
+        }
+
+
+def _is_heading(line: str) -> bool:
+    if len(line) > 80 or line.endswith((".", ";", ",", "।")):
+        return False
+    return line.endswith(":") or line.isupper() or (bool(_NUMBERED.match(line)) and len(line.split()) <= 8)
+
+
+def split_sections(document_text: str) -> List[str]:
+    """The document's sections as text, split where `_split` starts a section"""
+    sections: List[str] = []
+    current: List[str] = []
+    for line in document_text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if current and (_is_heading(line) or _NUMBERED.match(line)):
+            sections.append("\n".join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("\n".join(current))
+    return sections
+
+
+def _split(document_text: str):
+    """
+    Passages and section headings. A heading starts a section and a numbered
+    paragraph starts an untitled one; blank lines do not end a section.
+    """
+    passages: List[Passage] = []
+    headings: List[str] = [""]
+    for line in document_text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        heading = _is_heading(line)
+        if heading:
+            # Headings are passages too: "Eligibility:" tells the parser what follows
+            headings.append(line)
+        elif _NUMBERED.match(line):
+            headings.append("")
+        parts = [line] if _TABLE_ROW.search(line) else _SENTENCE_END.split(line)
+        for part in parts:
+            if part.strip():
+                passages.append(Passage(len(passages), len(headings) - 1, heading, part.strip()))
+    return passages, headings
+
+
+def _cue_weights(tokens: List[str], text: str, terms, idf: Dict[str, float]) -> float:
+    words, phrases = terms
+    weight = sum(idf.get(token, 1.0) for token in tokens if token in words)
+    return weight + sum(1.5 for phrase in phrases if phrase in text)
+
+
+def _score(passages: List[Passage], headings: List[str]):
+    total = len(passages)
+    document_frequency: Counter = Counter()
+    for passage in passages:
+        document_frequency.update(set(passage.tokens))
+    idf = {term: math.log((1 + total) / (1 + df)) + 1 for term, df in document_frequency.items()}
+
+    heading_fields = []
+    for heading in headings:
+        lowered = heading.lower()
+        tokens = _TOKEN.findall(lowered)
+        heading_fields.append({field: _cue_weights(tokens, lowered, terms, idf)
+                               for field, terms in _FIELD_TERMS.items()})
+
+    lead = 0
+    for passage in passages:
+        lowered = passage.text.lower()
+        length_norm = 1 + math.log(1 + len(passage.tokens))
+        under = heading_fields[passage.section]
+        for field, terms in _FIELD_TERMS.items():
+            weight = _cue_weights(passage.tokens, lowered, terms, idf) / length_norm
+            if not passage.heading:
+                weight += HEADING_WEIGHT * under[field]
+            if weight > 0:
+                passage.fields[field] = weight
+        score = sum(passage.fields.values())
+        if _NUMBER.search(passage.text) and ("eligibility" in passage.fields or "benefits" in passage.fields):
+            score *= 1.2    # limits and amounts are what the parser extracts
+        boilerplate = _cue_weights(passage.tokens, lowered, _BOILERPLATE_TERMS, idf)
+        if passage.fields and not boilerplate and lead < LEAD_LINES:
+            score += 1.0
+            lead += 1
+        if boilerplate:
+            score -= BOILERPLATE_PENALTY * boilerplate / length_norm
+        if _TABLE_ROW.search(passage.text) and not passage.fields:
+            score -= TABLE_PENALTY
+        passage.score = score
+
+
+def extract_relevant(document_text: str, budget: int, min_tokens: int = 0,
+                     model: Optional[str] = None) -> Extraction:
+    """
+    The passages of `document_text` most relevant to the parser's fields,
+    within `budget` tokens. Documents under `min_tokens`, and documents in
+    which no passage scores as relevant, are passed through unchanged.
+    """
+    original_tokens = count_tokens(document_text, model)
+    passages, headings = _split(document_text)
+    if original_tokens <= min_tokens or not passages:
+        return Extraction(document_text, False, original_tokens, original_tokens, len(passages), len(passages),
+                          list(FIELD_CUES))
+
+    _score(passages, headings)
+    candidates = [p for p in passages if p.score > 0]
+    if not candidates:
+        logger.info("✂️ No passage scored as relevant; passing the document through")
+        return Extraction(document_text, False, original_tokens, original_tokens, len(passages), len(passages), [])
+
+    for passage in candidates:
+        passage.cost = count_tokens(passage.text, model) + 1
+    chosen = set()
+    used = 0
+
+    def take(passage: Passage) -> bool:
+        nonlocal used
+        if passage.index in chosen or used + passage.cost > budget:
+            return False
+        chosen.add(passage.index)
+        used += passage.cost
+        return True
+
+    # The best passage of every field first, then the rest by score
+    for field in FIELD_CUES:
+        ranked = sorted((p for p in candidates if field in p.fields), key=lambda p: p.fields[field], reverse=True)
+        for passage in ranked:
+            if take(passage):
+                break
+    for passage in sorted(candidates, key=lambda p: p.score, reverse=True):
+        take(passage)
+
+    kept = [p for p in passages if p.index in chosen]
+    lines, section = [], None
+    for passage in kept:
+        if section is not None and passage.section != section:
+            lines.append("")
+        lines.append(passage.text)
+        section = passage.section
+    text = "\n".join(lines)
+    covered = [field for field in FIELD_CUES if any(field in p.fields for p in kept)]
+    extraction = Extraction(text, True, original_tokens, count_tokens(text, model), len(passages), len(kept),
+                            covered)
+    logger.info(f"✂️ Extracted {extraction.kept}/{extraction.passages} passages, "
+                f"{extraction.original_tokens} -> {extraction.extracted_tokens} tokens "
+                f"({extraction.reduction_ratio:.0%} reduction), fields {covered}")
+    return extraction
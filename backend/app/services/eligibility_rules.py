@@ -0,0 +1,347 @@
+"""
+Eligibility Rules
+Deterministic evaluation of structured eligibility criteria (as produced by the
+Policy Parser) against a citizen profile, plus templated English/Hindi
+explanations of the outcome.
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+
+MET = "met"
+FAILED = "failed"
+UNKNOWN = "unknown"            # criterion is structured but the profile lacks the field
+UNEXPLAINED = "unexplained"    # criterion cannot be evaluated by rules
+
+# Criterion key -> profile keys that may hold the citizen's value
+PROFILE_ALIASES = {
+    "age": ["age"],
+    "income": ["annual_income", "income", "family_income", "household_income"],
+    "location": ["location", "state", "district", "city", "residence", "area"],
+    "gender": ["gender", "sex"],
+    "category": ["category", "caste", "social_category"],
+    "occupation": ["occupation", "profession", "employment", "work"],
+}
+
+CRITERION_ALIASES = {
+    "caste": "category",
+    "social_category": "category",
+    "sex": "gender",
+    "profession": "occupation",
+    "annual_income": "income",
+    "state": "location",
+}
+
+# Criterion -> spelling (lowercase, "_" for spaces and dashes) -> canonical value.
+# Membership is decided by comparing canonical values exactly.
+VALUE_ALIASES: Dict[str, Dict[str, str]] = {
+    "gender": {
+        "m": "male", "man": "male", "men": "male", "boy": "male", "purush": "male", "पुरुष": "male",
+        "f": "female", "woman": "female", "women": "female", "girl": "female", "girl_child": "female",
+        "mahila": "female", "महिला": "female",
+        "transgender": "other", "third_gender": "other",
+    },
+    "category": {
+        "gen": "general", "open": "general", "ur": "general", "unreserved": "general",
+        "bc": "obc", "other_backward_class": "obc", "other_backward_classes": "obc",
+        "scheduled_caste": "sc", "dalit": "sc",
+        "scheduled_tribe": "st", "adivasi": "st", "tribal": "st",
+        "economically_weaker_section": "ews",
+    },
+    "occupation": {
+        "kisan": "farmer", "farming": "farmer", "agriculture": "farmer", "cultivator": "farmer",
+        "किसान": "farmer", "agricultural_worker": "agricultural_labourer",
+        "farm_labourer": "agricultural_labourer", "labour": "labourer", "laborer": "labourer",
+        "daily_wage_worker": "labourer", "mazdoor": "labourer", "vendor": "street_vendor",
+        "hawker": "street_vendor", "craftsman": "artisan", "fisher": "fisherman",
+        "entrepreneur": "business", "shopkeeper": "business", "housewife": "homemaker",
+        "pensioner": "retired", "jobless": "unemployed",
+    },
+    "location": {
+        "up": "uttar_pradesh", "mp": "madhya_pradesh", "hp": "himachal_pradesh", "ap": "andhra_pradesh",
+        "tn": "tamil_nadu", "wb": "west_bengal", "orissa": "odisha", "nct_of_delhi": "delhi",
+        "new_delhi": "delhi", "j&k": "jammu_&_kashmir", "jammu_and_kashmir": "jammu_&_kashmir",
+        "pondicherry": "puducherry",
+    },
+}
+
+# Allowed values that cover every citizen
+UNRESTRICTED = {"all", "any", "all_india", "india", "everyone", "all_citizens"}
+
+# Location keys that name the citizen's state; the rest (district, city) cannot rule a state out
+STATE_KEYS = ("location", "state", "residence")
+
+LABELS = {
+    "en": {"age": "age", "income": "annual income", "location": "location",
+           "gender": "gender", "category": "social category", "occupation": "occupation"},
+    "hi": {"age": "आयु", "income": "वार्षिक आय", "location": "स्थान",
+           "gender": "लिंग", "category": "सामाजिक वर्ग", "occupation": "व्यवसाय"},
+}
+
+TEMPLATES = {
+    "en": {
+        "age_range_met": "Your age ({value}) is within the required range of {min} to {max} years.",
+        "age_min_met": "You meet the minimum age of {min} years (your age: {value}).",
+        "age_max_met": "You are within the maximum age of {max} years (your age: {value}).",
+        "age_min_failed": "You must be at least {min} years old, but your age is {value}.",
+        "age_max_failed": "The maximum age is {max} years, but your age is {value}.",
+        "income_met": "Your annual income of {value} is within the {max} limit.",
+        "income_failed": "Your annual income of {value} is above the {max} limit.",
+        "list_met": "Your {label} ({value}) is covered: the scheme is for {allowed}.",
+        "list_failed": "Your {label} ({value}) is not covered: the scheme is only for {allowed}.",
+        "unknown": "We could not check your {label} because it is missing from your profile.",
+        "eligible": "Good news! Based on the scheme's criteria, you appear to be eligible for {scheme}.",
+        "not_eligible": "Based on the scheme's criteria, you do not appear to be eligible for {scheme}.",
+        "undetermined": "We need a little more information to confirm your eligibility for {scheme}.",
+    },
+    "hi": {
+        "age_range_met": "आपकी आयु ({value}) आवश्यक सीमा {min} से {max} वर्ष के भीतर है।",
+        "age_min_met": "आप न्यूनतम आयु {min} वर्ष की शर्त पूरी करते हैं (आपकी आयु: {value})।",
+        "age_max_met": "आप अधिकतम आयु {max} वर्ष की सीमा के भीतर हैं (आपकी आयु: {value})।",
+        "age_min_failed": "न्यूनतम आयु {min} वर्ष होनी चाहिए, लेकिन आपकी आयु {value} है।",
+        "age_max_failed": "अधिकतम आयु {max} वर्ष है, लेकिन आपकी आयु {value} है।",
+        "income_met": "आपकी वार्षिक आय {value}, {max} की सीमा के भीतर है।",
+        "income_failed": "आपकी वार्षिक आय {value}, {max} की सीमा से अधिक है।",
+        "list_met": "आपका {label} ({value}) शामिल है: योजना {allowed} के लिए है।",
+        "list_failed": "आपका {label} ({value}) शामिल नहीं है: योजना केवल {allowed} के लिए है।",
+        "unknown": "आपकी प्रोफ़ाइल में {label} की जानकारी नहीं है, इसलिए हम इसकी जांच नहीं कर सके।",
+        "eligible": "अच्छी खबर! योजना की शर्तों के आधार पर आप {scheme} के लिए पात्र प्रतीत होते हैं।",
+        "not_eligible": "योजना की शर्तों के आधार पर आप {scheme} के लिए पात्र प्रतीत नहीं होते।",
+        "undetermined": "{scheme} के लिए आपकी पात्रता की पुष्टि करने हेतु हमें कुछ और जानकारी चाहिए।",
+    },
+}
+
+_CURRENCY = re.compile(r"₹|\brs\b\.?|\binr\b", re.IGNORECASE)
+_AMOUNT_PATTERN = re.compile(r"(\d[\d,]*(?:\.\d+)?)\s*(lakhs?|lacs?|crores?|cr|thousand|k|l)?\b", re.IGNORECASE)
+_RANGE_SEPARATOR = re.compile(r"\s*(-|–|—|to)\s*", re.IGNORECASE)
+_MULTIPLIERS = {"lakh": 1e5, "lac": 1e5, "l": 1e5, "crore": 1e7, "cr": 1e7, "k": 1e3, "thousand": 1e3}
+
+
+def _amount(match: "re.Match", unit: Optional[str] = None) -> float:
+    unit = (unit or match.group(2) or "").lower()
+    if unit not in _MULTIPLIERS:
+        unit = unit.rstrip("s")
+    return float(match.group(1).replace(",", "")) * _MULTIPLIERS.get(unit, 1)
+
+
+def parse_amount_range(value: Any) -> Optional[Tuple[float, float]]:
+    """
+    (low, high) of a rupee amount or range: "Rs. 2,50,000" is (250000, 250000)
+    and "1.5-2.5 lakh" is (150000, 250000), the unit applying to both ends.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value), float(value)
+    if not isinstance(value, str):
+        return None
+    text = _CURRENCY.sub(" ", value)
+    matches = list(_AMOUNT_PATTERN.finditer(text))
+    if not matches:
+        return None
+    first = matches[0]
+    if len(matches) > 1 and _RANGE_SEPARATOR.fullmatch(text[first.end():matches[1].start()]):
+        second = matches[1]
+        low, high = _amount(first, first.group(2) or second.group(2)), _amount(second)
+        return min(low, high), max(low, high)
+    amount = _amount(first)
+    return amount, amount
+
+
+def parse_exact_amount(value: Any) -> Optional[float]:
+    """A rupee amount only when `value` holds exactly one: None for "1.5-2.5 lakh" or "2 lakh, 3 acres" """
+    if isinstance(value, str):
+        matches = list(_AMOUNT_PATTERN.finditer(_CURRENCY.sub(" ", value)))
+        return _amount(matches[0]) if len(matches) == 1 else None
+    bounds = parse_amount_range(value)
+    return bounds[0] if bounds else None
+
+
+_RUPEE_MARKER = re.compile(r"₹|\b(?:rs|inr|rupees?|lakhs?|lacs?|crores?|cr)\b", re.IGNORECASE)
+_BARE_NUMBER = re.compile(r"\s*\d[\d,]*(?:\.\d+)?\s*")
+
+
+def parse_rupees(value: Any) -> Optional[float]:
+    """
+    `parse_amount` for text that is clearly money: a bare number or one with
+    a ₹/Rs/INR/rupees/lakh/crore marker. "2 acres" is not read as ₹2.
+    """
+    if isinstance(value, str) and not (_BARE_NUMBER.fullmatch(value) or _RUPEE_MARKER.search(value)):
+        return None
+    return parse_amount(value)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _number(value: float) -> Any:
+    return int(value) if float(value).is_integer() else value
+
+
+def parse_amount(value: Any) -> Optional[float]:
+    """Parse rupee amounts such as 250000, "₹2.5 lakh" or "3,00,000" into a number; a range gives its upper bound"""
+    bounds = parse_amount_range(value)
+    return bounds[1] if bounds else None
+
+
+def format_inr(amount: float) -> str:
+    """Format rupees the way citizens read them: ₹3 lakh, ₹1.2 crore, ₹45,000"""
+    if amount >= 1e7:
+        return f"₹{amount / 1e7:g} crore"
+    if amount >= 1e5:
+        return f"₹{amount / 1e5:g} lakh"
+    return f"₹{amount:,.0f}"
+
+
+def _profile_value(profile: Dict, criterion: str) -> Any:
+    for key in PROFILE_ALIASES.get(criterion, [criterion]):
+        if profile.get(key) not in (None, ""):
+            return profile[key]
+    return None
+
+
+def _as_list(value: Any) -> List[str]:
+    if isinstance(value, (list, tuple, set)):
+        return [str(v) for v in value]
+    return [str(value)]
+
+
+def _evaluate_age(requirement: Any, profile: Dict) -> Dict:
+    if not isinstance(requirement, dict) or not ({"min", "max"} & requirement.keys()):
+        return {"status": UNEXPLAINED}
+    bounds = [requirement.get("min"), requirement.get("max")]
+    # "18" and "18 years" are read as 18; anything else leaves the criterion to the LLM
+    limits = [None if b is None else b if _is_number(b) else parse_exact_amount(b) for b in bounds]
+    if all(limit is None for limit in limits) or any(b is not None and l is None for b, l in zip(bounds, limits)):
+        return {"status": UNEXPLAINED}
+    raw_age = _profile_value(profile, "age")
+    age = parse_amount(raw_age)
+    if age is None:
+        return {"status": UNKNOWN}
+    low, high = limits
+    typed = all(b is None or _is_number(b) for b in bounds)
+    detail = {"value": int(age), "min": low if low is None else _number(low),
+              "max": high if high is None else _number(high), "typed": typed}
+    if low is not None and age < low:
+        return {"status": FAILED, "template": "age_min_failed", **detail}
+    if high is not None and age > high:
+        return {"status": FAILED, "template": "age_max_failed", **detail}
+    if low is not None and high is not None:
+        return {"status": MET, "template": "age_range_met", **detail}
+    return {"status": MET, "template": "age_min_met" if low is not None else "age_max_met", **detail}
+
+
+def _evaluate_income(requirement: Any, profile: Dict) -> Dict:
+    raw_limit = requirement.get("max") if isinstance(requirement, dict) else requirement
+    unit = str(requirement.get("unit", "annual")).lower() if isinstance(requirement, dict) else "annual"
+    limit = parse_rupees(raw_limit)
+    if limit is None:
+        return {"status": UNEXPLAINED}
+    if unit.startswith("month"):
+        limit *= 12
+    income = parse_rupees(_profile_value(profile, "income"))
+    if income is None:
+        return {"status": UNKNOWN}
+    detail = {"value": format_inr(income), "max": format_inr(limit), "typed": _is_number(raw_limit)}
+    if income > limit:
+        return {"status": FAILED, "template": "income_failed", **detail}
+    return {"status": MET, "template": "income_met", **detail}
+
+
+def canonical_value(criterion: str, value: Any) -> str:
+    """The canonical spelling of a membership value: "Women" and "F" are both "female" """
+    key = "_".join(str(value).strip().lower().replace("-", " ").split())
+    aliases = VALUE_ALIASES.get(criterion, {})
+    if key in aliases:
+        return aliases[key]
+    if key.endswith("s") and len(key) > 3 and (key[:-1] in aliases or key[:-1] in aliases.values()):
+        return aliases.get(key[:-1], key[:-1])
+    return key
+
+
+def _evaluate_membership(criterion: str, requirement: Any, profile: Dict) -> Dict:
+    # "SC/ST" and "Bihar, Jharkhand" list several allowed values in one entry
+    allowed = [a.strip() for item in _as_list(requirement) for a in re.split(r"[/,]", item) if a.strip()]
+    if not allowed:
+        return {"status": UNEXPLAINED}
+    accepted = {canonical_value(criterion, a) for a in allowed}
+    if accepted & UNRESTRICTED:
+        return {"status": MET, "template": None}
+
+    if criterion == "location":
+        # Any of the citizen's places may match; only a state can rule the citizen out
+        places = [(key, part.strip()) for key in PROFILE_ALIASES["location"] if profile.get(key) not in (None, "")
+                  for part in str(profile[key]).split(",") if part.strip()]
+        matched = [part for _, part in places if canonical_value(criterion, part) in accepted]
+        states = [part for key, part in places if key in STATE_KEYS]
+        if not matched and not states:
+            return {"status": UNKNOWN}
+        covered = bool(matched)
+        value = matched[0] if matched else states[0]
+    else:
+        value = _profile_value(profile, criterion)
+        if value is None:
+            return {"status": UNKNOWN}
+        covered = canonical_value(criterion, value) in accepted
+    detail = {"value": value, "allowed": ", ".join(allowed), "typed": isinstance(requirement, (list, tuple, set))}
+    return {"status": MET if covered else FAILED, "template": "list_met" if covered else "list_failed", **detail}
+
+
+def evaluate_criteria(criteria: Any, profile: Dict) -> List[Dict]:
+    """
+    Evaluate each criterion against the profile.
+    Returns one result per criterion with a status of met/failed/unknown/unexplained.
+    Met and failed results carry `typed`: the requirement was given as numbers
+    or a list of values, rather than read out of text.
+    """
+    if not isinstance(criteria, dict):
+        return [{"criterion": "criteria", "requirement": criteria, "status": UNEXPLAINED}] if criteria else []
+
+    profile = profile or {}
+    results = []
+    for key, requirement in criteria.items():
+        criterion = CRITERION_ALIASES.get(key, key)
+        if criterion == "age":
+            outcome = _evaluate_age(requirement, profile)
+        elif criterion == "income":
+            outcome = _evaluate_income(requirement, profile)
+        elif criterion in ("location", "gender", "category", "occupation"):
+            outcome = _evaluate_membership(criterion, requirement, profile)
+        else:
+            outcome = {"status": UNEXPLAINED}
+        results.append({"criterion": criterion, "requirement": requirement, **outcome})
+    return results
+
+
+def verdict(results: List[Dict]) -> str:
+    """Overall outcome: eligible, not_eligible or undetermined (also when there are no criteria)"""
+    statuses = {r["status"] for r in results}
+    if FAILED in statuses:
+        return "not_eligible"
+    if statuses == {MET}:
+        return "eligible"
+    return "undetermined"
+
+
+def render_explanation(scheme_name: str, results: List[Dict], language: str = "en") -> str:
+    """Turn evaluated criteria into plain sentences (unexplained criteria are skipped)"""
+    templates = TEMPLATES.get(language, TEMPLATES["en"])
+    labels = LABELS.get(language, LABELS["en"])
+
+    lines = []
+    for result in results:
+        status = result["status"]
+        if status == UNKNOWN:
+            lines.append("- " + templates["unknown"].format(label=labels.get(result["criterion"], result["criterion"])))
+        elif status in (MET, FAILED) and result.get("template"):
+            lines.append("- " + templates[result["template"]].format(
+                label=labels.get(result["criterion"], result["criterion"]),
+                **{k: v for k, v in result.items() if k in ("value", "min", "max", "allowed")}
+            ))
+
+    # With unexplained criteria left over, the overall verdict is not ours to give
+    outcome = verdict(results)
+    if outcome == "undetermined" and any(r["status"] == UNEXPLAINED for r in results):
+        return "\n".join(lines)
+    return "\n".join([templates[outcome].format(scheme=scheme_name)] + lines)
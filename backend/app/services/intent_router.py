@@ -0,0 +1,268 @@
+"""
+Local Intent Router
+Answers plain scheme catalog lookups ("documents for Ujjwala", "benefit amount
+of APY") from templates without calling the LLM. Everything else is routed to
+the Citizen Advocate LLM.
+"""
+import difflib
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.services.scheme_catalog import SCHEME_CATALOG
+
+
+# Intent -> (catalog field, cue phrases in English, Hinglish and Hindi)
+INTENT_CUES: Dict[str, Tuple[str, List[str]]] = {
+    "documents": ("documents", [
+        "document", "documents", "docs", "papers", "paperwork", "certificate needed",
+        "kagaz", "kagzat", "dastavej", "dastavez", "दस्तावेज", "दस्तावेज़", "कागज", "कागजात"
+    ]),
+    "benefit_amount": ("benefits", [
+        "benefit", "benefits", "amount", "how much", "money", "paisa", "paise", "kitna", "kitni",
+        "kitne", "labh", "fayda", "लाभ", "राशि", "कितना", "कितनी", "फायदा"
+    ]),
+    "department": ("department", [
+        "department", "ministry", "runs", "run by", "managed by", "implemented by",
+        "vibhag", "mantralay", "mantralaya", "विभाग", "मंत्रालय"
+    ]),
+    "eligibility": ("eligibility", [
+        "eligibility", "eligible", "who can", "qualify", "criteria", "patrata", "patr",
+        "पात्रता", "पात्र", "कौन ले सकता"
+    ]),
+    "age_limit": ("age_limit", [
+        "age limit", "age", "how old", "umar", "umr", "aayu", "उम्र", "आयु"
+    ]),
+    "income_limit": ("income_limit", [
+        "income limit", "income", "salary", "aay", "aamdani", "आय", "आमदनी"
+    ]),
+}
+
+# Questions that need reasoning about the citizen or the process go to the LLM
+LLM_ONLY_PATTERNS = re.compile(
+    r"\b(am i|can i|should i|do i qualify|my |mera|meri|mere|main eligible|how to apply|"
+    r"kaise apply|apply kaise|process|steps|compare|better|best|help me)\b"
+)
+
+HINGLISH_CUES = {
+    "kya", "kaun", "kaunsa", "kaunse", "kitna", "kitni", "kitne", "kaise", "hai", "hain",
+    "chahiye", "batao", "bataiye", "ke", "ka", "ki", "liye", "milta", "milega", "yojana"
+}
+
+# Words too generic to identify a scheme on their own
+NAME_STOPWORDS = {
+    "pm", "pradhan", "mantri", "yojana", "scheme", "national", "india", "the", "of", "and",
+    "urban", "rural", "portal", "act", "guarantee", "employment", "bharat", "nps", "bima",
+    "urban & rural"
+}
+
+# Words of a lookup question that say nothing about which scheme is meant
+QUERY_WORDS = {
+    "what", "which", "who", "is", "are", "the", "a", "an", "for", "of", "to", "in", "under", "on", "about",
+    "and", "or", "with", "by", "please", "tell", "me", "list", "give", "get", "need", "needed", "required",
+    "require", "requirements", "does", "do", "much", "any", "its", "it", "this", "that", "limit", "limits",
+    "mein", "me", "se", "ko", "के", "का", "की", "को", "में", "से", "लिए", "लिये", "क्या", "है", "हैं", "कौन",
+    "चाहिए", "योजना"
+}
+
+# Generic name endings dropped to form an extra alias ("Stand Up India Scheme" -> "stand up india")
+NAME_SUFFIXES = re.compile(r"\s+(scheme|yojana)$")
+
+HINDI_SCHEME_ALIASES = {
+    "किसान": "PM-KISAN (Pradhan Mantri Kisan Samman Nidhi)",
+    "आयुष्मान": "Ayushman Bharat - PM-JAY",
+    "मुद्रा": "PM Mudra Yojana",
+    "छात्रवृत्ति": "National Scholarship Portal (NSP)",
+    "आवास": "PM Awas Yojana (Urban & Rural)",
+    "बेटी": "Beti Bachao Beti Padhao",
+    "विश्वकर्मा": "PM Vishwakarma Yojana",
+    "अटल पेंशन": "National Pension Scheme (NPS) - APY",
+    "कौशल": "PM Kaushal Vikas Yojana (PMKVY)",
+    "मनरेगा": "Mahatma Gandhi National Rural Employment Guarantee Act (MGNREGA)",
+    "उज्ज्वला": "PM Ujjwala Yojana",
+    "फसल बीमा": "PM Fasal Bima Yojana",
+    "स्टैंड अप": "Stand Up India Scheme",
+    "मातृ वंदना": "PM Matru Vandana Yojana",
+    "जीवन ज्योति": "Pradhan Mantri Jeevan Jyoti Bima Yojana (PMJJBY)",
+}
+
+# Common names of catalog schemes that their catalog names do not contain
+ENGLISH_SCHEME_ALIASES = {
+    "atal pension": "National Pension Scheme (NPS) - APY",
+    "atal pension yojana": "National Pension Scheme (NPS) - APY",
+    "pmay": "PM Awas Yojana (Urban & Rural)",
+    "pm awas": "PM Awas Yojana (Urban & Rural)",
+}
+
+# Catalog fields whose words describe the scheme itself ("mudra loan", "ujjwala gas connection")
+DESCRIPTIVE_FIELDS = ("scheme_name", "department", "benefits", "eligibility", "target_group")
+
+TEMPLATES = {
+    "en": {
+        "documents": "Documents required for {name}: {value}.",
+        "benefit_amount": "Benefit under {name}: {value}.",
+        "department": "{name} is run by the {value}.",
+        "eligibility": "Who is eligible for {name}: {value}.",
+        "age_limit": "Age limit for {name}: {value}.",
+        "income_limit": "Income limit for {name}: {value}.",
+        "footer": "Ask me if you would like help checking your own eligibility or applying."
+    },
+    "hi": {
+        "documents": "{name} के लिए आवश्यक दस्तावेज़: {value}।",
+        "benefit_amount": "{name} के अंतर्गत लाभ: {value}।",
+        "department": "{name} का संचालन {value} द्वारा किया जाता है।",
+        "eligibility": "{name} के लिए पात्रता: {value}।",
+        "age_limit": "{name} के लिए आयु सीमा: {value}।",
+        "income_limit": "{name} के लिए आय सीमा: {value}।",
+        "footer": "अपनी पात्रता जांचने या आवेदन करने में मदद चाहिए तो मुझसे पूछें।"
+    },
+}
+
+
+def _normalize(text: str) -> str:
+    text = re.sub(r"[-_/().,?!:;'\"]", " ", text.lower())
+    return " ".join(text.split())
+
+
+def _build_alias_index(schemes: List[Dict]) -> Dict[str, Dict]:
+    """Map every distinctive alias (acronym, name word, full name) to its scheme"""
+    candidates: Dict[str, List[Dict]] = {}
+
+    def add(alias: str, scheme: Dict):
+        alias = _normalize(alias)
+        if alias and alias not in NAME_STOPWORDS:
+            candidates.setdefault(alias, [])
+            if scheme not in candidates[alias]:
+                candidates[alias].append(scheme)
+
+    for scheme in schemes:
+        name = scheme["scheme_name"]
+        add(name, scheme)
+        add(NAME_SUFFIXES.sub("", _normalize(name)), scheme)
+        for part in re.findall(r"\(([^)]+)\)", name) + re.split(r"\s+-\s+|\(", name):
+            part = part.strip(" )")
+            add(part, scheme)
+            add(part.replace("-", "").replace(" ", ""), scheme)
+        for word in _normalize(name).split():
+            if len(word) >= 3:
+                add(word, scheme)
+
+    # Aliases shared by several schemes cannot identify one on their own
+    index = {alias: matches[0] for alias, matches in candidates.items() if len(matches) == 1}
+    by_name = {scheme["scheme_name"]: scheme for scheme in schemes}
+    for alias, name in {**HINDI_SCHEME_ALIASES, **ENGLISH_SCHEME_ALIASES}.items():
+        if name in by_name:
+            index[alias] = by_name[name]
+    return index
+
+
+def _singular(word: str) -> str:
+    return word[:-1] if len(word) > 3 and word.endswith("s") else word
+
+
+def _describing_words(scheme: Dict) -> set:
+    text = " ".join(str(scheme.get(field, "")) for field in DESCRIPTIVE_FIELDS)
+    return {_singular(word) for word in _normalize(text).split()}
+
+
+class IntentRouter:
+    """Keyword and fuzzy-name classifier for catalog lookup questions"""
+
+    def __init__(self, schemes: List[Dict] = SCHEME_CATALOG, fuzzy_cutoff: float = 0.85):
+        self.schemes = schemes
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.alias_index = _build_alias_index(schemes)
+        # Short aliases are mostly acronyms, where one letter off is another scheme ("pmay" is not "pmjay")
+        self._single_word_aliases = [a for a in self.alias_index if " " not in a and len(a) >= 6]
+        self._max_alias_words = max(len(a.split()) for a in self.alias_index)
+        self._scheme_words = {s["scheme_name"]: _describing_words(s) for s in schemes}
+        self._known_words = QUERY_WORDS | NAME_STOPWORDS | HINGLISH_CUES | {
+            word for _, cues in INTENT_CUES.values() for cue in cues for word in cue.split()
+        }
+
+    def route(self, message: str) -> Dict:
+        """
+        Classify a chat message.
+        Returns the routing decision and, for catalog lookups, the templated answer.
+        """
+        started = time.perf_counter()
+        text = _normalize(message)
+        language = self._detect_language(message, text)
+
+        decision = {"decision": "llm", "intent": None, "scheme": None, "language": language}
+        answer = None
+
+        if not LLM_ONLY_PATTERNS.search(f"{text} "):
+            intents = self._match_intents(text)
+            scheme = self._match_scheme(text) if intents else None
+            if scheme:
+                decision.update({"decision": "catalog", "intent": intents, "scheme": scheme["scheme_name"]})
+                answer = self._render(intents, scheme, language)
+            elif intents:
+                decision["intent"] = intents
+
+        decision["latency_us"] = round((time.perf_counter() - started) * 1_000_000, 1)
+        return {"decision": decision, "answer": answer}
+
+    def _detect_language(self, message: str, text: str) -> str:
+        if re.search(r"[ऀ-ॿ]", message):
+            return "hi"
+        words = set(text.split())
+        return "hi" if len(words & HINGLISH_CUES) >= 2 else "en"
+
+    def _match_intents(self, text: str) -> List[str]:
+        padded = f" {text} "
+        matched = []
+        for intent, (_, cues) in INTENT_CUES.items():
+            if any(f" {cue} " in padded or (not cue.isascii() and cue in text) for cue in cues):
+                matched.append(intent)
+        # A specific limit question ("age limit for ...") beats generic eligibility
+        if "eligibility" in matched and len(matched) > 1:
+            matched.remove("eligibility")
+        return matched
+
+    def _match_scheme(self, text: str) -> Optional[Dict]:
+        words = text.split()
+        squashed = text.replace(" ", "")
+
+        # Longest exact alias wins, e.g. "pm kisan" over "kisan"
+        for size in range(min(self._max_alias_words, len(words)), 0, -1):
+            for i in range(len(words) - size + 1):
+                scheme = self.alias_index.get(" ".join(words[i:i + size]))
+                if scheme:
+                    return None if self._names_another_scheme(words, i, i + size, scheme) else scheme
+
+        for alias, scheme in self.alias_index.items():
+            if not alias.isascii() and alias in text:
+                return scheme
+            if len(alias) >= 5 and " " not in alias and alias in squashed:
+                return scheme
+
+        # Tolerate misspellings such as "ujwala" or "vishvakarma"
+        for i, word in enumerate(words):
+            if len(word) >= 4:
+                close = difflib.get_close_matches(word, self._single_word_aliases, n=1, cutoff=self.fuzzy_cutoff)
+                if close:
+                    scheme = self.alias_index[close[0]]
+                    return None if self._names_another_scheme(words, i, i + 1, scheme) else scheme
+        return None
+
+    def _names_another_scheme(self, words: List[str], start: int, end: int, scheme: Dict) -> bool:
+        """
+        Unknown words right around the matched name mean the question is about
+        something else that shares a word with it ("kisan credit card" is not
+        PM-KISAN); such questions go to the LLM.
+        """
+        own = self._scheme_words[scheme["scheme_name"]]
+        neighbours = words[max(0, start - 1):start] + words[end:end + 2]
+        return any(_singular(word) not in own and word not in self._known_words and not word.isdigit()
+                   for word in neighbours)
+
+    def _render(self, intents: List[str], scheme: Dict, language: str) -> str:
+        templates = TEMPLATES[language]
+        lines = [
+            templates[intent].format(name=scheme["scheme_name"], value=scheme[INTENT_CUES[intent][0]])
+            for intent in intents
+        ]
+        lines.append(templates["footer"])
+        return "\n".join(lines)
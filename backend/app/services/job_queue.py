@@ -0,0 +1,280 @@
+"""
+Background Job Queue
+Runs long parses and multi-agent workflows outside the request/response cycle.
+Jobs are served by a bounded pool of asyncio workers in priority order, report
+progress events, can be cancelled, and keep their results for a TTL. Job state
+is published to a job store; with the SQLite store, any uvicorn worker can
+report on a job and pass a cancel request on to the worker running it.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.core.tracing import current_traceparent, start_trace
+from app.services.job_store import JobStore, create_job_store
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+TERMINAL_STATES = {"succeeded", "failed", "cancelled"}
+
+CANCELLED_NOTE = ("Stopped before its next step. An agent call that was already running finishes in the "
+                  "background and its result is discarded.")
+
+
+class QueueFullError(Exception):
+    """The job queue has reached JOB_MAX_QUEUED"""
+
+
+class Job:
+    """A unit of background work and its observable state"""
+
+    def __init__(self, kind: str, func: Callable[["Job"], Awaitable[Any]], priority: str, params: Dict):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.func = func
+        self.priority = priority
+        self.params = params
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.expires_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.events: List[Dict] = []
+        self.traceparent = current_traceparent()
+        self._task: Optional[asyncio.Task] = None
+        self._subscribers: List[asyncio.Queue] = []
+        self._publish: Optional[Callable[["Job", Dict, int], None]] = None
+
+    def report(self, event: Dict):
+        """Record a progress event and push it to live subscribers and the job store"""
+        event = {**event, "job_id": self.id, "job_status": self.status, "timestamp": time.time()}
+        self.events.append(event)
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+        if self._publish is not None:
+            self._publish(self, event, len(self.events) - 1)
+
+    def _set_status(self, status: str, **extra):
+        self.status = status
+        self.report({"event": status, **extra})
+
+    def to_dict(self, include_result: bool = True) -> Dict:
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "priority": self.priority,
+            "params": self.params,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "expires_at": self.expires_at,
+            "error": self.error,
+            "progress": self.events[-1] if self.events else None
+        }
+        if self.started_at:
+            data["duration_ms"] = round(((self.finished_at or time.time()) - self.started_at) * 1000, 1)
+        if include_result:
+            data["result"] = self.result
+        return data
+
+
+class JobQueue:
+    """Priority queue served by a fixed number of asyncio workers"""
+
+    def __init__(self,
+                 workers: int = settings.JOB_WORKERS,
+                 max_queued: int = settings.JOB_MAX_QUEUED,
+                 result_ttl: int = settings.JOB_RESULT_TTL_SECONDS,
+                 store: Optional[JobStore] = None,
+                 poll_interval: float = settings.JOB_STORE_POLL_INTERVAL):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self.store = store if store is not None else create_job_store()
+        self.poll_interval = poll_interval
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._sequence = itertools.count()
+        self._worker_tasks: List[asyncio.Task] = []
+        self._reaper: Optional[asyncio.Task] = None
+        self._cancel_watcher: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._queue = asyncio.PriorityQueue()
+        self._worker_tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._reaper = asyncio.create_task(self._reap_expired())
+        if self.store.shared:
+            self._cancel_watcher = asyncio.create_task(self._watch_cancel_requests())
+        logger.info(f"✓ Job queue started with {self.workers} workers")
+
+    async def stop(self):
+        for job in self._jobs.values():
+            if job.status not in TERMINAL_STATES:
+                self.cancel(job.id)
+        for task in self._worker_tasks + [self._reaper, self._cancel_watcher]:
+            if task:
+                task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self.store.close()
+
+    def submit(self,
+               kind: str,
+               func: Callable[[Job], Awaitable[Any]],
+               priority: str = "normal",
+               params: Optional[Dict] = None) -> Job:
+        """Queue `func(job)`; raises QueueFullError when the backlog is full"""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}', use one of {list(PRIORITIES)}")
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running")
+        if self._queue.qsize() >= self.max_queued:
+            raise QueueFullError(f"Job queue is full ({self.max_queued} jobs waiting)")
+
+        job = Job(kind, func, priority, params or {})
+        job._publish = self._publish
+        self._jobs[job.id] = job
+        self._queue.put_nowait((PRIORITIES[priority], next(self._sequence), job.id))
+        job.report({"event": "queued", "queue_depth": self._queue.qsize()})
+        logger.info(f"📥 Queued job {job.id} ({kind}, priority={priority})")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """A job run by this worker"""
+        return self._jobs.get(job_id)
+
+    def view(self, job_id: str) -> Optional[Dict]:
+        """The state of a job run by this or, with a shared store, any other worker"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        data = self.store.load(job_id)
+        if data is None or (data.get("expires_at") or float("inf")) < time.time():
+            return None
+        return data
+
+    def events(self, job_id: str, after: int = -1) -> List[Dict]:
+        """Events of a job run by another worker, from the shared store"""
+        return self.store.events(job_id, after)
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """
+        Cancel a job. Returns "cancelled" for a job that had not started, and
+        "cancel_requested" for a running job (it stops at its next await
+        point) or one run by another worker; None if it is unknown or done.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return "cancel_requested" if self.store.request_cancel(job_id) else None
+        if job.status in TERMINAL_STATES:
+            return None
+        if job._task is not None:
+            if job.status != "cancel_requested":
+                job._set_status("cancel_requested")
+            job._task.cancel()
+            return "cancel_requested"
+        # Still queued: the worker that dequeues it will skip it
+        self._finish(job, "cancelled")
+        return "cancelled"
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._jobs[job_id]._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        job = self._jobs.get(job_id)
+        if job and queue in job._subscribers:
+            job._subscribers.remove(queue)
+
+    @staticmethod
+    async def _run_traced(job: Job) -> Any:
+        # Joins the trace of the request that submitted the job
+        with start_trace(f"job {job.kind}", job.traceparent, job_id=job.id, priority=job.priority):
+            return await job.func(job)
+
+    async def _worker(self, index: int):
+        while True:
+            _, _, job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.status != "queued":
+                continue
+
+            job.started_at = time.time()
+            job._set_status("running", worker=index)
+            job._task = asyncio.create_task(self._run_traced(job))
+            try:
+                job.result = await job._task
+                self._finish(job, "succeeded")
+            except asyncio.CancelledError:
+                worker_stopping = not job._task.cancelled()
+                self._finish(job, "cancelled", note=CANCELLED_NOTE)
+                if worker_stopping:
+                    raise
+            except Exception as e:
+                logger.error(f"Job {job.id} ({job.kind}) failed: {e}", exc_info=True)
+                job.error = str(e)
+                self._finish(job, "failed", error=str(e))
+
+    def _finish(self, job: Job, status: str, **extra):
+        job.finished_at = time.time()
+        job.expires_at = job.finished_at + self.result_ttl
+        job._task = None
+        job._set_status(status, **extra)
+        logger.info(f"📤 Job {job.id} {status}")
+
+    def _publish(self, job: Job, event: Dict, seq: int):
+        try:
+            self.store.save(self.owner, job.to_dict(), event, seq)
+        except Exception as e:
+            logger.error(f"Could not publish job {job.id} to the job store: {e}")
+
+    async def _watch_cancel_requests(self):
+        # Cancel requests that reached another worker are left in the shared store
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                requested = await asyncio.to_thread(self.store.cancel_requests, self.owner)
+            except Exception as e:
+                logger.error(f"Reading job cancel requests failed: {e}")
+                continue
+            for job_id in requested:
+                job = self._jobs.get(job_id)
+                if job is not None and job.status != "cancel_requested":
+                    self.cancel(job_id)
+
+    async def _reap_expired(self):
+        while True:
+            await asyncio.sleep(min(60, self.result_ttl))
+            now = time.time()
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.expires_at is not None and job.expires_at < now]
+            for job_id in expired:
+                del self._jobs[job_id]
+            try:
+                expired += [None] * await asyncio.to_thread(self.store.remove_expired, now)
+            except Exception as e:
+                logger.error(f"Removing expired jobs from the job store failed: {e}")
+            if expired:
+                logger.info(f"Removed {len(expired)} expired jobs")
+
+    def stats(self) -> Dict:
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queued": self.max_queued,
+            "jobs": counts
+        }
@@ -0,0 +1,157 @@
+"""
+Job Store
+Where the job queue publishes job state so that every uvicorn worker can
+answer status, event and cancel requests for a job, whichever worker runs it.
+The memory backend keeps jobs visible to their own worker only; the SQLite
+(WAL) backend is shared by every worker on a host, like the session store.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class JobStore:
+    """Interface for job state backends; the base class stores nothing"""
+
+    shared = False
+
+    def save(self, owner: str, job: Dict, event: Dict, seq: int) -> None:
+        """Record the state of a job run by `owner` and its `seq`-th event (0-based)"""
+
+    def load(self, job_id: str) -> Optional[Dict]:
+        """The job's last saved state, or None"""
+        return None
+
+    def events(self, job_id: str, after: int = -1) -> List[Dict]:
+        """The job's events with a sequence number above `after`"""
+        return []
+
+    def request_cancel(self, job_id: str) -> bool:
+        """Ask the worker running a job to cancel it; False if the job is unknown or finished"""
+        return False
+
+    def cancel_requests(self, owner: str) -> List[str]:
+        """Unfinished jobs of `owner` that another worker asked to cancel"""
+        return []
+
+    def remove_expired(self, now: float) -> int:
+        return 0
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteJobStore(JobStore):
+    """SQLite (WAL) job store shared by every worker on a host"""
+
+    shared = True
+
+    def __init__(self, db_path: str = settings.JOB_DB_PATH):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                status TEXT NOT NULL,
+                data TEXT NOT NULL,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                expires_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS job_events (
+                job_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (job_id, seq)
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_expiry ON jobs (expires_at);
+        """)
+        self._lock = threading.Lock()
+        logger.info(f"✓ SQLite job store ready at {db_path}")
+
+    def save(self, owner: str, job: Dict, event: Dict, seq: int) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    """
+                    INSERT INTO jobs (job_id, owner, status, data, expires_at) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(job_id) DO UPDATE SET
+                        status = excluded.status, data = excluded.data, expires_at = excluded.expires_at
+                    """,
+                    (job["job_id"], owner, job["status"], json.dumps(job, default=str), job["expires_at"])
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO job_events (job_id, seq, payload) VALUES (?, ?, ?)",
+                    (job["job_id"], seq, json.dumps(event, default=str))
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def load(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def events(self, job_id: str, after: int = -1) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq", (job_id, after)
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def request_cancel(self, job_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE job_id = ? AND status NOT IN "
+                "('succeeded', 'failed', 'cancelled')", (job_id,)
+            )
+        return cursor.rowcount > 0
+
+    def cancel_requests(self, owner: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id FROM jobs WHERE owner = ? AND cancel_requested = 1 AND status NOT IN "
+                "('succeeded', 'failed', 'cancelled')", (owner,)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def remove_expired(self, now: float) -> int:
+        with self._lock:
+            expired = [r[0] for r in self._conn.execute(
+                "SELECT job_id FROM jobs WHERE expires_at IS NOT NULL AND expires_at < ?", (now,)
+            ).fetchall()]
+            if expired:
+                self._conn.executemany("DELETE FROM job_events WHERE job_id = ?", [(j,) for j in expired])
+                self._conn.executemany("DELETE FROM jobs WHERE job_id = ?", [(j,) for j in expired])
+        return len(expired)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_job_store(backend: Optional[str] = None) -> JobStore:
+    """Create the job store configured by JOB_STORE_BACKEND"""
+    backend = (backend or settings.JOB_STORE_BACKEND).lower()
+    if backend == "sqlite":
+        return SQLiteJobStore()
+    if backend != "memory":
+        logger.warning(f"Unknown job store backend '{backend}', keeping jobs in memory")
+    return JobStore()
@@ -0,0 +1,258 @@
+"""
+Scheme Catalog
+Real Indian government schemes used for benefit matching and catalog lookups.
+Workers read it through `compiled_catalog.get_catalog()`, a memory-mapped
+compiled copy shared between processes.
+"""
+import re
+from typing import Any, Dict, List, Sequence
+
+from app.services.eligibility_rules import FAILED, evaluate_criteria
+
+
+SCHEME_CATALOG: List[Dict] = [
+    {
+        "scheme_name": "PM-KISAN (Pradhan Mantri Kisan Samman Nidhi)",
+        "department": "Ministry of Agriculture & Farmers Welfare",
+        "benefits": "₹6,000 per year in 3 installments",
+        "eligibility": "Small and marginal farmers with cultivable land up to 2 hectares",
+        "target_group": "Farmers, Agricultural workers",
+        "age_limit": "No age limit",
+        "income_limit": "No income limit for farmers",
+        "documents": "Land records, Aadhaar card, Bank account"
+    },
+    {
+        "scheme_name": "Ayushman Bharat - PM-JAY",
+        "department": "Ministry of Health and Family Welfare",
+        "benefits": "Health insurance coverage up to ₹5 lakh per family per year",
+        "eligibility": "Families identified through SECC 2011 data, economically vulnerable",
+        "target_group": "Poor and vulnerable families",
+        "age_limit": "No age limit",
+        "income_limit": "Based on SECC deprivation criteria",
+        "documents": "Aadhaar card, Ration card, SECC verification"
+    },
+    {
+        "scheme_name": "PM Mudra Yojana",
+        "department": "Ministry of Finance",
+        "benefits": "Loans up to ₹10 lakh for micro-enterprises",
+        "eligibility": "Small business owners, entrepreneurs, self-employed",
+        "target_group": "Entrepreneurs, Small businesses",
+        "age_limit": "18 years and above",
+        "income_limit": "For income-generating activities",
+        "documents": "Business plan, Identity proof, Address proof, Bank account"
+    },
+    {
+        "scheme_name": "National Scholarship Portal (NSP)",
+        "department": "Ministry of Education",
+        "benefits": "₹10,000 to ₹1,00,000 per year depending on category and course",
+        "eligibility": "Students from SC/ST/OBC/Minority communities, merit-based",
+        "target_group": "Students pursuing higher education",
+        "age_limit": "Varies by scholarship (typically under 30)",
+        "income_limit": "Family income below ₹2.5 lakh to ₹8 lakh (varies)",
+        "documents": "Educational certificates, Income certificate, Caste certificate, Bank account"
+    },
+    {
+        "scheme_name": "PM Awas Yojana (Urban & Rural)",
+        "department": "Ministry of Housing and Urban Affairs",
+        "benefits": "Subsidy on home loans, direct assistance for house construction (₹1.5-2.5 lakh)",
+        "eligibility": "Economically Weaker Section (EWS), Low Income Group (LIG), homeless",
+        "target_group": "Poor families, First-time homebuyers",
+        "age_limit": "21-70 years for credit-linked subsidy",
+        "income_limit": "EWS: up to ₹3 lakh/year, LIG: ₹3-6 lakh/year, MIG: ₹6-18 lakh/year",
+        "documents": "Income certificate, Identity proof, Property documents, Bank account"
+    },
+    {
+        "scheme_name": "Beti Bachao Beti Padhao",
+        "department": "Ministry of Women and Child Development",
+        "benefits": "Sukanya Samriddhi Account with attractive interest rates, girl child welfare",
+        "eligibility": "Girl child under 10 years of age",
+        "target_group": "Girl children and their parents",
+        "age_limit": "Account for girls below 10 years",
+        "income_limit": "No income limit",
+        "documents": "Birth certificate of girl child, Parents' identity and address proof"
+    },
+    {
+        "scheme_name": "PM Vishwakarma Yojana",
+        "department": "Ministry of Micro, Small & Medium Enterprises",
+        "benefits": "₹10,000-15,000 toolkit incentive, skill training, collateral-free loans up to ₹3 lakh",
+        "eligibility": "Traditional artisans and craftspeople (carpenters, goldsmiths, blacksmiths, etc.)",
+        "target_group": "Artisans, Craftspeople, Traditional workers",
+        "age_limit": "18 years and above",
+        "income_limit": "No specific limit for traditional workers",
+        "documents": "Identity proof, Proof of traditional work, Bank account"
+    },
+    {
+        "scheme_name": "National Pension Scheme (NPS) - APY",
+        "department": "Pension Fund Regulatory and Development Authority",
+        "benefits": "Guaranteed pension of ₹1,000-5,000 per month after 60 years",
+        "eligibility": "Indian citizens aged 18-40 years, unorganized sector workers",
+        "target_group": "Unorganized sector workers, Self-employed",
+        "age_limit": "18-40 years at enrollment",
+        "income_limit": "Primarily for those not covered under statutory social security",
+        "documents": "Aadhaar card, Mobile number, Bank account"
+    },
+    {
+        "scheme_name": "PM Kaushal Vikas Yojana (PMKVY)",
+        "department": "Ministry of Skill Development and Entrepreneurship",
+        "benefits": "Free skill training, ₹8,000 average reward on certification",
+        "eligibility": "Youth seeking employment, school/college dropouts",
+        "target_group": "Youth (15-45 years), Job seekers",
+        "age_limit": "Primarily 15-45 years",
+        "income_limit": "No specific limit",
+        "documents": "Aadhaar card, Educational certificates, Bank account"
+    },
+    {
+        "scheme_name": "Mahatma Gandhi National Rural Employment Guarantee Act (MGNREGA)",
+        "department": "Ministry of Rural Development",
+        "benefits": "100 days of guaranteed wage employment per year, ₹200-300 per day",
+        "eligibility": "Adult members of rural households willing to do unskilled manual work",
+        "target_group": "Rural households, Unemployed rural workers",
+        "age_limit": "18 years and above",
+        "income_limit": "No income limit",
+        "documents": "Job card, Aadhaar card, Bank account"
+    },
+    {
+        "scheme_name": "PM Ujjwala Yojana",
+        "department": "Ministry of Petroleum and Natural Gas",
+        "benefits": "Free LPG connection with ₹1,600 assistance",
+        "eligibility": "Women from BPL households, SECC 2011 beneficiaries",
+        "target_group": "BPL women, Poor households",
+        "age_limit": "Adult women (18+)",
+        "income_limit": "BPL families",
+        "documents": "BPL ration card, Aadhaar card, Address proof, Bank account"
+    },
+    {
+        "scheme_name": "PM Fasal Bima Yojana",
+        "department": "Ministry of Agriculture & Farmers Welfare",
+        "benefits": "Crop insurance - compensation for crop loss/damage",
+        "eligibility": "Farmers - owner cultivators and tenant farmers",
+        "target_group": "Farmers",
+        "age_limit": "No age limit",
+        "income_limit": "No income limit",
+        "documents": "Land records, Sowing certificate, Aadhaar card, Bank account"
+    },
+    {
+        "scheme_name": "Stand Up India Scheme",
+        "department": "Ministry of Finance",
+        "benefits": "Loans between ₹10 lakh to ₹1 crore for SC/ST/Women entrepreneurs",
+        "eligibility": "SC/ST and women entrepreneurs for greenfield enterprises",
+        "target_group": "SC/ST entrepreneurs, Women entrepreneurs",
+        "age_limit": "18 years and above",
+        "income_limit": "For setting up new enterprises",
+        "documents": "Business plan, Identity proof, Category certificate, Bank account"
+    },
+    {
+        "scheme_name": "PM Matru Vandana Yojana",
+        "department": "Ministry of Women and Child Development",
+        "benefits": "₹5,000 cash incentive for first living child",
+        "eligibility": "Pregnant and lactating women (first child)",
+        "target_group": "Pregnant women, New mothers",
+        "age_limit": "Pregnant women 19 years and above",
+        "income_limit": "All pregnant women except government employees",
+        "documents": "MCP card, Aadhaar card, Bank account, Child birth certificate"
+    },
+    {
+        "scheme_name": "Pradhan Mantri Jeevan Jyoti Bima Yojana (PMJJBY)",
+        "department": "Ministry of Finance",
+        "benefits": "₹2 lakh life insurance cover for ₹436/year premium",
+        "eligibility": "18-50 years age group with savings bank account",
+        "target_group": "Bank account holders",
+        "age_limit": "18-50 years (coverage up to 55)",
+        "income_limit": "No income limit",
+        "documents": "Savings bank account, Aadhaar card, Consent form"
+    }
+]
+
+
+def format_catalog_for_prompt(schemes: List[Dict] = SCHEME_CATALOG) -> str:
+    """Render catalog schemes as the numbered block used in LLM prompts"""
+    schemes_info = ""
+    for idx, scheme in enumerate(schemes, 1):
+        schemes_info += f"\n{idx}. {scheme['scheme_name']}\n"
+        schemes_info += f"   Department: {scheme['department']}\n"
+        schemes_info += f"   Benefits: {scheme['benefits']}\n"
+        schemes_info += f"   Eligibility: {scheme['eligibility']}\n"
+        schemes_info += f"   Target Group: {scheme['target_group']}\n"
+        schemes_info += f"   Age Limit: {scheme['age_limit']}\n"
+        schemes_info += f"   Income Limit: {scheme['income_limit']}\n"
+        schemes_info += f"   Documents: {scheme['documents']}\n"
+    return schemes_info
+
+
+def _scheme_text(scheme: Dict) -> str:
+    parts = []
+    for field in ("scheme_name", "target_group", "eligibility", "eligibility_criteria", "benefits"):
+        value = scheme.get(field)
+        if isinstance(value, dict):
+            value = " ".join(f"{k} {v}" for k, v in value.items())
+        if value:
+            parts.append(str(value))
+    return " ".join(parts).lower()
+
+
+def _outside_limits(criteria: Any, citizen_profile: Dict) -> bool:
+    """The citizen's age or income is known and outside the scheme's structured limits"""
+    if not isinstance(criteria, dict):
+        return False
+    limits = {k: v for k, v in criteria.items() if k in ("age", "income")}
+    return bool(limits) and any(r["status"] == FAILED for r in evaluate_criteria(limits, citizen_profile))
+
+
+def _benefit_text(scheme: Dict) -> str:
+    benefits = scheme.get("benefits", "N/A")
+    return benefits.get("description", "N/A") if isinstance(benefits, dict) else str(benefits)
+
+
+def match_catalog(citizen_profile: Dict, schemes: Sequence[Dict] = SCHEME_CATALOG, limit: int = 5) -> Dict:
+    """
+    Rank schemes by how many words of the citizen's profile appear in the
+    scheme's name, target group, eligibility and benefits. Schemes with
+    structured `eligibility_criteria` whose age or income limits the citizen
+    is outside of are ranked last rather than left out; the free-text
+    `age_limit` and `income_limit` are too loose to judge by. A deterministic
+    stand-in for LLM matching when the LLM is unavailable. A compiled
+    catalog narrows the schemes to check with its term index.
+    """
+    terms = {}
+    for key, value in (citizen_profile or {}).items():
+        if isinstance(value, str):
+            for word in re.findall(r"[a-z]+", value.lower()):
+                if len(word) >= 2:
+                    terms[word] = key
+
+    candidates = getattr(schemes, "candidates", None)
+    indexes = candidates(terms) if candidates else range(len(schemes))
+
+    ranked = []
+    for i in indexes:
+        scheme = schemes[i]
+        text = _scheme_text(scheme)
+        matched = [f"{terms[word]}: {word}" for word in terms
+                   if re.search(rf"\b{re.escape(word)}s?\b", text)]
+        if not matched:
+            continue
+        outside = _outside_limits(scheme.get("eligibility_criteria"), citizen_profile)
+        ranked.append((outside, len(matched), scheme, matched))
+    ranked.sort(key=lambda item: (item[0], -item[1]))
+    ranked = ranked[:limit]
+
+    best = max((score for _, score, _, _ in ranked), default=1)
+    recommendations = [
+        {
+            "scheme_name": scheme.get("scheme_name", "Unknown"),
+            "relevance_score": round(score / best, 2),
+            "why_suitable": f"Matches your profile ({', '.join(matched)})"
+                            + ("; your age or income may be outside its limits" if outside else ""),
+            "estimated_benefit": _benefit_text(scheme),
+            "priority": "low" if outside or rank >= 4 else ("high" if rank < 2 else "medium")
+        }
+        for rank, (outside, score, scheme, matched) in enumerate(ranked)
+    ]
+    return {
+        "recommendations": recommendations,
+        "total_potential_benefit": "Not estimated",
+        "summary": (f"Found {len(recommendations)} schemes whose target group or eligibility matches your profile. "
+                    "Check each scheme's criteria before applying.") if recommendations
+                   else "No schemes in our catalog clearly match your profile details.",
+        "source": "catalog"
+    }
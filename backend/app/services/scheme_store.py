@@ -0,0 +1,132 @@
+"""
+Scheme Version Store
+The last parsed version of each scheme document: its section hashes and
+texts, and the structured result. A revised document is diffed against it
+section by section so only changed sections are re-parsed. Every revision's
+field changelog is kept as well.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def section_hash(text: str) -> str:
+    """Hash of a section, insensitive to line wrapping and spacing"""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()[:32]
+
+
+def diff_sections(old: List[Tuple[str, str]], new: List[str]) -> Tuple[List[str], List[str]]:
+    """(sections of `new` not in `old`, sections of `old` no longer in `new`); `old` is (hash, text) pairs"""
+    old_hashes = {h for h, _ in old}
+    new_hashes = set()
+    changed = []
+    for text in new:
+        h = section_hash(text)
+        new_hashes.add(h)
+        if h not in old_hashes:
+            changed.append(text)
+    removed = [text for h, text in old if h not in new_hashes]
+    return changed, removed
+
+
+def field_changes(old: Dict, new: Dict, prefix: str = "") -> List[Dict]:
+    """Changed fields between two structured results, as dotted paths; lists compare whole"""
+    changes = []
+    for key in list(old) + [k for k in new if k not in old]:
+        path = f"{prefix}{key}"
+        before, after = old.get(key), new.get(key)
+        if isinstance(before, dict) and isinstance(after, dict):
+            changes.extend(field_changes(before, after, f"{path}."))
+        elif before != after:
+            changes.append({"field": path, "old": before, "new": after})
+    return changes
+
+
+class SchemeVersionStore:
+    """SQLite store of the latest version of each scheme, and its revision changelogs"""
+
+    def __init__(self, db_path: str = settings.SCHEME_STORE_PATH):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS schemes (
+                scheme_id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                updated_at REAL NOT NULL,
+                sections TEXT NOT NULL,
+                result TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS scheme_revisions (
+                scheme_id TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                mode TEXT NOT NULL,
+                changed_at REAL NOT NULL,
+                changelog TEXT NOT NULL,
+                PRIMARY KEY (scheme_id, version)
+            );
+        """)
+        logger.info(f"✓ Scheme version store ready at {db_path}")
+
+    def get(self, scheme_id: str) -> Optional[Dict]:
+        """The stored version: {version, sections: [(hash, text)], result}, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, sections, result FROM schemes WHERE scheme_id = ?", (scheme_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"version": row[0], "sections": [tuple(s) for s in json.loads(row[1])], "result": json.loads(row[2])}
+
+    def put(self, scheme_id: str, sections: List[str], result: Dict, mode: str, changelog: List[Dict]) -> int:
+        """Store a new version of a scheme and its changelog; returns the version number"""
+        now = time.time()
+        stored_sections = json.dumps([(section_hash(text), text) for text in sections], ensure_ascii=False)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT version FROM schemes WHERE scheme_id = ?", (scheme_id,)).fetchone()
+                version = (row[0] if row else 0) + 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO schemes (scheme_id, version, updated_at, sections, result) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (scheme_id, version, now, stored_sections, json.dumps(result, ensure_ascii=False))
+                )
+                self._conn.execute(
+                    "INSERT INTO scheme_revisions (scheme_id, version, mode, changed_at, changelog) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (scheme_id, version, mode, now, json.dumps(changelog, ensure_ascii=False, default=str))
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return version
+
+    def revisions(self, scheme_id: str) -> List[Dict]:
+        """Every stored revision of a scheme, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT version, mode, changed_at, changelog FROM scheme_revisions "
+                "WHERE scheme_id = ? ORDER BY version", (scheme_id,)
+            ).fetchall()
+        return [{"version": v, "mode": m, "changed_at": t, "changelog": json.loads(c)} for v, m, t, c in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,204 @@
+"""
+Workflow Engine
+Runs multi-agent workflows as a DAG of stages. A stage starts as soon as all of
+its dependencies have finished, so independent stages run concurrently.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from app.core.circuit_breaker import CircuitOpenError
+from app.core.tracing import span
+from app.services.agent_tasks import AGENT_ACTIONS, handle_action
+
+logger = logging.getLogger(__name__)
+
+
+class AgentExecutor:
+    """
+    Calls agent actions in-process, on a task worker, or on a remote agent.
+
+    Roles handed to task workers are dispatched over the task queue; an
+    agent this process hosts runs the action in a worker thread; any other
+    agent is called over MQTT at the address the registry gives for its
+    role's capabilities, when the role's Zynd client is on the real network.
+    """
+
+    def __init__(self, local_agents: Dict[str, Any], clients: Optional[Dict[str, Any]] = None):
+        self.local_agents = local_agents
+        self.clients = clients or {}
+
+    def mode_for(self, role: str) -> str:
+        client = self.clients.get(role)
+        if client is not None and client.task_messenger is not None:
+            return "worker"
+        if self.local_agents.get(role) is None and client is not None and not client.simulation_mode:
+            return "mqtt"
+        return "in_process"
+
+    def is_available(self, role: str) -> bool:
+        return self.mode_for(role) != "in_process" or self.local_agents.get(role) is not None
+
+    @staticmethod
+    def remote_agent(client: Any) -> str:
+        """DID of another agent on the network with the client's capabilities (discovery is cached)"""
+        for agent in client.discover_agents(client.capabilities, top_k=3):
+            did = agent.get("didIdentifier")
+            if did and did != client.agent_id:
+                return did
+        raise RuntimeError(f"No agent on the Zynd network serves {client.agent_name}")
+
+    async def call(self, action: str, payload: Dict) -> Any:
+        role = AGENT_ACTIONS[action][0]
+        mode = self.mode_for(role)
+        with span("agent.call", action=action, mode=mode):
+            return await self._call(role, mode, action, payload)
+
+    async def _call(self, role: str, mode: str, action: str, payload: Dict) -> Any:
+        try:
+            if mode == "worker":
+                reply = await self.clients[role].dispatch_task(action, payload)
+                return reply.get("result")
+            if mode == "mqtt":
+                client = self.clients[role]
+                target = await asyncio.to_thread(self.remote_agent, client)
+                reply = await client.request({"action": action, "payload": payload}, target=target)
+                return reply.get("result")
+        except CircuitOpenError as e:
+            # Workers or the remote agent keep failing; run locally if this process has the agent
+            if self.local_agents.get(role) is None:
+                raise
+            logger.warning(f"{e}; running {action} in-process")
+        return await asyncio.to_thread(handle_action, self.local_agents, action, payload)
+
+
+class Stage:
+    """
+    One node of a workflow DAG.
+
+    `depends_on` stages must complete for this stage to run; `waits_for`
+    stages are awaited but may fail without skipping this stage.
+    """
+
+    def __init__(self,
+                 name: str,
+                 agent: str,
+                 run: Callable[[Dict[str, Any]], Awaitable[Any]],
+                 depends_on: Iterable[str] = (),
+                 waits_for: Iterable[str] = ()):
+        self.name = name
+        self.agent = agent
+        self.run = run
+        self.depends_on = list(depends_on)
+        self.waits_for = list(waits_for)
+
+    @property
+    def upstream(self) -> List[str]:
+        return self.depends_on + self.waits_for
+
+
+class WorkflowEngine:
+    """Executes stages concurrently while respecting dependencies"""
+
+    def __init__(self,
+                 executor: AgentExecutor,
+                 on_progress: Optional[Callable[[Dict], None]] = None):
+        self.executor = executor
+        self.on_progress = on_progress
+
+    async def run(self, workflow: str, stages: List[Stage]) -> Dict:
+        by_name = {stage.name: stage for stage in stages}
+        for stage in stages:
+            missing = [d for d in stage.upstream if d not in by_name]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {missing}")
+
+        logger.info(f"🔄 Starting workflow '{workflow}' ({len(stages)} stages)")
+        started = time.perf_counter()
+        outputs: Dict[str, Any] = {}
+        records: Dict[str, Dict] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(stage: Stage):
+            # Wait for dependencies; a failed dependency skips this stage
+            await asyncio.gather(*(tasks[d] for d in stage.upstream))
+            record = {
+                "agent": stage.agent,
+                "depends_on": stage.upstream,
+                "mode": self.executor.mode_for(stage.agent)
+            }
+            records[stage.name] = record
+
+            failed_deps = [d for d in stage.depends_on if records[d]["status"] != "completed"]
+            if failed_deps:
+                record.update({"status": "skipped", "reason": f"dependency failed: {', '.join(failed_deps)}"})
+                self._progress(workflow, stage.name, record)
+                return
+
+            record["started_at_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            record["status"] = "running"
+            self._progress(workflow, stage.name, record)
+            stage_started = time.perf_counter()
+            try:
+                with span(f"stage.{stage.name}", workflow=workflow, agent=stage.agent):
+                    outputs[stage.name] = await stage.run(outputs)
+                record["status"] = "completed"
+            except Exception as e:
+                logger.error(f"Stage '{stage.name}' failed: {e}")
+                record.update({"status": "failed", "error": str(e)})
+            record["duration_ms"] = round((time.perf_counter() - stage_started) * 1000, 1)
+            logger.info(f"  {'✓' if record['status'] == 'completed' else '✗'} {stage.name} "
+                        f"({stage.agent}, {record['duration_ms']} ms)")
+            self._progress(workflow, stage.name, record)
+
+        # Tasks are created before any of them runs, so dependencies can await each other
+        for stage in self._topological_order(stages):
+            tasks[stage.name] = asyncio.ensure_future(run_stage(stage))
+        try:
+            await asyncio.gather(*tasks.values())
+        except asyncio.CancelledError:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        statuses = {record["status"] for record in records.values()}
+        status = "completed" if statuses == {"completed"} else ("failed" if "completed" not in statuses else "partial")
+        total_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"✓ Workflow '{workflow}' {status} in {total_ms} ms")
+
+        return {
+            "workflow": workflow,
+            "status": status,
+            "total_duration_ms": total_ms,
+            "stages": {
+                name: {**records[name], "output": outputs.get(name)} for name in by_name
+            }
+        }
+
+    def _topological_order(self, stages: List[Stage]) -> List[Stage]:
+        by_name = {stage.name: stage for stage in stages}
+        ordered, visiting, done = [], set(), set()
+
+        def visit(stage: Stage):
+            if stage.name in done:
+                return
+            if stage.name in visiting:
+                raise ValueError(f"Workflow has a cycle at stage '{stage.name}'")
+            visiting.add(stage.name)
+            for dep in stage.upstream:
+                visit(by_name[dep])
+            visiting.discard(stage.name)
+            done.add(stage.name)
+            ordered.append(stage)
+
+        for stage in stages:
+            visit(stage)
+        return ordered
+
+    def _progress(self, workflow: str, stage: str, record: Dict):
+        if self.on_progress:
+            try:
+                self.on_progress({"workflow": workflow, "stage": stage, **record})
+            except Exception as e:
+                logger.warning(f"Progress callback failed: {e}")
@@ -0,0 +1,106 @@
+"""
+Streaming JSON
+Incremental parsing of an LLM reply as it streams in. `JsonArrayStreamer`
+watches one array of the top-level object (e.g. `recommendations`) and hands
+back each object in it as soon as its closing brace arrives, without waiting
+for the rest of the reply. Text before the opening brace (a ```json fence) is
+skipped. Each chunk is scanned once, and the scan buffer only keeps the text
+from the start of the open item (or string) on, so the cost per chunk does
+not grow with the length of the reply.
+"""
+import json
+import re
+from typing import Any, List, Optional
+
+_STRUCTURAL = re.compile(r'[{}\[\]":,]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class JsonArrayStreamer:
+    """Feed reply chunks; `feed` returns the objects of the `key` array completed by that chunk"""
+
+    def __init__(self, key: str):
+        self.key = key
+        self._chunks: List[str] = []
+        self._buffer = ""    # unconsumed tail of the reply; offsets below are into it
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._array_depth: Optional[int] = None    # depth inside the watched array
+        self._item_start: Optional[int] = None
+        self.done = False    # the watched array has closed
+
+    @property
+    def text(self) -> str:
+        """The whole reply fed so far"""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def feed(self, chunk: str) -> List[Any]:
+        self._chunks.append(chunk)
+        items = []
+        text = self._buffer + chunk
+        pos = self._pos
+        while True:
+            if self._escaped:
+                # The character after a backslash is skipped whatever it is
+                if pos >= len(text):
+                    break
+                self._escaped = False
+                pos += 1
+                continue
+            # Jump to the next character that can change the parser state
+            match = (_STRING_SPECIAL if self._in_string else _STRUCTURAL).search(text, pos)
+            if match is None:
+                break
+            pos = match.start()
+            char = text[pos]
+            if self._in_string:
+                if char == "\\":
+                    self._escaped = True
+                else:
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = text[self._string_start:pos]
+            elif char == '"':
+                if self._depth > 0:
+                    self._in_string = True
+                    self._string_start = pos + 1
+            elif char in "{[":
+                if self._depth > 0 or char == "{":
+                    self._depth += 1
+                    if char == "[" and self._depth == 2 and self._current_key == self.key and not self.done:
+                        self._array_depth = 2
+                    elif self._array_depth is not None and self._depth == self._array_depth + 1:
+                        self._item_start = pos
+            elif char in "}]":
+                if self._depth > 0:
+                    self._depth -= 1
+                    if self._item_start is not None and self._depth == self._array_depth:
+                        items.append(json.loads(text[self._item_start:pos + 1]))
+                        self._item_start = None
+                    elif self._array_depth is not None and self._depth == self._array_depth - 1:
+                        self._array_depth = None
+                        self.done = True
+            elif self._depth == 1:
+                # ':' ends a key of the top-level object, ',' ends its value
+                self._current_key = self._last_string if char == ":" else None
+            pos += 1
+
+        # Drop what no open item or string can still need
+        keep = len(text)
+        if self._item_start is not None:
+            keep = min(keep, self._item_start)
+        if self._in_string:
+            keep = min(keep, self._string_start)
+        self._buffer = text[keep:]
+        self._pos = len(text) - keep
+        if self._item_start is not None:
+            self._item_start -= keep
+        self._string_start -= keep
+        return items
@@ -0,0 +1,78 @@
+"""
+LLM JSON helpers
+Models often wrap JSON replies in a markdown code block even when told not to.
+Replies requested with a schema are validated against their pydantic model.
+"""
+import json
+from typing import Any, Dict, Type
+
+from pydantic import BaseModel, ValidationError
+
+# Keywords strict structured outputs reject; pydantic still enforces them on the reply
+_UNSUPPORTED_KEYWORDS = {"default", "title", "minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum"}
+
+
+class LLMOutputError(ValueError):
+    """A reply that is not JSON (`kind` "json") or does not match its model (`kind` "schema")"""
+
+    def __init__(self, kind: str, message: str):
+        super().__init__(message)
+        self.kind = kind
+
+
+def strip_code_fences(text: str) -> str:
+    """Remove a surrounding ```json ... ``` (or bare ```) block and whitespace"""
+    cleaned = text.strip()
+    if cleaned.startswith("```json"):
+        cleaned = cleaned[7:]
+    elif cleaned.startswith("```"):
+        cleaned = cleaned[3:]
+    if cleaned.endswith("```"):
+        cleaned = cleaned[:-3]
+    return cleaned.strip()
+
+
+def parse_llm_json(text: str) -> Any:
+    """json.loads an LLM reply after stripping code fences; raises json.JSONDecodeError"""
+    return json.loads(strip_code_fences(text))
+
+
+def parse_llm_output(text: str, model: Type[BaseModel]) -> Dict:
+    """Parse and validate a reply against `model`; raises LLMOutputError"""
+    try:
+        data = parse_llm_json(text)
+    except json.JSONDecodeError as e:
+        raise LLMOutputError("json", f"Not valid JSON: {e}")
+    try:
+        return model.model_validate(data).to_result()
+    except ValidationError as e:
+        raise LLMOutputError("schema", f"Does not match {model.__name__}: {e.error_count()} error(s), "
+                                       f"first: {e.errors()[0]['loc']} {e.errors()[0]['msg']}")
+
+
+def _strict_schema(node: Any) -> Any:
+    if isinstance(node, list):
+        return [_strict_schema(item) for item in node]
+    if not isinstance(node, dict):
+        return node
+    strict = {}
+    for key, value in node.items():
+        if key in _UNSUPPORTED_KEYWORDS:
+            continue
+        if key in ("properties", "$defs"):
+            strict[key] = {name: _strict_schema(schema) for name, schema in value.items()}
+        else:
+            strict[key] = _strict_schema(value)
+    if strict.get("type") == "object":
+        strict["properties"] = strict.get("properties", {})
+        strict["required"] = list(strict["properties"])
+        strict["additionalProperties"] = False
+    return strict
+
+
+def response_format(model: Type[BaseModel]) -> Dict:
+    """OpenAI `response_format` constraining the reply to `model`'s JSON schema"""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": model.__name__, "strict": True, "schema": _strict_schema(model.model_json_schema())}
+    }
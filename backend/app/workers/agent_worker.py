@@ -0,0 +1,98 @@
+"""
+Agent Task Worker
+Runs a single agent type and consumes its task topic, so each agent role can
+be scaled on its own nodes. Workers of the same role share one subscription
+and compete for tasks.
+
+    python -m app.workers.agent_worker --agent policy_parser --concurrency 4
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import uuid
+from typing import Any, Optional
+
+from app.agents.loader import build_agent
+from app.config import settings
+from app.infrastructure.messaging import AgentMessenger
+from app.infrastructure.task_queue import AGENT_ROLES, create_task_broker, task_topic
+from app.services.agent_tasks import serve_agent_requests
+
+logger = logging.getLogger(__name__)
+
+
+class AgentWorker:
+    """Consumes the task topic of one agent role from a task broker"""
+
+    def __init__(self, role: str, agent: Any, broker, concurrency: int = settings.TASK_WORKER_CONCURRENCY):
+        if role not in AGENT_ROLES:
+            raise ValueError(f"Unknown agent role: {role}")
+        self.role = role
+        self.agent = agent
+        self.broker = broker
+        self.concurrency = concurrency
+        self.worker_id = f"{role}-worker-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.messenger = AgentMessenger(
+            agent_id=self.worker_id,
+            publish=lambda target, raw, message_type: broker.publish(target, raw)
+        )
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        await self.messenger.start()
+        self.broker.subscribe(task_topic(self.role), self.messenger.on_raw_message, group=self.role)
+        self._task = asyncio.create_task(
+            serve_agent_requests(self.messenger, {self.role: self.agent}, concurrency=self.concurrency)
+        )
+        logger.info(f"✓ {self.worker_id} consuming {task_topic(self.role)} (concurrency={self.concurrency})")
+
+    async def stop(self):
+        # Leave the group first so new tasks go to the remaining workers
+        self.broker.unsubscribe(task_topic(self.role), self.messenger.on_raw_message)
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        await self.messenger.stop()
+
+    def stats(self):
+        return {"worker_id": self.worker_id, "role": self.role, **self.messenger.stats()}
+
+
+async def run_worker(role: str, concurrency: int):
+    if settings.TASK_BROKER_URL.startswith("memory://"):
+        logger.warning("TASK_BROKER_URL is memory://, this worker can only serve tasks from its own process")
+
+    broker = create_task_broker(client_id=f"{role}-worker-{os.getpid()}")
+    worker = AgentWorker(role, build_agent(role), broker, concurrency=concurrency)
+    await worker.start()
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+    await stopping.wait()
+
+    logger.info(f"Stopping {worker.worker_id}")
+    await worker.stop()
+    if hasattr(broker, "close"):
+        broker.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one Policy Navigator agent as a task worker")
+    parser.add_argument("--agent", required=True, choices=AGENT_ROLES)
+    parser.add_argument("--concurrency", type=int, default=settings.TASK_WORKER_CONCURRENCY,
+                        help="tasks this worker runs at the same time")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(run_worker(args.agent, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Fake OpenAI Server
+A deterministic stand-in for the OpenAI chat completions API, so load tests
+do not spend API credits. Replies are canned per agent (picked from the system
+prompt), latency follows a seeded distribution, `stream: true` is answered
+with server-sent chunks, and a fraction of requests can be rejected with 429.
+
+    python -m benchmarks.fake_openai --port 8100 --latency lognormal:0.8,0.35 --rate-limit 0.02
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from typing import Dict, List, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+PARSED_SCHEME = {
+    "scheme_name": "PM Kisan Samman Nidhi",
+    "description": "Income support of Rs 6,000 per year to landholding farmer families",
+    "eligibility_criteria": {
+        "age": {"min": 18, "max": None},
+        "income": {"max": 200000, "currency": "INR"},
+        "occupation": ["farmer"],
+        "location": ["all India"]
+    },
+    "benefits": {"type": "cash", "amount": 6000, "frequency": "yearly",
+                 "description": "Rs 6,000 per year in three instalments"},
+    "required_documents": ["Aadhaar card", "Land records", "Bank account details"],
+    "application_process": "Apply online at pmkisan.gov.in or through the nearest CSC",
+    "deadline": None
+}
+
+ELIGIBILITY_RESULT = {
+    "is_eligible": True,
+    "confidence": 0.92,
+    "matched_criteria": ["age", "income", "occupation"],
+    "failed_criteria": [],
+    "explanation": "The citizen is a farmer aged between 18 and 60 with income below the limit.",
+    "recommendations": ["Keep land records and Aadhaar ready before applying"]
+}
+
+RECOMMENDATIONS = {
+    "recommendations": [
+        {"scheme_name": "PM-KISAN (Pradhan Mantri Kisan Samman Nidhi)", "relevance_score": 0.95,
+         "why_suitable": "The citizen is a farmer with a low income", "estimated_benefit": "Rs 6,000 per year",
+         "priority": "high", "application_process": "Register on pmkisan.gov.in"},
+        {"scheme_name": "PM Fasal Bima Yojana", "relevance_score": 0.82,
+         "why_suitable": "Crop insurance for farmers", "estimated_benefit": "Insurance cover for crop loss",
+         "priority": "medium", "application_process": "Apply through the bank or CSC"}
+    ],
+    "total_potential_benefit": "Rs 6,000 per year plus crop insurance",
+    "summary": "PM-KISAN and PM Fasal Bima Yojana are the best fit for this farmer."
+}
+
+ADVOCATE_REPLY = ("Based on what you have shared, you may be eligible for PM-KISAN, which pays Rs 6,000 a "
+                  "year to farmer families. Keep your Aadhaar card, land records and bank details ready, and "
+                  "apply at pmkisan.gov.in or at your nearest Common Service Centre.")
+
+# (substring of the system prompt, reply body)
+CANNED_REPLIES: List[Tuple[str, str]] = [
+    ("Policy Parser Agent", json.dumps(PARSED_SCHEME)),
+    ("Eligibility Verifier Agent", json.dumps(ELIGIBILITY_RESULT)),
+    ("Benefit Matcher Agent", json.dumps(RECOMMENDATIONS)),
+    ("welfare schemes advisor", json.dumps(RECOMMENDATIONS)),
+    ("Citizen Advocate Agent", ADVOCATE_REPLY),
+]
+
+
+class LatencyModel:
+    """
+    Seeded latency distribution, from a spec such as `fixed:0.5`,
+    `uniform:0.2,1.0`, `normal:0.8,0.2` or `lognormal:0.8,0.35` (median, sigma).
+    """
+
+    def __init__(self, spec: str, seed: int):
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(p) for p in params.split(",") if p]
+        self.random = random.Random(seed)
+        if kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self) -> float:
+        p = self.params
+        if self.kind == "fixed":
+            return p[0]
+        if self.kind == "uniform":
+            return self.random.uniform(p[0], p[1])
+        if self.kind == "normal":
+            return max(0.0, self.random.gauss(p[0], p[1]))
+        return self.random.lognormvariate(math.log(p[0]), p[1])
+
+
+def _count_tokens(text: str) -> int:
+    # Close enough to tiktoken for English prompts, and deterministic
+    return max(1, len(text) // 4)
+
+
+def create_app(latency: str = "lognormal:0.8,0.35",
+               rate_limit: float = 0.0,
+               stream_chunks: int = 12,
+               seed: int = 42) -> FastAPI:
+    app = FastAPI(title="Fake OpenAI")
+    latency_model = LatencyModel(latency, seed)
+    faults = random.Random(seed + 1)
+    stats = {"requests": 0, "rate_limited": 0, "streamed": 0}
+
+    def reply_for(messages: List[Dict]) -> str:
+        system = " ".join(m.get("content", "") for m in messages if m.get("role") == "system")
+        for marker, reply in CANNED_REPLIES:
+            if marker in system:
+                return reply
+        return ADVOCATE_REPLY
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        if rate_limit and faults.random() < rate_limit:
+            stats["rate_limited"] += 1
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after-ms": "200"},
+                content={"error": {"message": "Rate limit reached (injected)", "type": "requests",
+                                   "code": "rate_limit_exceeded"}}
+            )
+
+        messages = body.get("messages", [])
+        content = reply_for(messages)
+        model = body.get("model", "gpt-4o-mini")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        usage = {
+            "prompt_tokens": sum(_count_tokens(m.get("content", "")) for m in messages),
+            "completion_tokens": _count_tokens(content)
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        delay = latency_model.sample()
+
+        if body.get("stream"):
+            stats["streamed"] += 1
+            return StreamingResponse(_stream(completion_id, model, content, delay, stream_chunks, usage),
+                                     media_type="text/event-stream")
+
+        await asyncio.sleep(delay)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                         "finish_reason": "stop"}],
+            "usage": usage
+        }
+
+    return app
+
+
+async def _stream(completion_id: str, model: str, content: str, delay: float, chunks: int, usage: Dict):
+    """First token after a third of the delay, the rest spread over the remainder"""
+    size = max(1, math.ceil(len(content) / chunks))
+    pieces = [content[i:i + size] for i in range(0, len(content), size)]
+    await asyncio.sleep(delay / 3)
+    for i, piece in enumerate(pieces):
+        delta = {"role": "assistant", "content": piece} if i == 0 else {"content": piece}
+        yield _sse(completion_id, model, {"index": 0, "delta": delta, "finish_reason": None})
+        await asyncio.sleep(delay * 2 / 3 / len(pieces))
+    yield _sse(completion_id, model, {"index": 0, "delta": {}, "finish_reason": "stop"}, usage)
+    yield "data: [DONE]\n\n"
+
+
+def _sse(completion_id: str, model: str, choice: Dict, usage: Dict = None) -> str:
+    chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+             "model": model, "choices": [choice]}
+    if usage is not None:
+        chunk["usage"] = usage
+    return f"data: {json.dumps(chunk)}\n\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic local stand-in for the OpenAI chat API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", default="lognormal:0.8,0.35",
+                        help="fixed:S | uniform:LO,HI | normal:MEAN,SD | lognormal:MEDIAN,SIGMA (seconds)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--stream-chunks", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(create_app(args.latency, args.rate_limit, args.stream_chunks, args.seed),
+                host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Benchmark Fixtures
+Realistic inputs for the microbenchmarks, generated in code so nothing large
+is checked in: a national-scale scheme catalog, parsed schemes as the policy
+parser returns them, a verbose citizen profile, a long fenced LLM JSON reply,
+a gazette notification and a multi-hundred-page text PDF.
+"""
+import json
+import random
+import zlib
+from typing import Dict, List
+
+from app.services.scheme_catalog import SCHEME_CATALOG
+
+STATES = ["Uttar Pradesh", "Maharashtra", "Bihar", "West Bengal", "Madhya Pradesh", "Tamil Nadu",
+          "Rajasthan", "Karnataka", "Gujarat", "Andhra Pradesh", "Odisha", "Telangana", "Kerala", "Assam"]
+OCCUPATIONS = ["farmer", "student", "street vendor", "construction worker", "artisan", "fisherman",
+               "self-employed", "unemployed", "domestic worker", "weaver"]
+CATEGORIES = ["General", "OBC", "SC", "ST", "EWS"]
+
+PDF_PARAGRAPH = (
+    "The scheme provides financial assistance to eligible beneficiaries belonging to economically weaker "
+    "sections. Applicants must be residents of the State, aged between 18 and 60 years, with an annual "
+    "family income not exceeding Rs 2,50,000. Assistance is paid by direct benefit transfer to an Aadhaar "
+    "seeded bank account in three instalments. Applications are accepted at the Common Service Centre or "
+    "online through the departmental portal, together with an income certificate, caste certificate where "
+    "applicable, residence proof and a passport size photograph. The District Collector shall verify the "
+    "applications within thirty days of receipt and sanction the benefit."
+)
+
+
+def scheme_catalog(size: int = 1000, seed: int = 7) -> List[Dict]:
+    """SCHEME_CATALOG-shaped entries, as a state plus central catalog would hold"""
+    rng = random.Random(seed)
+    catalog = []
+    for i in range(size):
+        base = SCHEME_CATALOG[i % len(SCHEME_CATALOG)]
+        state = rng.choice(STATES)
+        scheme = dict(base)
+        scheme["scheme_name"] = f"{base['scheme_name']} - {state} #{i}"
+        scheme["eligibility"] = f"{base['eligibility']}; resident of {state}"
+        catalog.append(scheme)
+    return catalog
+
+
+def parsed_scheme(i: int, rng: random.Random) -> Dict:
+    """A scheme as PolicyParserAgent.parse_scheme_document returns it"""
+    min_age = rng.choice([0, 14, 18, 21, 60])
+    return {
+        "scheme_name": f"State Welfare Scheme {i}",
+        "department": f"Department of Social Justice, {rng.choice(STATES)}",
+        "description": PDF_PARAGRAPH[:240],
+        "eligibility_criteria": {
+            "age": {"min": min_age, "max": rng.choice([40, 60, 80, None])},
+            "income": {"max": rng.choice([100000, 250000, 800000]), "currency": "INR"},
+            "occupation": rng.sample(OCCUPATIONS, 3),
+            "location": rng.sample(STATES, 2),
+            "gender": rng.choice(["all", "female"]),
+            "caste": rng.sample(CATEGORIES, 2)
+        },
+        "benefits": {"type": "cash", "amount": rng.choice([1000, 6000, 12000, 50000]), "frequency": "yearly",
+                     "description": "Direct benefit transfer to the beneficiary's bank account"},
+        "required_documents": ["Aadhaar card", "Income certificate", "Residence proof", "Bank passbook"],
+        "application_process": "Apply at the nearest Common Service Centre or on the state portal",
+        "deadline": None
+    }
+
+
+def parsed_schemes(size: int = 1000, seed: int = 11) -> List[Dict]:
+    rng = random.Random(seed)
+    return [parsed_scheme(i, rng) for i in range(size)]
+
+
+def citizen_profile() -> Dict:
+    """A profile as filled in through the full web form, with free text"""
+    return {
+        "name": "Sunita Devi",
+        "age": 38,
+        "gender": "female",
+        "annual_income": 84000,
+        "occupation": "farmer",
+        "location": "Uttar Pradesh",
+        "district": "Barabanki",
+        "category": "OBC",
+        "family_size": 5,
+        "land_holding_hectares": 1.2,
+        "has_aadhaar": True,
+        "has_bank_account": True,
+        "has_ration_card": True,
+        "disability": "none",
+        "marital_status": "widowed",
+        "education": "8th pass",
+        "children": [{"age": 14, "in_school": True}, {"age": 9, "in_school": True}],
+        "notes": "Lost husband in 2022, grows wheat and mustard, needs support for children's education " * 3
+    }
+
+
+def llm_json_reply(recommendations: int = 200, seed: int = 3) -> str:
+    """A long find-benefits style reply, wrapped in a markdown code block"""
+    rng = random.Random(seed)
+    body = {
+        "recommendations": [
+            {
+                "scheme_name": SCHEME_CATALOG[i % len(SCHEME_CATALOG)]["scheme_name"],
+                "relevance_score": round(rng.random(), 2),
+                "why_suitable": PDF_PARAGRAPH[:rng.randint(120, 400)],
+                "estimated_benefit": f"Rs {rng.randint(1, 60) * 1000:,} per year",
+                "priority": rng.choice(["high", "medium", "low"]),
+                "application_process": "Visit the nearest CSC with Aadhaar and bank details"
+            }
+            for i in range(recommendations)
+        ],
+        "total_potential_benefit": "Rs 1,20,000 per year",
+        "summary": PDF_PARAGRAPH
+    }
+    return "```json\n" + json.dumps(body, indent=2, ensure_ascii=False) + "\n```"
+
+
+GAZETTE_PREAMBLE = """REGISTERED NO. DL-33004/99
+THE GAZETTE OF INDIA
+EXTRAORDINARY
+PART II - Section 3 - Sub-section (i)
+PUBLISHED BY AUTHORITY
+भारत का राजपत्र असाधारण प्राधिकार से प्रकाशित
+NOTIFICATION
+Whereas the State Government considers it necessary to provide support to the families referred to herein.
+Now, therefore, in exercise of the powers conferred by section 12 of the Act, the Governor is hereby pleased to make the following rules.
+These rules shall come into force on the date of their publication in the Official Gazette.
+"""
+
+GAZETTE_BODY = """Mukhyamantri Kanya Utthan Yojana
+Department of Women and Child Development
+1. Objective:
+The scheme aims to support the higher education of girls from economically weaker families.
+2. Eligibility:
+The applicant must be a resident of the State and aged between 17 and 25 years.
+The annual family income shall not exceeding Rs 2,50,000 from all sources.
+आवेदक राज्य की निवासी होनी चाहिए और परिवार की वार्षिक आय 2.5 लाख रुपये से अधिक नहीं होनी चाहिए।
+3. Benefits:
+Financial assistance of Rs 25,000 is paid by direct benefit transfer in two instalments.
+4. Documents required:
+Aadhaar card
+Income certificate issued by the Tehsildar
+Domicile certificate and bank passbook
+5. How to apply:
+Applications are submitted online on the scheme portal or at a Common Service Centre before 31 March.
+"""
+
+GAZETTE_CLAUSE = (
+    "{n}. The provisions of clause {m} shall be read with the rules notified earlier and any reference to "
+    "the said rules shall be construed accordingly, save as respects things done or omitted to be done "
+    "before such supersession."
+)
+
+GAZETTE_TABLE_ROW = "{n}    District {n}    Code {code}    Zone {zone}"
+
+
+def gazette_notice(clauses: int = 400, table_rows: int = 200) -> str:
+    """A long gazette notification: preamble, the scheme, pages of legal clauses and a district table"""
+    parts = [GAZETTE_PREAMBLE, GAZETTE_BODY]
+    parts.append("\n".join(GAZETTE_CLAUSE.format(n=i + 6, m=i + 1) for i in range(clauses)))
+    parts.append("SCHEDULE\n" + "\n".join(GAZETTE_TABLE_ROW.format(n=i + 1, code=1000 + i, zone=i % 7)
+                                           for i in range(table_rows)))
+    parts.append("By order of the Governor,\nSd/-\nPrincipal Secretary to the Government")
+    return "\n".join(parts)
+
+
+def text_pdf(pages: int = 300, lines_per_page: int = 45) -> bytes:
+    """A plain text PDF (Helvetica, compressed content streams) like a state gazette notification"""
+    words = PDF_PARAGRAPH.split()
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog_id = add(b"")
+    pages_id = add(b"")
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    page_ids = []
+    for page in range(pages):
+        lines = [f"Clause {page + 1}.{n + 1}: " + " ".join(words[(page + n) % 20:(page + n) % 20 + 14])
+                 for n in range(lines_per_page)]
+        text = "BT /F1 10 Tf 12 TL 50 780 Td " + " ".join(
+            "(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") '" for line in lines
+        ) + " ET"
+        stream = zlib.compress(text.encode("latin-1"))
+        content_id = add(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream
+                         + b"\nendstream")
+        page_ids.append(add(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+                            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+                            % (pages_id, font_id, content_id)))
+    objects[catalog_id - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % i for i in page_ids), len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref)
+    return bytes(out)
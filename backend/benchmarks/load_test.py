@@ -0,0 +1,327 @@
+"""
+Load Test
+Drives every route of app/routers/agents.py at a fixed concurrency and reports
+throughput, latency percentiles and server memory. By default it starts the
+fake OpenAI server and the API itself (pointed at the fake via
+OPENAI_BASE_URL), so runs are repeatable and cost nothing. Results are saved
+as JSON named after the git commit; pass `--compare` to diff two runs.
+
+    python -m benchmarks.load_test --concurrency 16 --requests 200
+    python -m benchmarks.load_test --scenarios chat,find-benefits --latency fixed:0.5
+    python -m benchmarks.load_test --compare benchmarks/results/<earlier>.json
+    python -m benchmarks.load_test --target http://staging:8000 --scenarios status
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+SCHEME_TEXT = (
+    "Pradhan Mantri Kisan Samman Nidhi (PM-KISAN). All landholding farmer families with annual income "
+    "below Rs 2 lakh are eligible for income support of Rs 6,000 per year, paid in three equal "
+    "instalments directly to the bank account. Applicants must be at least 18 years old. Required "
+    "documents: Aadhaar card, land records, bank passbook. Apply at pmkisan.gov.in or the nearest CSC."
+)
+PROFILE = {"age": 42, "annual_income": 90000, "occupation": "farmer", "location": "Uttar Pradesh",
+           "gender": "male", "category": "OBC"}
+CHAT_MESSAGES = [
+    "What documents do I need for PM-KISAN?",
+    "I am a 42 year old farmer in Uttar Pradesh, which schemes can I apply for?",
+    "How do I check the status of my PM Awas Yojana application?",
+    "Is there any scholarship for my daughter who is in class 11?",
+    "My income is 90,000 a year, am I eligible for Ayushman Bharat?",
+    "How can a small shop owner get a business loan from the government?",
+]
+
+
+def _parse_scheme(i: int) -> Dict:
+    return {"json": {"document_text": SCHEME_TEXT}}
+
+
+def _parse_scheme_file(i: int) -> Dict:
+    return {"files": {"file": ("scheme.txt", SCHEME_TEXT.encode(), "text/plain")}}
+
+
+def _verify(i: int) -> Dict:
+    return {"json": {"citizen_profile": PROFILE,
+                     "scheme_criteria": {"age": {"min": 18}, "income": {"max": 200000}, "occupation": ["farmer"]}}}
+
+
+def _find_benefits(i: int) -> Dict:
+    return {"json": {"citizen_profile": PROFILE, "available_schemes": []}}
+
+
+def _chat(i: int) -> Dict:
+    return {"json": {"message": CHAT_MESSAGES[i % len(CHAT_MESSAGES)], "session_id": f"load-{i % 50}"}}
+
+
+# Scenario name -> (method, path, request kwargs for the i-th request)
+SCENARIOS: Dict[str, tuple] = {
+    "parse-scheme": ("POST", "/api/parse-scheme", _parse_scheme),
+    "parse-scheme-file": ("POST", "/api/parse-scheme-file", _parse_scheme_file),
+    "verify-eligibility": ("POST", "/api/verify-eligibility", _verify),
+    "find-benefits": ("POST", "/api/find-benefits", _find_benefits),
+    "chat": ("POST", "/api/chat", _chat),
+    "status": ("GET", "/api/agents/status", lambda i: {}),
+    "test-communication": ("POST", "/api/agents/test-communication", lambda i: {}),
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        return None
+    return None
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def git_info() -> Dict:
+    """Commit under test, and whether app/ has uncommitted changes"""
+    return {"commit": _git("rev-parse", "--short", "HEAD") or "unknown",
+            "dirty": bool(_git("status", "--porcelain", "--", "app"))}
+
+
+class Servers:
+    """Starts the fake OpenAI server and the API as subprocesses"""
+
+    def __init__(self, latency: str, rate_limit: float, seed: int, verbose: bool = False):
+        self.fake_port = _free_port()
+        self.api_port = _free_port()
+        self.fake = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.fake_openai", "--port", str(self.fake_port),
+             "--latency", latency, "--rate-limit", str(rate_limit), "--seed", str(seed)],
+            cwd=BACKEND_DIR
+        )
+        output = None if verbose else subprocess.DEVNULL
+        env = dict(os.environ)
+        env.update({"OPENAI_BASE_URL": f"http://127.0.0.1:{self.fake_port}/v1", "OPENAI_API_KEY": "sk-load-test"})
+        for seed_var in ("POLICY_PARSER_SEED", "ELIGIBILITY_VERIFIER_SEED", "BENEFIT_MATCHER_SEED",
+                         "CITIZEN_ADVOCATE_SEED"):
+            env.setdefault(seed_var, "load-test")
+        env.setdefault("AGENT_EAGER_INIT", "policy_parser,eligibility_verifier,benefit_matcher,citizen_advocate")
+        self.api = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(self.api_port), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env, stdout=output, stderr=output
+        )
+        self.url = f"http://127.0.0.1:{self.api_port}"
+
+    async def wait_ready(self, timeout: float = 120.0):
+        deadline = time.monotonic() + timeout
+        async with httpx.AsyncClient() as client:
+            while time.monotonic() < deadline:
+                if self.api.poll() is not None:
+                    raise RuntimeError("API server exited during startup")
+                try:
+                    if (await client.get(f"{self.url}/ready")).status_code == 200:
+                        return
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.25)
+        raise RuntimeError("API server did not become ready")
+
+    def stop(self):
+        for proc in (self.api, self.fake):
+            proc.terminate()
+        for proc in (self.api, self.fake):
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+async def run_scenario(client: httpx.AsyncClient,
+                       name: str,
+                       requests: int,
+                       concurrency: int,
+                       warmup: int,
+                       server_pid: Optional[int]) -> Dict:
+    method, path, build = SCENARIOS[name]
+    for i in range(warmup):
+        await client.request(method, path, **build(i))
+
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    next_index = iter(range(requests))
+    memory: List[float] = []
+
+    async def worker():
+        for i in next_index:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **build(i))
+                statuses[str(response.status_code)] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    async def watch_memory():
+        while True:
+            value = rss_mb(server_pid)
+            if value is not None:
+                memory.append(value)
+            await asyncio.sleep(0.25)
+
+    watcher = asyncio.create_task(watch_memory()) if server_pid else None
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    if watcher:
+        watcher.cancel()
+        final = rss_mb(server_pid)
+        if final is not None:
+            memory.append(final)
+
+    latencies.sort()
+    ok = sum(count for status, count in statuses.items() if status.startswith("2"))
+    return {
+        "requests": len(latencies),
+        "ok": ok,
+        "statuses": dict(statuses),
+        "error_rate": round(1 - ok / len(latencies), 4) if latencies else 0.0,
+        "duration_s": round(elapsed, 2),
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+            "max": round(latencies[-1], 1) if latencies else 0.0
+        },
+        "rss_mb": {"start": memory[0], "peak": max(memory), "end": memory[-1]} if memory else None
+    }
+
+
+def print_report(results: Dict, baseline: Optional[Dict] = None):
+    header = f"{'scenario':<20}{'req':>6}{'err%':>7}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'rss MB':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results["scenarios"].items():
+        lat = r["latency_ms"]
+        rss = r["rss_mb"]["peak"] if r["rss_mb"] else "-"
+        print(f"{name:<20}{r['requests']:>6}{r['error_rate'] * 100:>6.1f}%{r['rps']:>9.1f}"
+              f"{lat['p50']:>9.1f}{lat['p95']:>9.1f}{lat['p99']:>9.1f}{rss:>9}")
+        base = (baseline or {}).get("scenarios", {}).get(name)
+        if base:
+            print(f"{'  vs ' + baseline['git']['commit']:<20}{'':>6}{'':>7}"
+                  f"{_delta(r['rps'], base['rps']):>9}{_delta(lat['p50'], base['latency_ms']['p50']):>9}"
+                  f"{_delta(lat['p95'], base['latency_ms']['p95']):>9}{_delta(lat['p99'], base['latency_ms']['p99']):>9}")
+
+
+def _delta(current: float, previous: float) -> str:
+    if not previous:
+        return "n/a"
+    return f"{(current - previous) / previous * 100:+.0f}%"
+
+
+async def run(args) -> Dict:
+    names = [n.strip() for n in args.scenarios.split(",")] if args.scenarios else list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {unknown}; choose from {list(SCENARIOS)}")
+
+    servers = None
+    url = args.target
+    if url is None:
+        servers = Servers(args.latency, args.rate_limit, args.seed, verbose=args.verbose)
+        url = servers.url
+    try:
+        if servers:
+            await servers.wait_ready()
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+            scenarios = {}
+            for name in names:
+                print(f"▶ {name}: {args.requests} requests at concurrency {args.concurrency}", flush=True)
+                scenarios[name] = await run_scenario(client, name, args.requests, args.concurrency, args.warmup,
+                                                     servers.api.pid if servers else None)
+    finally:
+        if servers:
+            servers.stop()
+
+    return {
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": git_info(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpus": os.cpu_count()},
+        "config": {"target": args.target or "local", "concurrency": args.concurrency, "requests": args.requests,
+                   "warmup": args.warmup, "latency": args.latency, "rate_limit": args.rate_limit, "seed": args.seed},
+        "scenarios": scenarios
+    }
+
+
+def save(results: Dict, output_dir: str) -> str:
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    suffix = f"-{results['label']}" if results["label"] else ""
+    path = os.path.join(output_dir, f"{stamp}-{results['git']['commit']}{suffix}.json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Policy Navigator API")
+    parser.add_argument("--target", help="URL of a running API; by default one is started against the fake OpenAI")
+    parser.add_argument("--scenarios", help=f"comma separated, default all: {','.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="requests per scenario")
+    parser.add_argument("--warmup", type=int, default=3, help="unrecorded requests per scenario")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--latency", default="lognormal:0.8,0.35", help="fake OpenAI latency distribution")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="fraction of LLM calls answered with 429")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--label", default="", help="suffix for the results file")
+    parser.add_argument("--output", default=RESULTS_DIR)
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--verbose", action="store_true", help="show the API server's logs")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print()
+    print_report(results, baseline)
+    print(f"\nSaved {save(results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+Microbenchmarks
+Times the CPU-bound work done on every request besides the LLM call: prompt
+formatting, catalog rendering, JSON extraction from replies, eligibility rule
+extraction and PDF text extraction, on the realistic inputs in fixtures.py.
+
+Each benchmark reports per-call milliseconds over several timed repeats.
+`--check` fails (exit 1) when a median exceeds its limit in
+microbench_thresholds.json; `--compare` fails when a median is more than
+`--max-regression` slower than an earlier run. Refresh the limits after an
+intended change with `--update-thresholds`.
+
+    python -m benchmarks.microbench
+    python -m benchmarks.microbench --only format_schemes,parse_llm_json --repeat 10
+    python -m benchmarks.microbench --check --compare benchmarks/results/<earlier>.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+from typing import Callable, Dict, List, Optional
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+for _seed_var in ("POLICY_PARSER_SEED", "ELIGIBILITY_VERIFIER_SEED", "BENEFIT_MATCHER_SEED", "CITIZEN_ADVOCATE_SEED"):
+    os.environ.setdefault(_seed_var, "benchmark")
+os.environ.setdefault("METRICS_ENABLED", "false")
+os.environ.setdefault("TRACING_ENABLED", "false")
+
+from benchmarks import fixtures  # noqa: E402
+from benchmarks.load_test import RESULTS_DIR, git_info, percentile, save  # noqa: E402
+
+THRESHOLDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "microbench_thresholds.json")
+# Headroom over the measured medians when --update-thresholds rewrites the limits
+THRESHOLD_HEADROOM = 2.0
+
+# name -> setup; setup builds the fixtures once and returns the zero-argument call to time
+BENCHMARKS: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def benchmark(name: str):
+    def register(setup: Callable[[], Callable[[], object]]):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def _benefit_matcher():
+    # The formatting helpers do not touch the LLM, so skip building one
+    from app.agents.benefit_matcher import BenefitMatcherAgent
+    return BenefitMatcherAgent.__new__(BenefitMatcherAgent)
+
+
+@benchmark("format_schemes")
+def _format_schemes():
+    matcher = _benefit_matcher()
+    schemes = fixtures.parsed_schemes(1000)
+    return lambda: matcher._format_schemes(schemes)
+
+
+@benchmark("format_citizen")
+def _format_citizen():
+    from app.models.citizen_profile import CitizenProfile
+    matcher = _benefit_matcher()
+    # Routes validate the payload into a CitizenProfile once per request
+    profile = CitizenProfile.coerce(fixtures.citizen_profile())
+    return lambda: matcher._format_citizen(profile)
+
+
+@benchmark("coerce_citizen_profile")
+def _coerce_profile():
+    from app.models.citizen_profile import CitizenProfile
+    profile = fixtures.citizen_profile()
+    return lambda: CitizenProfile.coerce(profile).render()
+
+
+@benchmark("format_catalog_for_prompt")
+def _format_catalog():
+    from app.services.scheme_catalog import format_catalog_for_prompt
+    catalog = fixtures.scheme_catalog(1000)
+    return lambda: format_catalog_for_prompt(catalog)
+
+
+@benchmark("build_find_benefits_prompt")
+def _build_prompt():
+    from app.models.citizen_profile import CitizenProfile
+    from app.routers.agents import build_find_benefits_prompt, compile_find_benefits_prompt
+    assembler = compile_find_benefits_prompt(fixtures.scheme_catalog(1000))
+    profile = CitizenProfile.coerce(fixtures.citizen_profile())
+    return lambda: build_find_benefits_prompt(profile, assembler)
+
+
+@benchmark("assemble_agent_input")
+def _assemble_input():
+    from app.core.prompt_assembly import PromptAssembler, Section
+    from app.agents.benefit_matcher import BENEFIT_MATCHER_PROMPT
+    matcher = _benefit_matcher()
+    assembler = PromptAssembler("benchmark", BENEFIT_MATCHER_PROMPT, 12000)
+    schemes = fixtures.parsed_schemes(1000)
+    citizen = matcher._format_citizen(fixtures.citizen_profile())
+    # A catalog far over budget, so the item truncation path is timed
+    return lambda: assembler.assemble([
+        Section("schemes", [matcher._format_scheme(i, s) for i, s in enumerate(schemes, 1)], priority=1),
+        Section("citizen", citizen, required=True)
+    ])
+
+
+@benchmark("extract_scheme_document")
+def _extract_document():
+    from app.services.document_extractor import extract_relevant
+    document = fixtures.gazette_notice()
+    return lambda: extract_relevant(document, 6000)
+
+
+@benchmark("match_catalog")
+def _match_catalog():
+    from app.services.scheme_catalog import match_catalog
+    catalog = fixtures.scheme_catalog(1000)
+    profile = fixtures.citizen_profile()
+    return lambda: match_catalog(profile, catalog)
+
+
+def _compiled_catalog_path() -> str:
+    import tempfile
+    from app.services.compiled_catalog import compile_catalog
+    path = os.path.join(tempfile.mkdtemp(prefix="microbench-"), "scheme_catalog.bin")
+    return compile_catalog(fixtures.scheme_catalog(1000), path)
+
+
+@benchmark("open_compiled_catalog")
+def _open_compiled_catalog():
+    from app.services.compiled_catalog import CompiledCatalog
+    path = _compiled_catalog_path()
+    return lambda: CompiledCatalog(path).close()
+
+
+@benchmark("match_catalog_compiled")
+def _match_catalog_compiled():
+    from app.services.compiled_catalog import CompiledCatalog
+    from app.services.scheme_catalog import match_catalog
+    catalog = CompiledCatalog(_compiled_catalog_path())
+    profile = fixtures.citizen_profile()
+    return lambda: match_catalog(profile, catalog)
+
+
+@benchmark("parse_llm_json")
+def _parse_llm_json():
+    from app.utils.llm_json import parse_llm_json
+    reply = fixtures.llm_json_reply(200)
+    return lambda: parse_llm_json(reply)
+
+
+@benchmark("stream_recommendations")
+def _stream_recommendations():
+    from app.utils.json_stream import JsonArrayStreamer
+    reply = fixtures.llm_json_reply(200)
+    # Roughly the size of the deltas OpenAI streams
+    chunks = [reply[i:i + 16] for i in range(0, len(reply), 16)]
+
+    def run():
+        streamer = JsonArrayStreamer("recommendations")
+        return [item for chunk in chunks for item in streamer.feed(chunk)]
+    return run
+
+
+@benchmark("extract_eligibility_rules")
+def _extract_rules():
+    from app.agents.policy_parser import PolicyParserAgent
+    parser = PolicyParserAgent.__new__(PolicyParserAgent)
+    schemes = fixtures.parsed_schemes(1000)
+    return lambda: [parser.extract_eligibility_rules(scheme) for scheme in schemes]
+
+
+@benchmark("extract_text_from_pdf")
+def _extract_pdf():
+    from app.routers.agents import extract_text_from_file
+    contents = fixtures.text_pdf(300)
+    return lambda: extract_text_from_file(contents, "gazette.pdf")
+
+
+def measure(fn: Callable[[], object], repeat: int, min_time: float) -> Dict:
+    """Per-call times over `repeat` runs of a loop long enough to last `min_time` seconds"""
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.1))
+    times = sorted(t / number * 1000 for t in timer.repeat(repeat, number))
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min_ms": round(times[0], 4),
+        "median_ms": round(percentile(times, 50), 4),
+        "p95_ms": round(percentile(times, 95), 4),
+        "max_ms": round(times[-1], 4)
+    }
+
+
+def run(names: List[str], repeat: int, min_time: float) -> Dict:
+    benchmarks = {}
+    for name in names:
+        fn = BENCHMARKS[name]()
+        fn()    # warm up imports and caches outside the timing
+        benchmarks[name] = measure(fn, repeat, min_time)
+        print(f"▶ {name}: {benchmarks[name]['median_ms']:.3f} ms", flush=True)
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": git_info(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpus": os.cpu_count()},
+        "config": {"repeat": repeat, "min_time": min_time},
+        "benchmarks": benchmarks
+    }
+
+
+def regressions(results: Dict, thresholds: Optional[Dict], baseline: Optional[Dict],
+                max_regression: float) -> List[str]:
+    failures = []
+    for name, r in results["benchmarks"].items():
+        limit = (thresholds or {}).get(name)
+        if limit is not None and r["median_ms"] > limit:
+            failures.append(f"{name}: median {r['median_ms']:.3f} ms over the {limit:.3f} ms threshold")
+        base = (baseline or {}).get("benchmarks", {}).get(name)
+        if base and r["median_ms"] > base["median_ms"] * (1 + max_regression):
+            failures.append(f"{name}: median {r['median_ms']:.3f} ms vs {base['median_ms']:.3f} ms "
+                            f"in {baseline['git']['commit']}")
+    return failures
+
+
+def print_report(results: Dict, thresholds: Optional[Dict], baseline: Optional[Dict]):
+    header = f"{'benchmark':<28}{'calls':>9}{'min':>10}{'median':>10}{'p95':>10}{'limit':>10}{'vs base':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results["benchmarks"].items():
+        limit = (thresholds or {}).get(name)
+        base = (baseline or {}).get("benchmarks", {}).get(name)
+        delta = f"{(r['median_ms'] - base['median_ms']) / base['median_ms'] * 100:+.0f}%" if base else "-"
+        print(f"{name:<28}{r['number']:>9}{r['min_ms']:>10.3f}{r['median_ms']:>10.3f}{r['p95_ms']:>10.3f}"
+              f"{limit if limit is not None else '-':>10}{delta:>9}")
+
+
+def load_thresholds() -> Dict[str, float]:
+    if not os.path.exists(THRESHOLDS_PATH):
+        return {}
+    with open(THRESHOLDS_PATH) as f:
+        return json.load(f)["median_ms"]
+
+
+def write_thresholds(results: Dict):
+    limits = load_thresholds()
+    for name, r in results["benchmarks"].items():
+        limits[name] = round(r["median_ms"] * THRESHOLD_HEADROOM, 3)
+    with open(THRESHOLDS_PATH, "w") as f:
+        json.dump({"headroom": THRESHOLD_HEADROOM, "measured_at": results["git"]["commit"],
+                   "median_ms": dict(sorted(limits.items()))}, f, indent=2)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark the CPU-bound request paths")
+    parser.add_argument("--only", help=f"comma separated, default all: {','.join(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=7, help="timed runs per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timed run")
+    parser.add_argument("--check", action="store_true", help="fail when a median exceeds its threshold")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="allowed slowdown vs --compare, as a fraction")
+    parser.add_argument("--update-thresholds", action="store_true",
+                        help=f"rewrite the thresholds as {THRESHOLD_HEADROOM}x the measured medians")
+    parser.add_argument("--label", default="micro", help="suffix for the results file")
+    parser.add_argument("--output", default=RESULTS_DIR)
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        raise SystemExit(f"Unknown benchmarks: {unknown}; choose from {list(BENCHMARKS)}")
+
+    results = run(names, args.repeat, args.min_time)
+    results["label"] = args.label
+    thresholds = load_thresholds()
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print()
+    print_report(results, thresholds, baseline)
+    print(f"\nSaved {save(results, args.output)}")
+
+    if args.update_thresholds:
+        write_thresholds(results)
+        print(f"Updated {THRESHOLDS_PATH}")
+        return
+    failures = regressions(results, thresholds if args.check else None, baseline, args.max_regression)
+    if failures:
+        print("\n❌ Regressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Settings that have no default; tests never reach the network with them
+for name in ("POLICY_PARSER_SEED", "ELIGIBILITY_VERIFIER_SEED", "BENEFIT_MATCHER_SEED", "CITIZEN_ADVOCATE_SEED"):
+    os.environ.setdefault(name, "test-seed")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+# Spans are recorded but not written to ./data
+os.environ.setdefault("TRACE_EXPORT_PATH", "")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
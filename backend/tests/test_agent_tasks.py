@@ -0,0 +1,148 @@
+import asyncio
+import json
+import os
+import threading
+
+import pytest
+
+from app.infrastructure.messaging import AgentMessenger, InProcessBroker, NoConsumerError, build_envelope
+from app.services.agent_tasks import serve_agent_requests
+
+TOPIC = "tasks/eligibility_verifier"
+
+
+class SlowVerifier:
+    """Blocks every verification until `release` is set"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+
+    def verify_eligibility(self, citizen_profile, scheme_criteria):
+        self.calls.append(citizen_profile["name"])
+        self.release.wait(5)
+        return {"is_eligible": True, "name": citizen_profile["name"]}
+
+
+def task(name):
+    return {"action": "verify_eligibility", "payload": {"citizen_profile": {"name": name}}}
+
+
+async def start_worker(broker, verifier, concurrency):
+    worker = AgentMessenger("worker", publish=lambda target, raw, message_type: broker.publish(target, raw))
+    await worker.start()
+    broker.subscribe(TOPIC, worker.on_raw_message, group="eligibility_verifier")
+    return worker, asyncio.create_task(
+        serve_agent_requests(worker, {"eligibility_verifier": verifier}, concurrency=concurrency)
+    )
+
+
+async def start_dispatcher(broker):
+    dispatcher = AgentMessenger("dispatcher", publish=lambda target, raw, message_type: broker.publish(target, raw))
+    await dispatcher.start()
+    broker.subscribe("dispatcher", dispatcher.on_raw_message)
+    return dispatcher
+
+
+def test_saturated_worker_acks_on_receipt():
+    async def scenario():
+        broker = InProcessBroker()
+        verifier = SlowVerifier()
+        worker, serving = await start_worker(broker, verifier, concurrency=1)
+        dispatcher = await start_dispatcher(broker)
+
+        requests = [
+            asyncio.create_task(dispatcher.request(TOPIC, task(name), message_type="task", timeout=5,
+                                                   ack_timeout=0.1, max_attempts=2))
+            for name in ("a", "b", "c")
+        ]
+        # Longer than the ack timeout while the single slot is busy
+        await asyncio.sleep(0.3)
+        assert verifier.calls == ["a"]
+        verifier.release.set()
+        replies = await asyncio.gather(*requests)
+        serving.cancel()
+        return replies, verifier.calls, dispatcher.stats()
+
+    replies, calls, stats = asyncio.run(scenario())
+    assert [r["payload"]["result"]["name"] for r in replies] == ["a", "b", "c"]
+    assert calls == ["a", "b", "c"]
+    assert stats["redeliveries"] == 0
+    assert stats["acks"] == 3
+
+
+def test_redelivered_request_runs_once():
+    async def scenario():
+        broker = InProcessBroker()
+        verifier = SlowVerifier()
+        worker, serving = await start_worker(broker, verifier, concurrency=2)
+        sent = []
+        broker.subscribe("dispatcher", lambda raw: sent.append(json.loads(raw)["message_type"]))
+
+        raw = json.dumps(build_envelope("dispatcher", task("a"), "task", reply_to="dispatcher"))
+        broker.publish(TOPIC, raw)
+        await asyncio.sleep(0.05)
+        # Redelivered while running: acknowledged again
+        broker.publish(TOPIC, raw)
+        await asyncio.sleep(0.05)
+        verifier.release.set()
+        for _ in range(100):
+            if "reply" in sent:
+                break
+            await asyncio.sleep(0.01)
+        # Redelivered after finishing: answered from the stored result
+        broker.publish(TOPIC, raw)
+        await asyncio.sleep(0.05)
+        serving.cancel()
+        return sent, verifier.calls
+
+    sent, calls = asyncio.run(scenario())
+    assert calls == ["a"]
+    assert sent == ["ack", "ack", "reply", "reply"]
+
+
+def test_missing_consumer_raises():
+    async def scenario():
+        dispatcher = await start_dispatcher(InProcessBroker())
+        await dispatcher.request(TOPIC, task("a"), message_type="task", timeout=1, ack_timeout=0.05,
+                                 max_attempts=2)
+
+    with pytest.raises(NoConsumerError):
+        asyncio.run(scenario())
+
+
+class EchoParser:
+    def parse_scheme_document(self, document):
+        return {"length": len(document)}
+
+
+def test_large_task_reaches_one_of_two_grouped_workers():
+    async def scenario():
+        broker = InProcessBroker()
+        published = []
+        for n in range(2):
+            worker = AgentMessenger(f"parser-{n}",
+                                    publish=lambda target, raw, message_type: broker.publish(target, raw))
+            await worker.start()
+            broker.subscribe("tasks/policy_parser", worker.on_raw_message, group="policy_parser")
+            asyncio.create_task(serve_agent_requests(worker, {"policy_parser": EchoParser()}))
+
+        def publish(target, raw, message_type):
+            published.append(target)
+            return broker.publish(target, raw)
+
+        dispatcher = AgentMessenger("dispatcher", publish=publish, max_frame_bytes=0)
+        await dispatcher.start()
+        broker.subscribe("dispatcher", dispatcher.on_raw_message)
+        # Barely compressible, so it would span several default-sized frames
+        document = os.urandom(512 * 1024).hex()
+        reply = await dispatcher.request("tasks/policy_parser",
+                                         {"action": "parse_scheme", "payload": {"document": document}},
+                                         message_type="task", timeout=10, ack_timeout=2, max_attempts=3)
+        return reply, published, dispatcher.stats()
+
+    reply, published, stats = asyncio.run(scenario())
+    assert reply["payload"]["result"] == {"length": 1024 * 1024}
+    assert published == ["tasks/policy_parser"]
+    assert stats["compressed"] == 1
+    assert stats["redeliveries"] == 0
@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def tripped(**kwargs):
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=0.01, half_open_max_calls=1, **kwargs)
+    with pytest.raises(ValueError):
+        breaker.call(_fail)
+    assert breaker.state == OPEN
+    time.sleep(0.02)
+    assert breaker.state == HALF_OPEN
+    return breaker
+
+
+def _fail():
+    raise ValueError("down")
+
+
+def test_opens_and_recovers():
+    breaker = tripped()
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens():
+    breaker = tripped()
+    with pytest.raises(ValueError):
+        breaker.call(_fail)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "ok")
+
+
+def test_cancelled_probe_releases_its_slot():
+    breaker = tripped()
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(breaker.call_async(asyncio.sleep, 1), 0.01)
+        assert breaker.state == HALF_OPEN
+        return await breaker.call_async(asyncio.sleep, 0, "ok")
+
+    assert asyncio.run(scenario()) == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_interrupted_sync_probe_releases_its_slot():
+    breaker = tripped()
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        breaker.call(interrupted)
+    assert breaker.call(lambda: "ok") == "ok"
@@ -0,0 +1,90 @@
+import pytest
+
+from app.models.citizen_profile import Category, CitizenProfile, Gender, Occupation
+
+
+def test_normalizes_known_fields():
+    profile = CitizenProfile.from_dict({
+        "Age": "34", "income": "₹2.5 lakh", "gender": "Mahila", "caste": "sc",
+        "occupation": "farmers", "state": " Bihar ", "land": "2 acres"
+    })
+    assert profile.age == 34
+    assert profile.annual_income == 250000
+    assert profile.gender is Gender.FEMALE
+    assert profile.category is Category.SC
+    assert profile.occupation is Occupation.FARMER
+    assert profile.state == "Bihar"
+    assert profile.extra == {"land": "2 acres"}
+
+
+def test_monthly_income_is_annualized():
+    assert CitizenProfile.from_dict({"monthly_income": "15,000"}).annual_income == 180000
+    assert CitizenProfile.from_dict({"income": "Rs. 20000 per month"}).annual_income == 240000
+
+
+@pytest.mark.parametrize("title, gender", [
+    ("Ms", Gender.FEMALE), ("Mrs", Gender.FEMALE), ("Miss", Gender.FEMALE), ("Smt", Gender.FEMALE),
+    ("Mr", Gender.MALE), ("Shri", Gender.MALE), ("M", Gender.MALE), ("F", Gender.FEMALE),
+])
+def test_honorifics(title, gender):
+    assert CitizenProfile.from_dict({"gender": title}).gender is gender
+
+
+def test_plural_strips_one_s_only():
+    assert CitizenProfile.from_dict({"occupation": "weavers"}).occupation is Occupation.WEAVER
+    profile = CitizenProfile.from_dict({"gender": "ss"})
+    assert profile.gender is None
+    assert profile["gender"] == "ss"
+
+
+def test_income_range_is_kept_raw():
+    profile = CitizenProfile.from_dict({"income": "1.5-2.5 lakh"})
+    assert profile.annual_income is None
+    assert profile["income"] == "1.5-2.5 lakh"
+
+
+def test_age_range_is_kept_raw():
+    profile = CitizenProfile.from_dict({"age": "25-30"})
+    assert profile.age is None
+    assert profile["age"] == "25-30"
+
+
+def test_blank_age_is_dropped():
+    assert "age" not in CitizenProfile.from_dict({"age": 0})
+
+
+@pytest.mark.parametrize("payload", [
+    {"location": "Uttar Pradesh", "state": "Bihar"},
+    {"state": "Bihar", "location": "Uttar Pradesh"},
+])
+def test_state_preferred_over_location(payload):
+    profile = CitizenProfile.from_dict(payload)
+    assert profile.state == "Bihar"
+    assert profile["location"] == "Uttar Pradesh"
+
+
+def test_annual_income_preferred_over_monthly():
+    profile = CitizenProfile.from_dict({"monthly_income": 10000, "annual_income": 100000})
+    assert profile.annual_income == 100000
+    assert profile["monthly_income"] == 10000
+
+
+def test_canonical_hash_ignores_spelling_and_order():
+    a = CitizenProfile.from_dict({"gender": "woman", "income": "2 lakh", "state": "Bihar"})
+    b = CitizenProfile.from_dict({"state": "Bihar", "annual_income": 200000, "sex": "F"})
+    assert a == b
+    assert a.canonical_hash == b.canonical_hash
+    assert a.to_dict() == {"annual_income": 200000, "gender": "female", "state": "Bihar"}
+
+
+def test_coerce():
+    profile = CitizenProfile.from_dict({"age": 40})
+    assert CitizenProfile.coerce(profile) is profile
+    assert CitizenProfile.coerce(None) == {}
+    with pytest.raises(ValueError):
+        CitizenProfile.coerce("age 40")
+
+
+def test_render():
+    profile = CitizenProfile.from_dict({"age": 40, "income": 300000})
+    assert profile.render() == "- age: 40\n- annual_income: ₹3 lakh per year"
@@ -0,0 +1,78 @@
+import struct
+
+import pytest
+
+from app.services.compiled_catalog import (
+    FORMAT_VERSION, MAGIC, CompiledCatalog, catalog_fingerprint, compile_catalog, open_compiled_catalog
+)
+from app.services.scheme_catalog import SCHEME_CATALOG, match_catalog
+
+SCHEMES = SCHEME_CATALOG + [{
+    "scheme_name": "State Widow Pension",
+    "benefits": {"type": "cash", "amount": 1500, "description": "Monthly pension"},
+    "eligibility_criteria": {"age": {"min": 40}, "income": {"max": 100000}},
+    "target_group": "Widows",
+    "eligibility": "Widowed women from poor households",
+}]
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    compiled = CompiledCatalog(compile_catalog(SCHEMES, str(tmp_path / "catalog.bin")))
+    yield compiled
+    compiled.close()
+
+
+def test_round_trip(catalog):
+    assert len(catalog) == len(SCHEMES)
+    assert list(catalog) == SCHEMES
+    assert catalog[-1] == SCHEMES[-1]
+    assert catalog[1:3] == SCHEMES[1:3]
+    assert catalog.fingerprint == catalog_fingerprint(SCHEMES)
+    with pytest.raises(IndexError):
+        catalog[len(SCHEMES)]
+
+
+def test_postings(catalog):
+    farmers = catalog.postings("farmers")
+    assert farmers and all("farmers" in str(SCHEMES[i]).lower() for i in farmers)
+    assert catalog.postings("zzzz") == []
+    assert set(catalog.candidates(["widow"])) == {len(SCHEMES) - 1}
+
+
+def test_stale_file_is_recompiled(tmp_path):
+    path = str(tmp_path / "catalog.bin")
+    compile_catalog(SCHEMES[:3], path)
+    catalog = open_compiled_catalog(path, SCHEMES)
+    assert len(catalog) == len(SCHEMES)
+    catalog.close()
+
+
+def test_older_format_is_recompiled(tmp_path):
+    path = tmp_path / "catalog.bin"
+    path.write_bytes(struct.pack("<8sH", MAGIC, FORMAT_VERSION - 1) + b"\x00" * 64)
+    catalog = open_compiled_catalog(str(path), SCHEMES)
+    assert list(catalog) == SCHEMES
+    catalog.close()
+
+
+@pytest.mark.parametrize("profile", [
+    {"occupation": "farmer", "state": "Bihar"},
+    {"age": 30, "gender": "female", "occupation": "student"},
+    {"occupation": "street vendor", "category": "SC"},
+])
+def test_compiled_and_list_match_alike(catalog, profile):
+    assert match_catalog(profile, catalog) == match_catalog(profile, SCHEMES)
+
+
+def test_free_text_limits_do_not_exclude():
+    # "Account for girls below 10 years" describes the girl, not the parent applying
+    names = [r["scheme_name"] for r in match_catalog({"age": 32, "goal": "girl child"}, SCHEMES)["recommendations"]]
+    assert "Beti Bachao Beti Padhao" in names
+
+
+def test_structured_limits_rank_last():
+    recommendations = match_catalog({"age": 30, "status": "poor widow women"}, SCHEMES, limit=20)["recommendations"]
+    assert recommendations[-1]["scheme_name"] == "State Widow Pension"
+    assert recommendations[-1]["priority"] == "low"
+    assert "outside its limits" in recommendations[-1]["why_suitable"]
@@ -0,0 +1,128 @@
+import pytest
+
+from app.services.eligibility_rules import (
+    FAILED, MET, UNEXPLAINED, UNKNOWN, evaluate_criteria, parse_amount, parse_amount_range, parse_exact_amount, render_explanation,
+    verdict
+)
+
+
+def status(criteria, profile):
+    [result] = evaluate_criteria(criteria, profile)
+    return result["status"]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Rs. 2,50,000", 250000),
+    ("Rs 2,50,000", 250000),
+    ("INR 1.2 lakhs per annum", 120000),
+    ("₹2.5 lakh", 250000),
+    ("3,00,000", 300000),
+    ("10k", 10000),
+    ("1.2 crore", 12000000),
+    (250000, 250000),
+])
+def test_parse_amount(text, expected):
+    assert parse_amount(text) == expected
+
+
+@pytest.mark.parametrize("text", ["no limit", ".", "", None, True])
+def test_parse_amount_without_a_number(text):
+    assert parse_amount(text) is None
+
+
+def test_parse_exact_amount():
+    assert parse_exact_amount("Rs. 2,50,000 per year") == 250000
+    assert parse_exact_amount(40) == 40
+    assert parse_exact_amount("1.5-2.5 lakh") is None
+    assert parse_exact_amount("2 lakh, 3 acres") is None
+    assert parse_exact_amount("unknown") is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1.5-2.5 lakh", (150000, 250000)),
+    ("₹1 lakh to ₹2 lakh", (100000, 200000)),
+    ("1 lakh - 50,000", (50000, 100000)),
+    ("₹2.5 lakh", (250000, 250000)),
+])
+def test_ranges_apply_the_unit_to_both_ends(text, expected):
+    assert parse_amount_range(text) == expected
+
+
+def test_a_range_limit_uses_its_upper_bound():
+    assert parse_amount("1.5-2.5 lakh") == 250000
+    assert status({"income": {"max": "1.5-2.5 lakh"}}, {"annual_income": 200000}) == MET
+
+
+@pytest.mark.parametrize("criteria, profile, expected", [
+    ({"gender": ["female"]}, {"gender": "male"}, FAILED),
+    ({"gender": ["female"]}, {"gender": "F"}, MET),
+    ({"gender": "Women"}, {"gender": "female"}, MET),
+    ({"gender": ["male", "female"]}, {"gender": "male"}, MET),
+    ({"location": ["Uttar Pradesh"]}, {"state": "Pradesh"}, FAILED),
+    ({"location": ["Uttar Pradesh"]}, {"state": "UP"}, MET),
+    ({"location": ["Uttar Pradesh"]}, {"location": "Lucknow, Uttar Pradesh"}, MET),
+    ({"location": ["Uttar Pradesh"]}, {"state": "Bihar", "district": "Patna"}, FAILED),
+    ({"location": ["All India"]}, {"state": "Bihar"}, MET),
+    ({"category": ["SC/ST"]}, {"category": "ST"}, MET),
+    ({"category": ["Scheduled Castes"]}, {"caste": "sc"}, MET),
+    ({"category": ["SC"]}, {"category": "OBC"}, FAILED),
+    ({"occupation": ["farmers"]}, {"occupation": "kisan"}, MET),
+    ({"occupation": ["farmers"]}, {"occupation": "farm_labourer"}, FAILED),
+])
+def test_membership_compares_canonical_values_exactly(criteria, profile, expected):
+    assert status(criteria, profile) == expected
+
+
+def test_a_district_alone_cannot_rule_out_a_state():
+    assert status({"location": ["Uttar Pradesh"]}, {"district": "Patna"}) == UNKNOWN
+
+
+def test_age_and_income_limits():
+    profile = {"age": "30", "income": "Rs. 2,50,000"}
+    assert status({"age": {"min": 18, "max": 40}}, profile) == MET
+    assert status({"age": {"min": 35}}, profile) == FAILED
+    assert status({"income": {"max": 200000}}, profile) == FAILED
+    assert status({"income": {"max": 25000, "unit": "monthly"}}, profile) == MET
+    assert status({"income": {"max": 200000}}, {"age": 30}) == UNKNOWN
+
+
+def test_age_limits_given_as_text():
+    [result] = evaluate_criteria({"age": {"min": "18", "max": "40 years"}}, {"age": 45})
+    assert result["status"] == FAILED
+    assert result["max"] == 40
+    assert result["typed"] is False
+    assert "40 years" in render_explanation("Scheme X", [result])
+    assert status({"age": {"min": "adult"}}, {"age": 45}) == UNEXPLAINED
+    assert status({"age": {"min": 18, "max": "varies"}}, {"age": 45}) == UNEXPLAINED
+
+
+def test_income_limits_need_a_rupee_marker():
+    profile = {"income": 100000}
+    assert status({"income": "below 2 acres"}, profile) == UNEXPLAINED
+    assert status({"income": {"max": "2 acres"}}, profile) == UNEXPLAINED
+    assert status({"income": "below ₹2 lakh"}, profile) == MET
+    assert status({"income": "Rs 50,000"}, profile) == FAILED
+    assert status({"income": "50000"}, profile) == FAILED
+    assert status({"income": {"max": 200000}}, {"income": "2 acres"}) == UNKNOWN
+
+
+def test_typed_requirements():
+    results = evaluate_criteria({"income": {"max": 50000}, "gender": ["female"], "location": "Bihar, UP",
+                                 "category": "SC"}, {"income": 100000, "gender": "male", "state": "Goa",
+                                                     "category": "OBC"})
+    assert [r["typed"] for r in results] == [True, True, False, False]
+
+
+def test_verdict():
+    assert verdict([]) == "undetermined"
+    assert verdict(evaluate_criteria({}, {"age": 30})) == "undetermined"
+    male = {"gender": "male", "age": 30}
+    assert verdict(evaluate_criteria({"gender": ["female"], "age": {"min": 18, "max": 40}}, male)) == "not_eligible"
+    assert verdict(evaluate_criteria({"age": {"min": 18}}, male)) == "eligible"
+    assert verdict(evaluate_criteria({"age": {"min": 18}, "category": ["SC"]}, male)) == "undetermined"
+
+
+def test_explanations_follow_the_verdict():
+    results = evaluate_criteria({"gender": ["female"]}, {"gender": "male"})
+    assert "do not appear to be eligible" in render_explanation("Scheme X", results)
+    assert "योजना" in render_explanation("Scheme X", results, language="hi")
@@ -0,0 +1,67 @@
+import pytest
+
+from app.agents.eligibility_verifier import EligibilityVerifierAgent, _assess_verification
+from app.config import settings
+
+CRITERIA = {"gender": ["female"], "age": {"min": 18, "max": 40}}
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setattr(settings, "CASCADE_RULES_FIRST", True)
+    monkeypatch.setattr(settings, "LLM_SMALL_MODEL", "")
+    verifier = EligibilityVerifierAgent()
+    verifier.model_calls = []
+
+    def fake_model(verification_input, model):
+        verifier.model_calls.append(model)
+        return {"is_eligible": True, "confidence": 0.9, "explanation": "model verdict"}
+
+    monkeypatch.setattr(verifier, "_verify_with_model", fake_model)
+    return verifier
+
+
+def test_failed_rule_is_accepted_without_a_model(agent):
+    result = agent._verify_with_cascade({"gender": "male", "age": 30}, CRITERIA, "")
+    assert result["source"] == "rules"
+    assert result["is_eligible"] is False
+    assert result["cascade"]["tier"] == "rules"
+    assert agent.model_calls == []
+
+
+def test_rules_pass_escalates_to_a_model(agent):
+    result = agent._verify_with_cascade({"gender": "female", "age": 30}, CRITERIA, "")
+    assert agent.model_calls == [settings.LLM_MODEL]
+    assert result["explanation"] == "model verdict"
+
+
+def test_undetermined_rules_escalate(agent):
+    agent._verify_with_cascade({"age": 30}, CRITERIA, "")
+    assert agent.model_calls == [settings.LLM_MODEL]
+
+
+def test_failed_free_text_rule_escalates(agent):
+    result = agent._verify_with_cascade({"age": 30, "income": 100000}, {"income": "below ₹50,000"}, "")
+    assert agent.model_calls == [settings.LLM_MODEL]
+    assert result["explanation"] == "model verdict"
+
+
+def test_failing_tier_is_skipped(agent, monkeypatch):
+    def broken(*args, **kwargs):
+        raise TypeError("bad criteria")
+
+    monkeypatch.setattr(agent, "_verify_with_rules", broken)
+    result = agent._verify_with_cascade({"age": 30}, CRITERIA, "")
+    first = result["cascade"]["attempts"][0]
+    assert (first["tier"], first["outcome"], first["reason"]) == ("rules", "failed", "no answer")
+    assert result["explanation"] == "model verdict"
+
+
+def test_assess_rules_results():
+    assert _assess_verification({"is_eligible": True, "confidence": 1.0, "verdict": "eligible",
+                                 "source": "rules"}) == (None, 0.0)
+    assert _assess_verification({"is_eligible": False, "confidence": 0.5, "verdict": "not_eligible",
+                                 "conclusive": True, "source": "rules"}) == (None, 1.0)
+    assert _assess_verification({"is_eligible": False, "confidence": 0.5, "verdict": "not_eligible",
+                                 "conclusive": False, "source": "rules"}) == (None, 0.0)
+    assert _assess_verification({"is_eligible": True, "confidence": 0.8}) == (None, 0.8)
@@ -0,0 +1,41 @@
+import asyncio
+import threading
+
+import openai
+
+from app.config import settings
+from app.routers.agents import FindBenefitsRequest, find_benefits
+from app.services import compiled_catalog
+
+
+def test_completion_does_not_block_the_event_loop(monkeypatch):
+    other_request_ran = threading.Event()
+    released = []
+
+    class FakeCompletions:
+        def create(self, **kwargs):
+            # Only returns early if the event loop is free to run other requests meanwhile
+            released.append(other_request_ran.wait(timeout=2))
+            raise openai.APIConnectionError(request=None)
+
+    class FakeOpenAI:
+        def __init__(self, **kwargs):
+            self.chat = type("Chat", (), {"completions": FakeCompletions()})()
+
+    monkeypatch.setattr(openai, "OpenAI", FakeOpenAI)
+    # The degraded answer reads the in-process catalog rather than compiling one into ./data
+    monkeypatch.setattr(settings, "SCHEME_CATALOG_COMPILED", False)
+    monkeypatch.setattr(compiled_catalog, "_catalog", None)
+    request = FindBenefitsRequest(citizen_profile={"age": 30, "occupation": "farmer"}, available_schemes=[])
+
+    async def other_request():
+        await asyncio.sleep(0.05)
+        other_request_ran.set()
+
+    async def scenario():
+        result, _ = await asyncio.gather(find_benefits(request, None), other_request())
+        return result
+
+    result = asyncio.run(scenario())
+    assert released == [True]
+    assert result["degraded"] is True
@@ -0,0 +1,57 @@
+import pytest
+
+from app.services.intent_router import IntentRouter
+
+PM_KISAN = "PM-KISAN (Pradhan Mantri Kisan Samman Nidhi)"
+
+
+@pytest.fixture(scope="module")
+def router():
+    return IntentRouter()
+
+
+@pytest.mark.parametrize("question, scheme", [
+    ("documents for pm kisan", PM_KISAN),
+    ("documents for PM-KISAN?", PM_KISAN),
+    ("pm kisan ke liye kya documents chahiye", PM_KISAN),
+    ("किसान के लिए दस्तावेज़", PM_KISAN),
+    ("what documents are needed for stand up india", "Stand Up India Scheme"),
+    ("Stand-Up India benefit amount", "Stand Up India Scheme"),
+    ("ujwala documents", "PM Ujjwala Yojana"),
+    ("ujjwala gas connection documents", "PM Ujjwala Yojana"),
+    ("mudra loan amount", "PM Mudra Yojana"),
+    ("age limit for atal pension apy", "National Pension Scheme (NPS) - APY"),
+    ("income limit for PMAY", "PM Awas Yojana (Urban & Rural)"),
+    ("which department runs MGNREGA", "Mahatma Gandhi National Rural Employment Guarantee Act (MGNREGA)"),
+])
+def test_catalog_lookups_are_answered_locally(router, question, scheme):
+    result = router.route(question)
+    assert result["decision"]["decision"] == "catalog"
+    assert result["decision"]["scheme"] == scheme
+    assert scheme in result["answer"]
+
+
+@pytest.mark.parametrize("question", [
+    "documents for kisan credit card",
+    "kisan credit card kitna milta hai",
+    "benefit amount of pm kisan maandhan",
+    "documents to stand in queue",
+])
+def test_near_miss_scheme_names_go_to_the_llm(router, question):
+    result = router.route(question)
+    assert result["decision"]["decision"] == "llm"
+    assert result["answer"] is None
+
+
+@pytest.mark.parametrize("question", [
+    "am i eligible for pm kisan",
+    "how to apply for mudra loan",
+    "compare pm kisan and pm fasal bima benefits",
+])
+def test_questions_about_the_citizen_or_process_go_to_the_llm(router, question):
+    assert router.route(question)["decision"]["decision"] == "llm"
+
+
+def test_language_follows_the_question(router):
+    assert router.route("pm kisan ke liye kya documents chahiye")["decision"]["language"] == "hi"
+    assert router.route("documents for pm kisan")["decision"]["language"] == "en"
@@ -0,0 +1,83 @@
+import asyncio
+
+from app.services.job_queue import JobQueue
+from app.services.job_store import SQLiteJobStore
+
+
+def shared_queues(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    return (JobQueue(workers=1, store=SQLiteJobStore(db_path), poll_interval=0.01),
+            JobQueue(workers=1, store=SQLiteJobStore(db_path), poll_interval=0.01))
+
+
+async def wait_for_status(queue, job_id, status):
+    for _ in range(200):
+        data = queue.view(job_id)
+        if data and data["status"] == status:
+            return data
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} never reached {status}: {queue.view(job_id)}")
+
+
+def test_other_worker_sees_job_and_events(tmp_path):
+    owner, other = shared_queues(tmp_path)
+
+    async def work(job):
+        job.report({"event": "halfway"})
+        return {"answer": 42}
+
+    async def scenario():
+        await owner.start()
+        await other.start()
+        try:
+            job = owner.submit("test", work)
+            data = await wait_for_status(other, job.id, "succeeded")
+            assert data["result"] == {"answer": 42}
+            assert [e["event"] for e in other.events(job.id)] == ["queued", "running", "halfway", "succeeded"]
+            assert other.cancel(job.id) is None
+        finally:
+            await owner.stop()
+            await other.stop()
+
+    asyncio.run(scenario())
+
+
+def test_cancel_from_other_worker_stops_the_job(tmp_path):
+    owner, other = shared_queues(tmp_path)
+
+    async def scenario():
+        await owner.start()
+        await other.start()
+        try:
+            job = owner.submit("test", lambda job: asyncio.sleep(10))
+            await wait_for_status(other, job.id, "running")
+            assert other.cancel(job.id) == "cancel_requested"
+            data = await wait_for_status(other, job.id, "cancelled")
+            assert "discarded" in data["progress"]["note"]
+            assert "cancel_requested" in [e["event"] for e in other.events(job.id)]
+        finally:
+            await owner.stop()
+            await other.stop()
+
+    asyncio.run(scenario())
+
+
+def test_cancel_reports_what_happened(tmp_path):
+    queue = JobQueue(workers=1, store=SQLiteJobStore(str(tmp_path / "jobs.db")))
+
+    async def scenario():
+        await queue.start()
+        try:
+            running = queue.submit("test", lambda job: asyncio.sleep(10))
+            waiting = queue.submit("test", lambda job: asyncio.sleep(10))
+            await wait_for_status(queue, running.id, "running")
+            assert queue.cancel(waiting.id) == "cancelled"
+            assert queue.cancel(running.id) == "cancel_requested"
+            assert running.status == "cancel_requested"
+            await wait_for_status(queue, running.id, "cancelled")
+            assert queue.cancel(running.id) is None
+            assert queue.cancel("unknown") is None
+        finally:
+            await queue.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from app.utils.json_stream import JsonArrayStreamer
+
+REPLY = '''```json
+{
+  "summary": "Quotes \\" and backslashes \\\\ in {braces} and [brackets]",
+  "other": {"recommendations": [{"scheme_name": "nested, not watched"}]},
+  "recommendations": [
+    {"scheme_name": "PM-KISAN", "why_suitable": "Says \\"farmer\\" \\\\ {not an item}", "score": 0.9},
+    {"scheme_name": "Ayushman \\u0905 Bharat", "documents": ["Aadhaar", "Ration card"], "extra": {"a": [1, {"b": 2}]}},
+    {"scheme_name": "Ends in backslash \\\\"}
+  ],
+  "total_potential_benefit": "₹6,000 per year"
+}
+```'''
+EXPECTED = json.loads(REPLY.strip("`").removeprefix("json"))["recommendations"]
+
+
+def stream(chunks):
+    streamer = JsonArrayStreamer("recommendations")
+    items = [item for chunk in chunks for item in streamer.feed(chunk)]
+    return streamer, items
+
+
+@pytest.mark.parametrize("size", range(1, 41))
+def test_every_chunk_size(size):
+    streamer, items = stream([REPLY[i:i + size] for i in range(0, len(REPLY), size)])
+    assert items == EXPECTED
+    assert streamer.done
+    assert streamer.text == REPLY
+
+
+def test_every_split_point():
+    for split in range(len(REPLY) + 1):
+        streamer, items = stream([REPLY[:split], REPLY[split:]])
+        assert items == EXPECTED, f"split at {split}: {REPLY[max(0, split - 10):split]!r}|"
+
+
+def test_items_arrive_when_they_close():
+    streamer = JsonArrayStreamer("recommendations")
+    assert streamer.feed('{"recommendations": [{"a": 1}, {"b"') == [{"a": 1}]
+    assert streamer.feed(': 2}') == [{"b": 2}]
+    assert not streamer.done
+    assert streamer.feed(']}') == []
+    assert streamer.done
+
+
+def test_long_reply():
+    items = [{"scheme_name": f"Scheme {i}", "why_suitable": "x" * 200} for i in range(2000)]
+    reply = json.dumps({"recommendations": items})
+    streamer, streamed = stream([reply[i:i + 7] for i in range(0, len(reply), 7)])
+    assert streamed == items
+    assert streamer.text == reply
@@ -0,0 +1,41 @@
+import numpy as np
+
+from app.core import semantic_cache
+from app.core.semantic_cache import HashingEmbedder, SemanticAnswerCache, create_embedder
+
+
+class FailingEmbedder:
+    def embed(self, texts):
+        raise OSError("model download failed")
+
+
+def test_paraphrase_hits_and_unrelated_question_misses():
+    cache = SemanticAnswerCache(embedder=HashingEmbedder(), threshold=0.8)
+    cache.store("What documents do I need for PM-KISAN?", "Aadhaar and land records")
+
+    hit = cache.lookup("what documents do i need for pm kisan")
+    assert hit["answer"] == "Aadhaar and land records"
+    assert cache.lookup("How do I apply for a scholarship?") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_embedder_failure_is_a_miss_not_an_error():
+    cache = SemanticAnswerCache(embedder=FailingEmbedder())
+    assert cache.lookup("What is PM-KISAN?") is None
+    assert cache.store("What is PM-KISAN?", "An income support scheme") is None
+    stats = cache.stats()
+    assert (stats["misses"], stats["errors"], stats["entries"]) == (1, 2, 0)
+
+
+def test_onnx_embedder_falls_back_when_warm_up_fails(monkeypatch):
+    class ColdOnnxEmbedder:
+        def embed(self, texts):
+            raise OSError("model download failed")
+
+    monkeypatch.setattr(semantic_cache, "OnnxMiniLMEmbedder", ColdOnnxEmbedder)
+    assert isinstance(create_embedder("onnx_minilm"), HashingEmbedder)
+
+
+def test_hashing_embedder_is_deterministic():
+    vectors = HashingEmbedder().embed(["pm kisan", "pm kisan"])
+    assert np.array_equal(vectors[0], vectors[1])
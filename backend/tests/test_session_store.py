@@ -0,0 +1,90 @@
+import pytest
+
+from app.config import settings
+from app.core.session_store import InMemorySessionStore, SQLiteSessionStore, validate_session_id
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "sessions.db")
+
+
+def test_sqlite_turns_are_shared_between_instances(db_path):
+    writer = SQLiteSessionStore(db_path)
+    reader = SQLiteSessionStore(db_path)
+    try:
+        writer.append_turn("s1", "hello", "hi")
+        writer.flush()
+        assert [t["user"] for t in reader.get_history("s1")] == ["hello"]
+
+        # A cached read is invalidated by another instance's write
+        writer.append_turn("s1", "again", "hi again")
+        writer.flush()
+        assert [t["user"] for t in reader.get_history("s1")] == ["hello", "again"]
+        assert reader.get_history("s2") == []
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_sqlite_unflushed_turns_are_visible_to_their_writer(db_path):
+    store = SQLiteSessionStore(db_path, flush_interval=60)
+    try:
+        store.append_turn("s1", "hello", "hi")
+        assert [t["agent"] for t in store.get_history("s1")] == ["hi"]
+    finally:
+        store.close()
+
+
+def test_sqlite_keeps_max_turns_and_survives_reopen(db_path):
+    store = SQLiteSessionStore(db_path, max_turns=3)
+    for i in range(5):
+        store.append_turn("s1", f"q{i}", f"a{i}")
+    store.close()
+
+    reopened = SQLiteSessionStore(db_path, max_turns=3)
+    try:
+        assert [t["user"] for t in reopened.get_history("s1")] == ["q2", "q3", "q4"]
+        assert [t["user"] for t in reopened.get_history("s1", limit=1)] == ["q4"]
+        reopened.clear("s1")
+        assert reopened.get_history("s1") == []
+    finally:
+        reopened.close()
+
+
+def test_sqlite_compacts_expired_sessions(db_path):
+    store = SQLiteSessionStore(db_path, ttl_seconds=-1)
+    try:
+        store.append_turn("s1", "hello", "hi")
+        store.flush()
+        assert store.get_history("s1") == []
+        assert store.compact() == 1
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize("session_id", ["default", "DEFAULT", " default ", "", "   "])
+def test_reserved_and_blank_session_ids_are_rejected(session_id):
+    with pytest.raises(ValueError):
+        validate_session_id(session_id)
+
+
+def test_sessionless_chat_is_not_remembered(monkeypatch):
+    from app.agents.citizen_advocate import CitizenAdvocateAgent
+    monkeypatch.setattr(settings, "SEMANTIC_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "INTENT_ROUTER_ENABLED", False)
+    store = InMemorySessionStore()
+    agent = CitizenAdvocateAgent(session_store=store)
+    prompts = []
+    monkeypatch.setattr(agent, "process", lambda message: prompts.append(message) or "answer")
+
+    agent.respond("my income is 2 lakh")
+    agent.respond("what did I say?")
+    assert "2 lakh" not in prompts[-1]
+    assert store.stats()["sessions"] == 0
+
+    agent.respond("my income is 2 lakh", session_id="citizen-1")
+    agent.respond("what did I say?", session_id="citizen-1")
+    assert "2 lakh" in prompts[-1]
+    with pytest.raises(ValueError):
+        agent.respond("replay", session_id="default")
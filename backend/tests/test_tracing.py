@@ -0,0 +1,37 @@
+import json
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import tracing
+from app.core.tracing import FileExporter, Trace, TracingMiddleware
+
+
+def test_health_and_metrics_are_not_traced(monkeypatch):
+    exported = []
+    monkeypatch.setattr(tracing, "export", exported.append)
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware)
+    for path in ("/health", "/metrics", "/api/schemes"):
+        app.get(path)(lambda: {"ok": True})
+
+    client = TestClient(app)
+    assert "server-timing" not in client.get("/health").headers
+    assert "server-timing" not in client.get("/metrics").headers
+    assert "server-timing" in client.get("/api/schemes").headers
+    assert [trace.spans[0].name for trace in exported] == ["GET /api/schemes"]
+
+
+def test_export_file_is_rotated(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    path.write_text("x" * 100)
+    exporter = FileExporter(str(path), max_bytes=50)
+    exporter.export(Trace())
+    for _ in range(100):
+        if path.exists() and path.read_text().endswith("\n"):
+            break
+        time.sleep(0.01)
+
+    assert (tmp_path / "traces.jsonl.1").read_text() == "x" * 100
+    assert len([json.loads(line) for line in path.read_text().splitlines()]) == 1
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from app.services.workflow_engine import AgentExecutor
+
+
+class FakeClient:
+    agent_name = "Eligibility Verifier Agent"
+    agent_id = "did:zynd:self"
+    capabilities = ["eligibility_verification"]
+    simulation_mode = False
+    task_messenger = None
+
+    def __init__(self, agents):
+        self.agents = agents
+        self.requests = []
+
+    def discover_agents(self, capabilities, top_k=5):
+        return [{"didIdentifier": did} for did in self.agents][:top_k]
+
+    async def request(self, message, target=None):
+        self.requests.append((message["action"], target))
+        return {"result": {"is_eligible": True}}
+
+
+class LocalVerifier:
+    def verify_eligibility(self, citizen_profile, scheme_criteria):
+        return {"is_eligible": False, "source": "local"}
+
+
+PAYLOAD = {"citizen_profile": {"age": 30}, "scheme_criteria": {}}
+
+
+def test_local_agent_is_called_in_process():
+    client = FakeClient(["did:zynd:other"])
+    executor = AgentExecutor({"eligibility_verifier": LocalVerifier()}, {"eligibility_verifier": client})
+    assert executor.mode_for("eligibility_verifier") == "in_process"
+    result = asyncio.run(executor.call("verify_eligibility", PAYLOAD))
+    assert result["source"] == "local"
+    assert client.requests == []
+
+
+def test_remote_agent_is_called_at_its_address():
+    client = FakeClient(["did:zynd:self", "did:zynd:other"])
+    executor = AgentExecutor({}, {"eligibility_verifier": client})
+    assert executor.mode_for("eligibility_verifier") == "mqtt"
+    assert asyncio.run(executor.call("verify_eligibility", PAYLOAD)) == {"is_eligible": True}
+    assert client.requests == [("verify_eligibility", "did:zynd:other")]
+
+
+def test_no_remote_agent():
+    executor = AgentExecutor({}, {"eligibility_verifier": FakeClient(["did:zynd:self"])})
+    with pytest.raises(RuntimeError, match="No agent on the Zynd network"):
+        asyncio.run(executor.call("verify_eligibility", PAYLOAD))